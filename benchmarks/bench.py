@@ -0,0 +1,185 @@
+"""
+Benchmarks of infa's own overhead, run against the fake pmrep binary.
+
+Usage:
+    python -m benchmarks.bench [--sizes 1e3,1e4,...] [--output results.json]
+                               [--baseline baseline.json --tolerance 0.25]
+
+Three groups of measurements are taken:
+    spawn:  wall and process spawn time of a command without output
+    format: format_output throughput on generated listobjects output,
+            compared with the original substring-matching implementation
+    memory: peak traced memory and wall time of a full listobjects call
+
+When a baseline file (the JSON output of a previous run) is supplied, the
+script exits with status 1 if any timing or memory figure got worse by more
+than the given tolerance.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import infa3
+import infa3.helper
+from infa3.instrument import HistogramSink
+
+from benchmarks import fake_pmrep
+
+FAKE_PMREP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_pmrep.py')
+COLUMN_SEPARATOR = '<=#CS#=>'
+DEFAULT_SIZES = '1e3,1e4,1e5,1e6,1e7'
+
+
+def fake_output(rows):
+    """
+    Return the listobjects output of the fake pmrep as cmd_execute would.
+    """
+    options = {'c': COLUMN_SEPARATOR, 'o': 'mapping'}
+    return list(fake_pmrep.render('listobjects', options, rows))
+
+
+def legacy_format_output(command_output, field_separator):
+    """
+    The original format_output, checking every line against all banner
+    substrings. Kept as the reference for the format benchmark.
+    """
+    ignore_lines = (
+        'Informatica',
+        'Copyright',
+        'All Rights Reserved',
+        'This Software is protected',
+        'Invoked at',
+        'Completed at',
+        'completed successfully'
+    )
+
+    result = []
+    for item in command_output:
+        if item and not any(s in item for s in ignore_lines):
+            if field_separator in item:
+                result.append(item.strip().split(field_separator))
+            else:
+                result.append(item.strip())
+
+    return result
+
+
+def connect(latency=0.0, rows=0):
+    os.environ['FAKE_PMREP_LATENCY'] = str(latency)
+    os.environ['FAKE_PMREP_ROWS'] = str(rows)
+    return infa3.Pmrep(FAKE_PMREP, r='REP_BENCH', h='localhost', o='6005', n='admin', x='secret')
+
+
+def bench_spawn(repeat, latency):
+    histogram = HistogramSink()
+    pmrep = connect(latency)
+    pmrep.observers.append(histogram)
+    for _ in range(repeat):
+        pmrep.connect()
+    stats = histogram.snapshot()['connect']
+    return {
+        'calls': stats['count'],
+        'wall_time': stats['wall_time'] / stats['count'],
+        'spawn_time': stats['spawn_time'] / stats['count'],
+    }
+
+
+def bench_format(rows):
+    output = fake_output(rows)
+    start = time.perf_counter()
+    result = infa3.helper.format_output(output, COLUMN_SEPARATOR)
+    elapsed = time.perf_counter() - start
+    assert len(result) == rows, (len(result), rows)
+    del result
+
+    start = time.perf_counter()
+    legacy_format_output(output, COLUMN_SEPARATOR)
+    legacy_elapsed = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'time': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else None,
+        'legacy_time': legacy_elapsed,
+        'speedup': legacy_elapsed / elapsed if elapsed else None,
+    }
+
+
+def bench_memory(rows):
+    pmrep = connect(rows=rows)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = pmrep.listobjects(o='mapping')
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert len(result) == rows, (len(result), rows)
+    return {'rows': rows, 'time': elapsed, 'peak_bytes': peak, 'bytes_per_row': peak / rows}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return a list of human readable regressions of results against baseline.
+    """
+    regressions = []
+
+    def check(name, current, previous):
+        if previous and current > previous * (1 + tolerance):
+            regressions.append('%s: %.6g -> %.6g (+%.0f%%)'
+                               % (name, previous, current, 100.0 * (current / previous - 1)))
+
+    check('spawn.wall_time', results['spawn']['wall_time'], baseline.get('spawn', {}).get('wall_time'))
+    for group, keys in (('format', ('time',)), ('memory', ('time', 'peak_bytes'))):
+        previous = dict((r['rows'], r) for r in baseline.get(group, []))
+        for current in results[group]:
+            if current['rows'] in previous:
+                for key in keys:
+                    check('%s[%d].%s' % (group, current['rows'], key),
+                          current[key], previous[current['rows']].get(key))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help='comma separated row counts (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=20, help='spawn benchmark calls')
+    parser.add_argument('--latency', type=float, default=0.0, help='fake pmrep latency in seconds')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative slowdown against the baseline')
+    args = parser.parse_args(argv)
+    sizes = [int(float(s)) for s in args.sizes.split(',')]
+
+    results = {'spawn': bench_spawn(args.repeat, args.latency), 'format': [], 'memory': []}
+    print('spawn: %(calls)d calls, %(wall_time).4fs wall, %(spawn_time).4fs spawn per call'
+          % results['spawn'])
+    for rows in sizes:
+        result = bench_format(rows)
+        results['format'].append(result)
+        print('format %(rows)10d rows: %(time)8.3fs, %(rows_per_second)12.0f rows/s, %(speedup)5.1fx vs legacy'
+              % result)
+    for rows in sizes:
+        result = bench_memory(rows)
+        results['memory'].append(result)
+        print('memory %(rows)10d rows: %(time)8.3fs, peak %(peak_bytes)12d B, %(bytes_per_row)6.0f B/row'
+              % result)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the pmrep binary, used to benchmark infa without a live
+repository.
+
+The script accepts any pmrep command line and prints a realistic pmrep
+banner, followed by generated output and the usual trailer. The listing
+commands (listobjects, listconnections, listobjectdependencies,
+findcheckout) print a configurable number of rows, objectexport writes an XML file with one
+mapping per row and backup writes a file of one block per row, which
+restore accepts.
+
+Behaviour is controlled by environment variables:
+    FAKE_PMREP_ROWS (int): number of generated rows. Default 1000.
+    FAKE_PMREP_LATENCY (float): seconds to sleep before producing any
+        output. Default 0.
+    FAKE_PMREP_NEWLINE (str): line terminator. Default '\\r\\n'.
+    FAKE_PMREP_FAIL (str): comma separated list of commands that should
+        fail instead of completing successfully.
+    FAKE_PMREP_INVALID_OBJECTS (str): comma separated list of object names
+        reported invalid by validate.
+    FAKE_PMREP_FAIL_OBJECTS (str): comma separated list of object names;
+        commands fail when their persistent input file (-i) or script file
+        (run -f) lists any of them.
+
+If INFA_REPCNX_INFO is set, connect creates that connection file, cleanup
+removes it and all other commands fail while it does not exist.
+"""
+import os
+import re
+import sys
+import time
+
+BANNER = (
+    '',
+    'Informatica(r) PMREP, version [9.6.1 HotFix3], build [990.0611], LINUX 64-bit',
+    'Copyright (c) Informatica Corporation 1994 - 2015',
+    'All Rights Reserved.',
+    'This Software is protected by U.S. Patent Numbers 5,794,246; 6,014,670; 6,016,501; '
+    '6,029,178; 6,032,158; 6,035,307; 6,044,374; 6,092,086; 6,208,990; 6,339,775; and RE44,478, '
+    'International Patents and other Patents Pending.',
+    '',
+    'Invoked at Thu Dec 10 19:50:02 2015',
+    '',
+)
+
+OBJECT_TYPES = ('mapping', 'session', 'workflow', 'source', 'target', 'mapplet')
+BACKUP_HEADER = b'FAKE PMREP REPOSITORY BACKUP\n'
+CONNECTION_TYPES = ('relational', 'application', 'ftp', 'loader', 'queue')
+
+
+def parse_args(args):
+    """
+    Split pmrep style arguments into a dict of option -> value (True for
+    flags followed by another option).
+    """
+    options = {}
+    i = 0
+    while i < len(args):
+        key = args[i].lstrip('-')
+        if i + 1 < len(args) and not args[i + 1].startswith('-'):
+            options[key] = args[i + 1]
+            i += 2
+        else:
+            options[key] = True
+            i += 1
+    return options
+
+
+def listobjects_rows(options, rows):
+    sep = options.get('c', ' ')
+    object_type = options.get('o', 'mapping')
+    if object_type == 'folder':
+        for i in range(rows):
+            yield 'FOLDER_%07d' % i
+    else:
+        for i in range(rows):
+            yield sep.join((object_type, 'm_LOAD_CUSTOMER_%07d' % i))
+
+
+def listconnections_rows(options, rows):
+    for i in range(rows):
+        yield 'CONN_ORA_%07d,%s' % (i, CONNECTION_TYPES[i % len(CONNECTION_TYPES)])
+
+
+def listobjectdependencies_rows(options, rows):
+    sep = options.get('c', ' ')
+    for i in range(rows):
+        yield sep.join((
+            OBJECT_TYPES[i % len(OBJECT_TYPES)],
+            'FOLDER_%03d' % (i % 100),
+            'OBJ_%07d' % i,
+            'reusable',
+        ))
+    yield '%d total dependent object(s) found.' % rows
+
+
+def findcheckout_rows(options, rows):
+    sep = options.get('c', ' ')
+    now = time.time()
+    for i in range(rows):
+        yield sep.join((
+            OBJECT_TYPES[i % len(OBJECT_TYPES)],
+            'none',
+            'FOLDER_%03d' % (i % 100),
+            'OBJ_%07d' % i,
+            str(1 + i % 7),
+            'user_%02d' % (i % 10),
+            time.strftime('%a %b %d %H:%M:%S %Y', time.localtime(now - 3600 * i)),
+        ))
+
+
+def validate_rows(options, rows):
+    invalid_names = set(os.environ.get('FAKE_PMREP_INVALID_OBJECTS', '').split(','))
+    with open(options['i']) as f:
+        objects = [line.rstrip('\n').split(',') for line in f]
+    invalid = [obj for obj in objects if obj[2] in invalid_names]
+    if isinstance(options.get('u'), str):
+        with open(options['u'], 'w') as f:
+            f.writelines(','.join(obj) + '\n' for obj in invalid)
+    for obj in objects:
+        yield 'Validating %s %s in folder %s...' % (obj[3], obj[2], obj[1])
+        if obj[2] in invalid_names:
+            yield 'TE_7001 Transformation Parse Error in %s [EXP_1]' % obj[2]
+    yield 'Number of objects validated: %d, invalid: %d' % (len(objects), len(invalid))
+
+
+def getconnectiondetails_rows(options, rows):
+    name = options.get('n', 'CONN_ORA_0000000')
+    number = int(name.rsplit('_', 1)[-1]) if name[-1:].isdigit() else 0
+    yield 'Connection Name: %s' % name
+    yield 'Connection Type: %s' % options.get('t', 'relational')
+    yield 'Connection Subtype: %s' % ('Oracle', 'ODBC', 'Microsoft SQL Server')[number % 3]
+    yield 'User Name: etl_user_%02d' % (number % 10)
+    yield 'Connect String: dbhost%02d:1521/ORCL%d' % (number % 20, number % 3)
+    yield 'Code Page: UTF-8 encoding of Unicode'
+    yield 'Environment SQL: '
+    yield 'Transaction Environment SQL: '
+
+
+def deployfolder_rows(options, rows):
+    steps = ('Copying sources', 'Copying targets', 'Copying mappings', 'Copying sessions', 'Copying workflows')
+    for step in steps:
+        yield '%s of folder %s...' % (step, options.get('f'))
+        sys.stdout.flush()
+        time.sleep(float(os.environ.get('FAKE_PMREP_LATENCY', 0)) / len(steps))
+    yield 'Folder %s deployed to repository %s.' % (options.get('f'), options.get('r'))
+
+
+def backup_rows(options, rows):
+    """
+    Write a backup file of `rows` blocks, growing over FAKE_PMREP_LATENCY
+    seconds.
+    """
+    delay = float(os.environ.get('FAKE_PMREP_LATENCY', 0)) / max(rows, 1)
+    with open(options.get('o', 'backup.rep'), 'wb') as f:
+        f.write(BACKUP_HEADER)
+        for i in range(rows):
+            f.write(('OBJECT %07d ' % i).encode('ascii') * 64 + b'\n')
+            f.flush()
+            time.sleep(delay)
+    yield 'Repository backup completed to file %s.' % options.get('o')
+
+
+def restore_rows(options, rows):
+    yield 'Restoring repository from file %s...' % options.get('i')
+
+
+def valid_backup(path):
+    """
+    Check whether a file has been written by backup.
+    """
+    if not isinstance(path, str) or not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(BACKUP_HEADER)) == BACKUP_HEADER
+
+
+def objectexport_rows(options, rows):
+    write_export(options.get('u', 'export.xml'), rows)
+    yield 'Exported %d object(s) - 0 Error(s), - 0 Warning(s)' % rows
+
+
+def write_export(path, rows):
+    """
+    Write an objectexport-like XML file with one mapping per row. Every
+    mapping reads one of 100 sources through a source qualifier and an
+    expression into a target, and holds a Sequence Generator.
+    """
+    with open(path, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<!DOCTYPE POWERMART SYSTEM "powrmart.dtd">\n')
+        f.write('<POWERMART CREATION_DATE="12/10/2015 19:50:02" REPOSITORY_VERSION="186.95">\n')
+        f.write('<REPOSITORY NAME="REP_BENCH" VERSION="186" CODEPAGE="UTF-8" DATABASETYPE="Oracle">\n')
+        f.write('<FOLDER NAME="BENCH" GROUP="" OWNER="admin" SHARED="NOTSHARED" DESCRIPTION="">\n')
+        for i in range(rows):
+            f.write(MAPPING_TEMPLATE.format(i=i, current=1 + i % 1000, source=i % 100))
+        f.write('</FOLDER>\n</REPOSITORY>\n</POWERMART>\n')
+
+
+MAPPING_TEMPLATE = '''<MAPPING NAME="m_LOAD_{i:07d}" ISVALID="YES" OBJECTVERSION="1" VERSIONNUMBER="1">
+    <TRANSFORMATION NAME="SQ_SRC_{i:07d}" TYPE="Source Qualifier" REUSABLE="NO"/>
+    <TRANSFORMATION NAME="EXP_{i:07d}" TYPE="Expression" REUSABLE="NO">
+        <TRANSFORMFIELD NAME="ID" PORTTYPE="INPUT/OUTPUT" EXPRESSION="ID"/>
+        <TRANSFORMFIELD NAME="NAME" PORTTYPE="INPUT"/>
+        <TRANSFORMFIELD NAME="v_NAME" PORTTYPE="LOCAL VARIABLE" EXPRESSION="LTRIM(RTRIM(NAME))"/>
+        <TRANSFORMFIELD NAME="NAME_OUT" PORTTYPE="OUTPUT" EXPRESSION="UPPER(v_NAME)"/>
+    </TRANSFORMATION>
+    <TRANSFORMATION NAME="SEQ_{i:07d}" TYPE="Sequence" REUSABLE="NO">
+        <TABLEATTRIBUTE NAME="Start Value" VALUE="1"/>
+        <TABLEATTRIBUTE NAME="Increment By" VALUE="1"/>
+        <TABLEATTRIBUTE NAME="End Value" VALUE="9223372036854775807"/>
+        <TABLEATTRIBUTE NAME="Current Value" VALUE="{current}"/>
+    </TRANSFORMATION>
+    <INSTANCE NAME="SRC_{i:07d}" TRANSFORMATION_NAME="SRC_{source:03d}" TRANSFORMATION_TYPE="Source Definition" TYPE="SOURCE" DBDNAME="ORA"/>
+    <INSTANCE NAME="SQ_SRC_{i:07d}" TRANSFORMATION_NAME="SQ_SRC_{i:07d}" TRANSFORMATION_TYPE="Source Qualifier" TYPE="TRANSFORMATION"/>
+    <INSTANCE NAME="EXP_{i:07d}" TRANSFORMATION_NAME="EXP_{i:07d}" TRANSFORMATION_TYPE="Expression" TYPE="TRANSFORMATION"/>
+    <INSTANCE NAME="TGT_{i:07d}" TRANSFORMATION_NAME="TGT_{i:07d}" TRANSFORMATION_TYPE="Target Definition" TYPE="TARGET"/>
+    <CONNECTOR FROMFIELD="ID" FROMINSTANCE="SRC_{i:07d}" FROMINSTANCETYPE="Source Definition" TOFIELD="ID" TOINSTANCE="SQ_SRC_{i:07d}" TOINSTANCETYPE="Source Qualifier"/>
+    <CONNECTOR FROMFIELD="NAME" FROMINSTANCE="SRC_{i:07d}" FROMINSTANCETYPE="Source Definition" TOFIELD="NAME" TOINSTANCE="SQ_SRC_{i:07d}" TOINSTANCETYPE="Source Qualifier"/>
+    <CONNECTOR FROMFIELD="ID" FROMINSTANCE="SQ_SRC_{i:07d}" FROMINSTANCETYPE="Source Qualifier" TOFIELD="ID" TOINSTANCE="EXP_{i:07d}" TOINSTANCETYPE="Expression"/>
+    <CONNECTOR FROMFIELD="NAME" FROMINSTANCE="SQ_SRC_{i:07d}" FROMINSTANCETYPE="Source Qualifier" TOFIELD="NAME" TOINSTANCE="EXP_{i:07d}" TOINSTANCETYPE="Expression"/>
+    <CONNECTOR FROMFIELD="ID" FROMINSTANCE="EXP_{i:07d}" FROMINSTANCETYPE="Expression" TOFIELD="CUSTOMER_ID" TOINSTANCE="TGT_{i:07d}" TOINSTANCETYPE="Target Definition"/>
+    <CONNECTOR FROMFIELD="NAME_OUT" FROMINSTANCE="EXP_{i:07d}" FROMINSTANCETYPE="Expression" TOFIELD="CUSTOMER_NAME" TOINSTANCE="TGT_{i:07d}" TOINSTANCETYPE="Target Definition"/>
+</MAPPING>
+'''
+
+GENERATORS = {
+    'listobjects': listobjects_rows,
+    'listconnections': listconnections_rows,
+    'listobjectdependencies': listobjectdependencies_rows,
+    'backup': backup_rows,
+    'deployfolder': deployfolder_rows,
+    'findcheckout': findcheckout_rows,
+    'getconnectiondetails': getconnectiondetails_rows,
+    'objectexport': objectexport_rows,
+    'restore': restore_rows,
+    'validate': validate_rows,
+}
+
+
+def render(command, options, rows, failing=(), connected=True):
+    """
+    Generate all output lines of a pmrep command.
+
+    Args:
+        command (str): pmrep command name (lowercase)
+        options (dict): parsed command options
+        rows (int): number of generated rows
+        failing (iterable[str]): commands which should fail
+        connected (bool): whether a repository connection exists
+
+    Yields:
+        str
+    """
+    for line in BANNER:
+        yield line
+    if command == 'connect':
+        yield 'Connected to repository %s in domain Domain_Bench as user %s' % (
+            options.get('r', 'REP_BENCH'), options.get('n', 'admin'))
+    generator = GENERATORS.get(command)
+    if command in failing:
+        yield 'Failed to execute %s.' % command
+    elif not connected:
+        yield 'There is no open connection to a repository.'
+        yield 'Failed to execute %s.' % command
+    else:
+        if generator is not None:
+            for line in generator(options, rows):
+                yield line
+        yield '.%s completed successfully.' % command
+    yield ''
+    yield 'Completed at Thu Dec 10 19:50:07 2015'
+
+
+def failing_objects(options):
+    """
+    Return the objects of the persistent input file or script file that
+    should fail.
+    """
+    names = set(n for n in os.environ.get('FAKE_PMREP_FAIL_OBJECTS', '').split(',') if n)
+    path = options.get('i', options.get('f'))
+    if not names or not isinstance(path, str) or not os.path.isfile(path):
+        return []
+    with open(path) as f:
+        return [token for token in re.split(r'[\s,"]+', f.read()) if token in names]
+
+
+def check_connection(command):
+    """
+    Maintain the connection file and check whether a command may run.
+    """
+    cnx_file = os.environ.get('INFA_REPCNX_INFO')
+    if cnx_file is None:
+        return True
+    if command == 'connect':
+        with open(cnx_file, 'w') as f:
+            f.write('fake pmrep connection\n')
+        return True
+    if not os.path.exists(cnx_file):
+        return False
+    if command == 'cleanup':
+        os.remove(cnx_file)
+    return True
+
+
+def main(argv):
+    command = argv[1].lower() if len(argv) > 1 else 'help'
+    options = parse_args(argv[2:])
+    rows = int(os.environ.get('FAKE_PMREP_ROWS', 1000))
+    latency = float(os.environ.get('FAKE_PMREP_LATENCY', 0))
+    newline = os.environ.get('FAKE_PMREP_NEWLINE', '\r\n')
+    failing = [c for c in os.environ.get('FAKE_PMREP_FAIL', '').split(',') if c]
+    if failing_objects(options) or (isinstance(options.get('P'), str) and options['P'] not in os.environ):
+        failing.append(command)
+    if command == 'restore' and not valid_backup(options.get('i')):
+        failing.append(command)
+
+    if latency:
+        time.sleep(latency)
+
+    connected = check_connection(command)
+    out = sys.stdout
+    out.writelines(line + newline for line in render(command, options, rows, failing, connected))
+    out.flush()
+    return 1 if command in failing or not connected else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
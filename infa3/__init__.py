@@ -1,7 +1,16 @@
 # pmrep interface
 from infa3.pmrep import Pmrep
+from infa3.pool import PmrepPool
+from infa3.retry import RetryPolicy
 
 # exceptions
-from infa3.exceptions import InfaError, InfaPmrepError
+from infa3.exceptions import (
+    InfaError, InfaPmrepError, InfaPmrepConnectionError, InfaPmrepLockError, InfaPmrepNotFoundError,
+    InfaPmrepPermissionError, InfaPmrepTimeoutError, InfaPmrepCancelledError, InfaBackupError
+)
 
-__all__ = ['Pmrep', 'InfaError', 'InfaPmrepError']
+__all__ = [
+    'Pmrep', 'PmrepPool', 'RetryPolicy', 'InfaError', 'InfaPmrepError', 'InfaPmrepConnectionError', 'InfaPmrepLockError',
+    'InfaPmrepNotFoundError', 'InfaPmrepPermissionError', 'InfaPmrepTimeoutError', 'InfaPmrepCancelledError',
+    'InfaBackupError'
+]
@@ -0,0 +1,386 @@
+"""
+This module contains the repository backup orchestrator.
+
+BackupOrchestrator.backup() runs pmrep backup with a skip preset (see
+SKIP_PRESETS) and, while pmrep is still writing, streams the growing backup
+file through gzip compression and a SHA-256 checksum in a background thread,
+so that the compressed copy is ready as soon as the backup completes. Every
+backup is recorded in a local catalog (catalog.json in the backup directory)
+with its sizes and durations; only the latest `keep` backups of a repository
+are kept.
+
+BackupOrchestrator.restore() decompresses a cataloged backup, checks it
+against the recorded checksum, runs pmrep restore and verifies that all
+folders present at backup time exist in the restored repository.
+
+    orchestrator = BackupOrchestrator(p, '/backup/infa', keep=7, preset='fast')
+    entry = orchestrator.backup(description='nightly')
+    print(entry.size, entry.compressed_size, entry.duration)
+    result = orchestrator.restore(entry, target=restored, u='Administrator', P='DOMAIN_PWD')
+"""
+import collections
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from infa3.exceptions import InfaBackupError
+
+# backup flags of the skip presets:
+#   b - workflow and session logs, j - deployment group history,
+#   q - MX data, v - task statistics
+SKIP_PRESETS = collections.OrderedDict([
+    ('full', ()),
+    ('metadata', ('b', 'v')),
+    ('fast', ('b', 'j', 'q', 'v')),
+])
+
+# restore flags skipping the same data as the backup flags
+RESTORE_SKIP_FLAGS = {'b': 'b', 'j': 'j', 'q': 'q', 'v': 'f'}
+
+CHUNK_SIZE = 1024 * 1024
+CATALOG_NAME = 'catalog.json'
+
+BackupEntry = collections.namedtuple('BackupEntry', [
+    'name',             # backup name, <repository>_<YYYYmmdd_HHMMSS>
+    'repository',       # repository name
+    'file',             # compressed backup file name, relative to the backup directory
+    'preset',           # skip preset
+    'description',      # backup description
+    'started',          # start time (seconds since the epoch)
+    'duration',         # seconds spent in pmrep backup, including the compression
+    'size',             # size of the backup file
+    'compressed_size',  # size of the compressed backup file
+    'sha256',           # SHA-256 checksum of the backup file
+    'folders',          # folders of the repository at backup time, None if not recorded
+])
+
+RestoreResult = collections.namedtuple('RestoreResult', [
+    'entry',             # restored BackupEntry
+    'status',            # 'verified', 'restored' (not verified) or 'incomplete'
+    'missing_folders',   # folders of the backup missing in the restored repository
+    'decompress_time',   # seconds spent decompressing and checking the backup
+    'restore_time',      # seconds spent in pmrep restore
+    'verify_time',       # seconds spent verifying the restored repository
+])
+
+
+class StreamCompressor(threading.Thread):
+    """
+    Background thread following a file while it is being written, passing
+    its content through gzip compression and a SHA-256 checksum.
+
+    The file is read up to its current end, then polled until stop() is
+    called; the remaining content is read before the thread ends.
+
+    Args:
+        path (str): file to follow (may not exist yet)
+        output (str): compressed file
+        compresslevel (int): gzip compression level
+        poll (float): seconds to wait for the file to grow
+    """
+
+    def __init__(self, path, output, compresslevel=6, poll=0.2):
+        super(StreamCompressor, self).__init__(name='backup-compressor')
+        self.daemon = True
+        self.path = path
+        self.output = output
+        self.compresslevel = compresslevel
+        self.poll = poll
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.error = None
+        self._done = threading.Event()
+
+    def stop(self):
+        """
+        Signal that the file is complete and wait for the thread to end.
+        """
+        self._done.set()
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+    def run(self):
+        try:
+            while not os.path.exists(self.path):
+                if self._done.wait(self.poll):
+                    if not os.path.exists(self.path):
+                        return
+                    break
+            with open(self.path, 'rb') as source, gzip.open(self.output, 'wb', self.compresslevel) as target:
+                while True:
+                    done = self._done.is_set()
+                    chunk = source.read(CHUNK_SIZE)
+                    if chunk:
+                        target.write(chunk)
+                        self.digest.update(chunk)
+                        self.size += len(chunk)
+                    elif done:
+                        return
+                    else:
+                        self._done.wait(self.poll)
+        except (IOError, OSError) as e:
+            self.error = e
+
+
+def file_sha256(path):
+    """
+    Return the SHA-256 checksum and the size of a file.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def compress_file(path, output, compresslevel=6):
+    """
+    Compress a file with gzip.
+    """
+    with open(path, 'rb') as source, gzip.open(output, 'wb', compresslevel) as target:
+        shutil.copyfileobj(source, target, CHUNK_SIZE)
+
+
+def decompress_file(path, output):
+    """
+    Decompress a gzip file, returning the SHA-256 checksum and the size of
+    the decompressed content.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with gzip.open(path, 'rb') as source, open(output, 'wb') as target:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+            target.write(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def folder_names(pmrep):
+    """
+    Return the folder names of a repository.
+    """
+    return [row if isinstance(row, str) else row[-1] for row in pmrep.listobjects(o='folder')]
+
+
+class BackupOrchestrator(object):
+    """
+    Run compressed, cataloged backups of a repository and restore them.
+
+    Args:
+        pmrep (Pmrep): repository to back up
+        directory (str): backup directory, holding the compressed backups
+            and the catalog
+        keep (int): number of backups of the repository kept; older ones are
+            removed after every backup
+        preset (str): default skip preset, a key of SKIP_PRESETS
+        compresslevel (int): gzip compression level (1 is fastest)
+    """
+
+    def __init__(self, pmrep, directory, keep=7, preset='fast', compresslevel=6):
+        if preset not in SKIP_PRESETS:
+            raise ValueError('unknown skip preset: %s' % preset)
+        self.pmrep = pmrep
+        self.directory = directory
+        self.keep = keep
+        self.preset = preset
+        self.compresslevel = compresslevel
+        self.catalog_file = os.path.join(directory, CATALOG_NAME)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    @property
+    def repository(self):
+        return self.pmrep.connect_params.get('r')
+
+    def entries(self, repository=None):
+        """
+        Return the cataloged backups, oldest first.
+
+        Args:
+            repository (Optional[str]): only the backups of this repository
+        """
+        if not os.path.exists(self.catalog_file):
+            return []
+        with open(self.catalog_file) as f:
+            entries = [BackupEntry(**entry) for entry in json.load(f)['backups']]
+        return [e for e in entries if repository is None or e.repository == repository]
+
+    def latest(self, repository=None):
+        """
+        Return the latest cataloged backup of a repository (this one by
+        default), None if there is none.
+        """
+        entries = self.entries(repository or self.repository)
+        return entries[-1] if entries else None
+
+    def _save(self, entries):
+        tmp_path = self.catalog_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'backups': [e._asdict() for e in entries]}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.catalog_file)
+
+    def _rotate(self, entries, repository):
+        """
+        Drop all but the latest `keep` backups of a repository, removing
+        their files.
+        """
+        own = [e for e in entries if e.repository == repository]
+        expired = set(e.name for e in own[:max(len(own) - self.keep, 0)])
+        for entry in entries:
+            if entry.name in expired:
+                path = os.path.join(self.directory, entry.file)
+                if os.path.exists(path):
+                    os.remove(path)
+        return [e for e in entries if e.name not in expired]
+
+    def backup(self, description=None, preset=None, record_folders=True, keep_raw=False, **params):
+        """
+        Back up the repository.
+
+        Args:
+            description (Optional[str]): backup description
+            preset (Optional[str]): skip preset, the default of the
+                orchestrator if not given
+            record_folders (bool): record the folders of the repository in
+                the catalog, to verify restores
+            keep_raw (bool): keep the uncompressed backup file next to the
+                compressed one
+            **params: further kwargs of Pmrep.backup (e.g. timeout, cancel)
+
+        Returns:
+            BackupEntry
+        """
+        preset = preset or self.preset
+        if preset not in SKIP_PRESETS:
+            raise ValueError('unknown skip preset: %s' % preset)
+        started = time.time()
+        name = '%s_%s' % (self.repository, time.strftime('%Y%m%d_%H%M%S', time.localtime(started)))
+        raw_file = os.path.join(self.directory, name + '.rep')
+        compressed_file = raw_file + '.gz'
+        folders = folder_names(self.pmrep) if record_folders else None
+
+        for flag in SKIP_PRESETS[preset]:
+            params[flag] = True
+        if description is not None:
+            params['d'] = description
+        if os.path.exists(raw_file):
+            os.remove(raw_file)
+        compressor = StreamCompressor(raw_file, compressed_file, self.compresslevel)
+        start_counter = time.perf_counter()
+        compressor.start()
+        try:
+            try:
+                self.pmrep.backup(o=raw_file, f=True, **params)
+            except BaseException as e:
+                # the pmrep error is the one to report, not a compressor
+                # failure it may have caused
+                try:
+                    compressor.stop()
+                except Exception as stop_error:
+                    raise e from stop_error
+                raise
+            compressor.stop()
+            # pmrep is expected to write the file sequentially; recompress it
+            # should it have rewritten any part of the file already read
+            sha256, size = file_sha256(raw_file)
+            if sha256 != compressor.digest.hexdigest():
+                compress_file(raw_file, compressed_file, self.compresslevel)
+        except BaseException:
+            for path in (raw_file, compressed_file):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        duration = time.perf_counter() - start_counter
+        if not keep_raw:
+            os.remove(raw_file)
+
+        entry = BackupEntry(
+            name=name,
+            repository=self.repository,
+            file=os.path.basename(compressed_file),
+            preset=preset,
+            description=description,
+            started=started,
+            duration=duration,
+            size=size,
+            compressed_size=os.path.getsize(compressed_file),
+            sha256=sha256,
+            folders=folders,
+        )
+        entries = self.entries()
+        entries.append(entry)
+        self._save(self._rotate(entries, entry.repository))
+        return entry
+
+    def restore(self, entry=None, target=None, verify=True, skip=False, **params):
+        """
+        Restore a cataloged backup.
+
+        The backup is decompressed next to the compressed file and checked
+        against the catalog checksum before pmrep restore runs. The restored
+        repository must contain all folders recorded at backup time.
+
+        Args:
+            entry (Optional[BackupEntry, str]): backup or backup name. Default
+                is the latest backup of the repository.
+            target (Optional[Pmrep]): connection to the repository to restore
+                to (in exclusive mode, without content). Default is the
+                repository of the orchestrator.
+            verify (bool): verify the folders of the restored repository
+            skip (bool): skip the data the backup preset skipped
+            **params: further kwargs of Pmrep.restore (u, s, p, P, y, g, a,
+                timeout, cancel, ...)
+
+        Returns:
+            RestoreResult
+
+        Raises:
+            InfaBackupError: the backup is not cataloged or is damaged
+        """
+        if entry is None:
+            entry = self.latest()
+        elif not isinstance(entry, BackupEntry):
+            entry = next((e for e in self.entries() if e.name == entry), None)
+        if entry is None:
+            raise InfaBackupError('backup not found in %s' % self.catalog_file)
+        target = target or self.pmrep
+        if skip:
+            for flag in SKIP_PRESETS[entry.preset]:
+                params[RESTORE_SKIP_FLAGS[flag]] = True
+
+        compressed_file = os.path.join(self.directory, entry.file)
+        raw_file = os.path.join(self.directory, entry.name + '.restore.rep')
+        start_counter = time.perf_counter()
+        try:
+            try:
+                sha256, size = decompress_file(compressed_file, raw_file)
+            except (IOError, OSError, EOFError) as e:
+                raise InfaBackupError('cannot decompress %s: %s' % (compressed_file, e))
+            if (sha256, size) != (entry.sha256, entry.size):
+                raise InfaBackupError('%s does not match its checksum' % compressed_file)
+            decompress_time = time.perf_counter() - start_counter
+
+            start_counter = time.perf_counter()
+            target.restore(i=raw_file, **params)
+            restore_time = time.perf_counter() - start_counter
+        finally:
+            if os.path.exists(raw_file):
+                os.remove(raw_file)
+
+        missing = []
+        status = 'restored'
+        start_counter = time.perf_counter()
+        if verify and entry.folders is not None:
+            present = set(folder_names(target))
+            missing = [folder for folder in entry.folders if folder not in present]
+            status = 'incomplete' if missing else 'verified'
+        verify_time = time.perf_counter() - start_counter
+        return RestoreResult(entry, status, missing, decompress_time, restore_time, verify_time)
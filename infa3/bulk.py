@@ -0,0 +1,392 @@
+"""
+This module contains the runner of bulk operations: a large set of objects
+is split into shards, and the shards are processed concurrently by worker
+threads, each with its own isolated Pmrep connection (see Pmrep.clone).
+
+Shards usually reach pmrep as persistent input files (see write_input_file),
+so that one pmrep call handles hundreds of objects. When a shard fails, it is
+split and retried until the failing objects are isolated, so that the report
+lists exactly the objects which could not be processed.
+"""
+import collections
+import itertools
+import os
+import re
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import infa3.helper
+from infa3.exceptions import InfaPmrepError, InfaPmrepCancelledError
+
+# number of objects in one shard (one pmrep call) by default
+SHARD_SIZE = 500
+
+RepositoryObject = collections.namedtuple('RepositoryObject', [
+    'folder',    # folder name
+    'name',      # object name
+    'type',      # object type, e.g. 'mapping'
+    'subtype',   # object subtype, e.g. 'none' or 'aggregator'
+    'version',   # version number, None for the latest version
+    'reusable',  # 'reusable' or 'non-reusable'
+])
+RepositoryObject.__new__.__defaults__ = ('none', None, 'reusable')
+
+Failure = collections.namedtuple('Failure', ['item', 'error'])
+
+# object types pmrep validates; other objects are skipped by validate_bulk
+VALIDATABLE_TYPES = ('mapping', 'mapplet', 'session', 'worklet', 'workflow')
+
+ValidationResult = collections.namedtuple('ValidationResult', [
+    'object',    # RepositoryObject
+    'status',    # 'valid', 'invalid' or 'skipped'
+    'messages',  # tuple of the output lines mentioning the object
+])
+
+
+def as_object(item):
+    """
+    Return a RepositoryObject for a RepositoryObject, a (folder, name, type,
+    ...) tuple or a dict of the RepositoryObject fields.
+    """
+    if isinstance(item, RepositoryObject):
+        return item
+    if isinstance(item, dict):
+        return RepositoryObject(**item)
+    return RepositoryObject(*item)
+
+
+def write_input_file(path, objects):
+    """
+    Write a pmrep persistent input file listing the given objects.
+
+    Every line has the format
+    encoded ID,folder,name,type,subtype,version,reusable
+    with 'none' as the encoded ID of objects not taken from a query result.
+
+    Args:
+        path (str): file name
+        objects (iterable): RepositoryObjects or tuples accepted by
+            as_object()
+
+    Returns:
+        path
+    """
+    with open(path, 'w') as f:
+        for obj in map(as_object, objects):
+            f.write(','.join((
+                'none',
+                obj.folder,
+                obj.name,
+                obj.type,
+                obj.subtype or 'none',
+                '' if obj.version is None else str(obj.version),
+                obj.reusable or 'reusable',
+            )) + '\n')
+    return path
+
+
+def read_input_file(path):
+    """
+    Read a pmrep persistent input (or output) file.
+
+    Returns:
+        List of RepositoryObject
+    """
+    objects = []
+    with open(path) as f:
+        for line in f:
+            fields = line.rstrip('\r\n').split(',')
+            if len(fields) >= 7:
+                objects.append(RepositoryObject(
+                    fields[1], fields[2], fields[3], fields[4], fields[5] or None, fields[6]))
+    return objects
+
+
+# validate output line naming the object validated next, e.g.
+# "Validating mapping m_load in folder Sales..."
+VALIDATING = re.compile(r'(?P<type>\w+) \[?(?P<name>[^\s\[\]]+)\]? in folder \[?(?P<folder>[^\s\[\]]+?)\]?(?:\.+)?$')
+
+
+def validation_results(objects, invalid, output):
+    """
+    Build the ValidationResults of validated objects.
+
+    An output line mentioning an object name belongs to the object named by
+    the preceding "<type> <name> in folder <folder>" line, so that objects
+    with the same name in other folders or of other types do not get each
+    other's messages. Lines outside of such a context are kept only for
+    names unique among the objects.
+
+    Args:
+        objects (list[RepositoryObject]): validated objects
+        invalid (iterable[RepositoryObject]): objects reported invalid
+            after the validation (read from the persistent output file)
+        output (list): formatted output of the validate command
+
+    Returns:
+        List of ValidationResult
+    """
+    invalid = set((o.folder, o.type, o.name) for o in invalid)
+    lines = [row if isinstance(row, str) else '.'.join(row) for row in output]
+    keys = dict(((obj.folder.lower(), obj.type.lower(), obj.name.lower()), (obj.folder, obj.type, obj.name))
+                for obj in objects)
+    by_name = collections.defaultdict(set)
+    for key in keys.values():
+        by_name[key[2]].add(key)
+    messages = collections.defaultdict(list)
+    current = None
+    for line in lines:
+        match = VALIDATING.search(line)
+        if match is not None:
+            current = keys.get((match.group('folder').lower(), match.group('type').lower(),
+                                match.group('name').lower()))
+        for token in set(re.split(r'[\s\[\]\'"]+', line)):
+            if current is not None and token == current[2]:
+                messages[current].append(line)
+            elif token in by_name and len(by_name[token]) == 1:
+                messages[next(iter(by_name[token]))].append(line)
+    return [
+        ValidationResult(
+            obj,
+            'invalid' if (obj.folder, obj.type, obj.name) in invalid else 'valid',
+            tuple(messages.get((obj.folder, obj.type, obj.name), ())),
+        )
+        for obj in objects
+    ]
+
+
+def write_script_file(path, spec, calls):
+    """
+    Write a pmrep script file (see Pmrep.run) calling one command several
+    times.
+
+    Args:
+        path (str): file name
+        spec (CommandSpec): command specification, see infa3.commands
+        calls (iterable[dict]): kwargs of the individual calls
+
+    Returns:
+        path
+    """
+    with open(path, 'w') as f:
+        for params in calls:
+            arguments = list(spec.forced) + infa3.helper.cmd_prepare(params, spec.args, spec.flags)
+            f.write(' '.join([spec.name] + [_quote(a) for a in arguments]) + '\n')
+    return path
+
+
+def _quote(argument):
+    argument = str(argument)
+    if argument and not re.search(r'[\s"]', argument):
+        return argument
+    return '"%s"' % argument.replace('"', '\\"')
+
+
+def shards(items, size, key=None):
+    """
+    Split an iterable into lists of at most `size` items. With a `key`
+    function, the items are grouped by key first, and every shard holds
+    items with the same key only.
+    """
+    if key is not None:
+        for _, group in itertools.groupby(sorted(items, key=key), key):
+            for shard in shards(group, size):
+                yield shard
+        return
+    items = iter(items)
+    while True:
+        shard = list(itertools.islice(items, size))
+        if not shard:
+            return
+        yield shard
+
+
+class BulkReport(object):
+    """
+    Outcome of a bulk operation.
+
+    Attributes:
+        total (int): number of processed items
+        succeeded (list): items processed without an error
+        skipped (list): items which did not need to be processed
+        failed (list[Failure]): items which could not be processed, with
+            the error raised by pmrep (or the operation)
+        calls (int): number of pmrep calls made (including the splitting
+            of failed shards)
+        elapsed (float): seconds spent
+        results (list): values returned by the operation for every
+            successful shard
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.succeeded = []
+        self.skipped = []
+        self.failed = []
+        self.calls = 0
+        self.elapsed = 0.0
+        self.results = []
+
+    @property
+    def throughput(self):
+        """
+        Processed items per second.
+        """
+        return self.total / self.elapsed if self.elapsed else None
+
+    @property
+    def ok(self):
+        return not self.failed
+
+    def __repr__(self):
+        return '<BulkReport %d items, %d skipped, %d failed, %d calls, %.1fs, %.1f items/s>' % (
+            self.total, len(self.skipped), len(self.failed), self.calls, self.elapsed, self.throughput or 0.0)
+
+
+class BulkRunner(object):
+    """
+    Run an operation over shards of items on a fixed number of worker
+    threads, each owning an isolated clone of a Pmrep instance.
+
+    Args:
+        pmrep (Pmrep): instance the workers are cloned from
+        workers (int): number of concurrent pmrep connections
+        workdir (Optional[str]): directory for the connection and input files
+            of the workers. Default is a temporary directory removed once the
+            runner is closed.
+        cancel (Optional[threading.Event]): once set, running pmrep commands
+            are killed and the remaining shards fail with
+            InfaPmrepCancelledError
+        progress (Optional[callable]): called with the report after each
+            finished shard
+    """
+
+    def __init__(self, pmrep, workers=4, workdir=None, cancel=None, progress=None):
+        self.pmrep = pmrep
+        self.workers = workers
+        self._own_workdir = workdir is None
+        self.workdir = workdir or tempfile.mkdtemp(prefix='infa3-bulk-')
+        self.cancel = cancel or pmrep.cancel or threading.Event()
+        self.progress = progress
+        self._clones = queue.LifoQueue()
+        self._all_clones = []
+        self._lock = threading.Lock()
+        self._files = itertools.count()
+
+    def input_file(self, objects):
+        """
+        Write a persistent input file for the objects into the working
+        directory and return its path.
+        """
+        return write_input_file(
+            os.path.join(self.workdir, 'input-%06d.txt' % next(self._files)), objects)
+
+    def script_file(self, spec, calls):
+        """
+        Write a pmrep script file for the calls into the working directory
+        and return its path.
+        """
+        return write_script_file(
+            os.path.join(self.workdir, 'script-%06d.txt' % next(self._files)), spec, calls)
+
+    def _acquire(self):
+        try:
+            return self._clones.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                cnx_file = os.path.join(self.workdir, 'worker-%d.cnx' % len(self._all_clones))
+                clone = self.pmrep.clone(cnx_file=cnx_file, cancel=self.cancel)
+                self._all_clones.append(clone)
+            return clone
+
+    def _process(self, operation, shard, report, isolate):
+        pending = [shard]
+        while pending:
+            items = pending.pop()
+            pmrep = self._acquire()
+            try:
+                result = operation(pmrep, items)
+            except Exception as e:
+                # e.g. an unsupported option or an unwritable input file fails
+                # the shard only, like a pmrep error
+                error = e
+            else:
+                error = None
+            finally:
+                self._clones.put(pmrep)
+            with self._lock:
+                report.calls += 1
+                if error is None:
+                    report.succeeded.extend(items)
+                    if result is not None:
+                        report.results.append(result)
+                elif isolate and len(items) > 1 and not isinstance(error, InfaPmrepCancelledError):
+                    middle = len(items) // 2
+                    pending.extend((items[middle:], items[:middle]))
+                else:
+                    report.failed.extend(Failure(item, error) for item in items)
+
+    def run(self, operation, items, shard_size=SHARD_SIZE, isolate=True, key=None, skipped=()):
+        """
+        Process the items in shards.
+
+        Args:
+            operation (callable): called as operation(pmrep, shard) with the
+                Pmrep clone of the worker and a list of items. Its return
+                value is collected in report.results.
+            items (iterable): items to process
+            shard_size (int): maximum number of items per operation call
+            isolate (bool): split failed shards until the failing items are
+                identified. Otherwise all items of a failed shard are
+                reported as failed.
+            key (Optional[callable]): shard the items by this key, see
+                shards()
+            skipped (iterable): items not processed, listed in the report
+
+        Returns:
+            BulkReport
+        """
+        report = BulkReport()
+        report.skipped.extend(skipped)
+        report.total = len(report.skipped)
+        start = time.perf_counter()
+
+        def task(shard):
+            self._process(operation, shard, report, isolate)
+            with self._lock:
+                report.total += len(shard)
+                report.elapsed = time.perf_counter() - start
+            # outside of the lock, so that a slow callback does not block the workers
+            if self.progress is not None:
+                self.progress(report)
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            futures = [executor.submit(task, shard) for shard in shards(items, shard_size, key)]
+        for future in futures:
+            future.result()
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def close(self):
+        """
+        Close the connections of the workers and remove the working
+        directory (if created by the runner).
+        """
+        for clone in self._all_clones:
+            try:
+                clone.cleanup()
+            except InfaPmrepError:
+                pass
+        del self._all_clones[:]
+        if self._own_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,175 @@
+"""
+This module contains the record/replay backends for pmrep interactions.
+
+A Recorder wraps the regular command executor and stores every interaction
+(command vector with passwords masked, STDOUT lines, timings, exit code) as
+a JSON line in a cassette file. A Replayer reads such a cassette and feeds
+the recorded outputs back, so that scripts using Pmrep can be run and
+profiled without a repository:
+
+    p = infa3.Pmrep('pmrep', executor=Recorder('prod.cassette'), **connect_params)
+    ...
+    p = infa3.Pmrep('pmrep', executor=Replayer('prod.cassette'), **connect_params)
+
+Interactions are matched on the masked command vector without the path of
+the pmrep binary. Arguments naming existing files by absolute path (e.g.
+persistent input files and control files) are matched by the content of the
+file, and other temporary file paths are replaced by a placeholder, so that
+calls using per-run temporary files are replayed too. Identical commands are
+replayed in the recorded order. Failed calls (timeouts, cancellation) are
+recorded with their error and raise it again on replay, and the output of
+calls writing to a file or streaming their lines is recorded and replayed
+the same way.
+"""
+import collections
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import infa3.exceptions
+import infa3.helper
+from infa3.exceptions import InfaError, InfaPmrepError
+from infa3.instrument import sanitize_command
+
+# placeholder of temporary files which do not exist when the command is run
+TEMP_FILE = '<tempfile>'
+
+
+def _normalize(arg):
+    if not os.path.isabs(arg):
+        return arg
+    if os.path.isfile(arg):
+        digest = hashlib.sha1()
+        with open(arg, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return '<file:%s>' % digest.hexdigest()
+    if arg.startswith(tempfile.gettempdir() + os.sep):
+        return TEMP_FILE
+    return arg
+
+
+def _key(command):
+    return tuple(_normalize(arg) for arg in sanitize_command(command[1:], command[1]))
+
+
+def _error(interaction):
+    """
+    Return the exception recorded for a failed interaction.
+    """
+    error = interaction['error']
+    cls = getattr(infa3.exceptions, error['type'], None)
+    if not (isinstance(cls, type) and issubclass(cls, InfaError)):
+        cls = InfaPmrepError
+    return cls(error['message'])
+
+
+class Recorder(object):
+    """
+    Command executor recording all interactions into a cassette file.
+
+    Args:
+        path (str): cassette file, new interactions are appended
+        executor (Optional[callable]): executor doing the actual work.
+            Default is infa3.helper.cmd_execute.
+    """
+
+    def __init__(self, path, executor=None):
+        self.path = path
+        self.executor = executor or infa3.helper.cmd_execute
+        self._lock = threading.Lock()
+
+    def __call__(self, command, stats=None, **options):
+        stats = {} if stats is None else stats
+        key = list(_key(command))
+        start = time.perf_counter()
+        interaction = {'command': key}
+        try:
+            command_output = self.executor(command, stats, **options)
+        except Exception as e:
+            interaction['stdout'] = None
+            interaction['error'] = {'type': type(e).__name__, 'message': str(e)}
+            raise
+        else:
+            interaction['stdout'] = command_output
+            if options.get('stdout') is not None:
+                with open(options['stdout'], 'rb') as f:
+                    interaction['stdout'] = f.read().decode(infa3.helper.OUTPUT_ENCODING, 'replace').splitlines()
+            return command_output
+        finally:
+            interaction.update({
+                'elapsed': time.perf_counter() - start,
+                'spawn_time': stats.get('spawn_time'),
+                'stdout_bytes': stats.get('stdout_bytes'),
+                'returncode': stats.get('returncode'),
+            })
+            line = json.dumps(interaction)
+            with self._lock:
+                with open(self.path, 'a') as f:
+                    f.write(line + '\n')
+
+
+class Replayer(object):
+    """
+    Command executor replaying the interactions stored in a cassette file.
+
+    No pmrep binary is needed, so Pmrep skips the binary path check when
+    used with a Replayer.
+
+    Args:
+        path (str): cassette file
+        realtime (bool): sleep for the recorded duration of each
+            interaction. Default is False (replay as fast as possible).
+        repeat (bool): once all recordings of a command have been replayed,
+            keep replaying the last one instead of raising an error.
+            Default is True.
+    """
+
+    requires_binary = False
+
+    def __init__(self, path, realtime=False, repeat=True):
+        self.path = path
+        self.realtime = realtime
+        self.repeat = repeat
+        self._lock = threading.Lock()
+        self._interactions = collections.defaultdict(collections.deque)
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions[tuple(interaction['command'])].append(interaction)
+
+    def __call__(self, command, stats=None, **options):
+        key = _key(command)
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                raise InfaPmrepError("no recorded interaction for: %s" % " ".join(key))
+            if len(recorded) > 1 or not self.repeat:
+                interaction = recorded.popleft()
+            else:
+                interaction = recorded[0]
+
+        if self.realtime:
+            time.sleep(interaction['elapsed'])
+        if stats is not None:
+            stats['spawn_time'] = interaction.get('spawn_time') or 0.0
+            stats['stdout_bytes'] = interaction.get('stdout_bytes') or 0
+            stats['returncode'] = interaction.get('returncode')
+        if interaction.get('error') is not None:
+            raise _error(interaction)
+        lines = list(interaction['stdout'] or [])
+        if options.get('stdout') is not None:
+            with open(options['stdout'], 'wb') as f:
+                f.write(''.join(line + '\n' for line in lines).encode(infa3.helper.OUTPUT_ENCODING))
+            return None
+        if options.get('on_line') is not None:
+            for line in lines:
+                try:
+                    options['on_line'](line)
+                except Exception:
+                    break
+        return lines
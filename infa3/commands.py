@@ -0,0 +1,757 @@
+"""
+This module contains the declarative specification of the pmrep commands.
+
+Each pmrep command supported by the Pmrep class is described by a
+CommandSpec: the options requiring an argument, the plain flags, the
+options always passed (e.g. '-f' to avoid user interaction), the column
+separator used to format the output and the record type of the output rows.
+The Pmrep methods of all commands listed in COMMANDS without a hand-written
+counterpart are generated from this table, and the same specifications are
+shared by every execution mode (single calls, worker pools, bulk
+operations).
+"""
+import collections
+
+from infa3.exceptions import InfaPmrepError
+
+COLUMN_SEPARATOR = '<=#CS#=>'
+
+CommandSpec = collections.namedtuple('CommandSpec', [
+    'name',       # pmrep command name (lowercase)
+    'args',       # frozenset of options requiring an argument
+    'flags',      # frozenset of options without arguments
+    'forced',     # tuple of arguments always passed after the command name
+    'separator',  # column separator of the output, None for commands without output
+    'record',     # callable building a record from an output row, None for plain lists
+    'doc',        # docstring of the generated Pmrep method
+])
+
+# record types of the command outputs
+Connection = collections.namedtuple('Connection', ['name', 'type'])
+Checkout = collections.namedtuple('Checkout', [
+    'type', 'subtype', 'folder', 'name', 'version', 'user', 'checked_out',
+])
+
+
+def record_builder(record_type):
+    """
+    Return a callable building a record of a namedtuple type from an output
+    row, raising InfaPmrepError with the row if its number of columns does
+    not match the record fields (e.g. an unexpected pmrep output format).
+    """
+    def build(row):
+        values = (row,) if isinstance(row, str) else tuple(row)
+        if len(values) != len(record_type._fields):
+            raise InfaPmrepError('Unexpected %s output row with %d instead of %d columns: %r' % (
+                record_type.__name__, len(values), len(record_type._fields), row), output=row)
+        return record_type._make(values)
+    return build
+
+
+def command(name, args=(), flags=(), forced=(), separator=None, record=None, doc=None):
+    """
+    Create a CommandSpec, precompiling the option validators.
+
+    Returns:
+        CommandSpec
+    """
+    return CommandSpec(name, frozenset(args), frozenset(flags), tuple(forced), separator, record, doc)
+
+
+def registry(*specs):
+    """
+    Return an ordered dict of command name to CommandSpec.
+    """
+    return collections.OrderedDict((spec.name, spec) for spec in specs)
+
+
+COMMANDS = registry(
+    command(
+        'connect',
+        args=['r', 'd', 'h', 'o', 'n', 's', 'x', 'u', 't'],
+    ),
+    command(
+        'cleanup',
+    ),
+    command(
+        'objectimport',
+        args=['i', 'c', 'l'],
+        flags=['p'],
+        separator='.',
+    ),
+    command(
+        'assignintegrationservice',
+        args=['f', 'n', 'i'],
+        doc="""
+        Assigns the PowerCenter Integration Service to the specified workflow
+
+        Args (all to be supplied as kwargs):
+            f (str): Required. Name of the folder that contains the workflow.
+            n (str): Name of the workflow.
+            i (str): Name of the PowerCenter Integration Service associated
+            with the workflow.
+
+            Refer to Informatica Command reference Handbook for details.
+        """,
+    ),
+    command(
+        'addtodeploymentgroup',
+        args=['p', 'n', 'o', 't', 'v', 'f', 'i', 'd'],
+        doc="""
+        Add objects to a deployment group.
+
+        Args (all to be supplied as kwargs):
+            p (str): Required. Deployment group name.
+            n (str): Required if adding a specific object. Object name.
+            o (str): Required if adding a specific object. Object type.
+            t (str): Required when using valid subtypes. Object subtype.
+            v (str): Optional. Version number. Default is latest version.
+            f (str): Required if adding a specific object. Folder name.
+            i (str): Required if not using [n], [o] and [f]. Persistant
+                input file.
+            d (str): Optional. DBD Separator.
+
+            Refer to Informatica Command reference Handbook for details.
+        """,
+    ),
+    command(
+        'applylabel',
+        args=['a', 'n', 'o', 't', 'v', 'f', 'i', 'd', 'p', 'c', 'e'],
+        flags=['s', 'g', 'm'],
+        doc="""
+        Apply a label to an object or a set of objects in a folder.
+
+        Args (all to be supplied as kwargs):
+            a (str): Required. Label name.
+            n (str): Required if adding a specific object. Object name.
+            o (str): Required if adding a specific object. Object type.
+            t (str): Required when using valid subtypes. Object subtype.
+            v (str): Optional. Version number. Default is latest version.
+            f (str): Optional. Folder name.
+            i (str): Required if not using [n], [o] and [f]. Persistant
+                input file.
+            d (str): Optional. Dependency object types.
+            p (str): Optional. Dependency direction.
+            s (bool): Optional. Include PK-FK depenency objects.
+            g (bool): Optional. Find dependencies across repositories.
+            m (bool): Optional. Move label to the latest version.
+            c (str): Optional. Comments.
+            e (str): Optional. DBD Separator.
+
+            Refer to Informatica Command reference Handbook for details.
+        """,
+    ),
+    command(
+        'assignpermission',
+        args=['o', 't', 'n', 'u', 'g', 's', 'p'],
+        doc="""
+        Add, remove or update permissions on a global object for a user,
+        group, or the Others default group.
+
+        Args (all to be supplied as kwargs):
+            o (str): Required. Object type.
+            t (str): Optional. Object subtype, relevant only for connection
+                object or query.
+            n (str): Required. Object name.
+            u (str): Required if [g] is not used. User name.
+            g (str): Required if [u] is not used. Group name.
+            s (str): Required only is LDAP authentication is in use. Security domain.
+                Default is Native.
+            p (str): Required. Permissions to be added, removed or updated.
+                Valid values are 'r', 'w', 'x' or a combination of those.
+
+            Refer to Informatica Command reference Handbook for details.
+        """,
+    ),
+    command(
+        'backup',
+        args=['o', 'd'],
+        flags=['f', 'b', 'j', 'q', 'v'],
+        doc="""
+        Backup the repository to the specified file.
+
+        Args (all to be supplied as kwargs):
+            o (str): Required. Output file name.
+            d (str): Optional. Description.
+            f (bool): Optional. Overwrite existing output file. Default is False.
+            b (bool): Optional. Skip workflow and session logs. Default is False
+            j (bool): Optional. Skip deployment group history. Default is False.
+            q (bool): Optional. Skip MX data. Default is False.
+            v (bool): Optional. Skip task statistics. Default is False.
+
+            Refer to Informatica Command reference Handbook for details.
+
+        Note:
+            See infa3.backup for compressed, cataloged backups.
+        """,
+    ),
+    command(
+        'restore',
+        args=['u', 's', 'p', 'P', 'i'],
+        flags=['g', 'y', 'b', 'j', 'q', 'f', 'a', 'e'],
+        doc="""
+        Restore a repository backup file to a database.
+
+        Args (all to be supplied as kwargs):
+            u (str): Required. Domain user name.
+            s (str): Required only is LDAP authentication is in use. Security domain.
+                Default is Native.
+            p (str): Required if [P] is not used. Domain password.
+            P (str): Required if [p] is not used. Domain password environment variable.
+            i (str): Required. Backup file name.
+            g (bool): Optional. Create a global repository. Default is False.
+            y (bool): Optional. Enable object versioning. Default is False.
+            b (bool): Optional. Skip workflow and session logs. Default is False.
+            j (bool): Optional. Skip deployment group history. Default is False.
+            q (bool): Optional. Skip MX data. Default is False.
+            f (bool): Optional. Skip task statistics. Default is False.
+            a (bool): Optional. Restore as a new repository. Default is False.
+            e (bool): Optional. Exit if the domain name in the backup file differs
+                from the current domain name. Default is False.
+
+            Refer to Informatica Command reference Handbook for details.
+
+        Note:
+            See infa3.backup for compressed, cataloged backups and verified restores.
+        """,
+    ),
+    command(
+        'changeowner',
+        args=['o', 't', 'n', 'u', 's'],
+        doc="""
+        Change the owner name for a global object.
+
+        Args (all to be supplied as kwargs):
+            o (str): Required. Object type. Valid values are 'folder', 'label',
+                'deploymentgroup', 'query' and 'connection'.
+            t (str): Optional. Object subtype, relevant only for connection
+                object or query.
+            n (str): Required. Object name.
+            u (str): Required. New owner name.
+            s (str): Required only is LDAP authentication is in use. Security domain.
+                Default is Native.
+
+            Refer to Informatica Command reference Handbook for details.
+        """,
+    ),
+    command(
+        'checkin',
+        args=['o', 't', 'n', 'f', 'c', 's'],
+        doc="""
+        Check in an object that has been checked out.
+
+        Args (all to be supplied as kwargs):
+            o (str): Required. Object type.
+            t (str): Required for task or transformation type. Object subtype.
+            n (str): Required. Object name.
+            f (str): Required. Folder name.
+            c (str): Optional. Comments.
+            s (str): Optional. DBD separator. Relevant if ODBC source has a
+                period ('.') in its name.
+
+            Refer to Informatica Command reference Handbook for details.
+        """,
+    ),
+    command(
+        'cleardeploymentgroup',
+        args=['p'],
+        forced=['-f'],
+        doc="""
+        Clear all objects from a deployment group while retaining the
+        group itself.
+
+        Args (all to be supplied as kwargs):
+            p (str): Required. Deployment group name.
+
+            Refer to Informatica Command reference Handbook for details.
+
+        Note:
+            The [-f] flag (force) is automatically submitted to avoid user
+            interaction.
+        """,
+    ),
+    command(
+        'create',
+        args=['u', 's', 'p'],
+        flags=['g', 'v'],
+        doc="""
+        Creates the repository tables in the database.
+
+        Note:
+            Requires the repository to be running in exclusive mode.
+
+        Args (all to be supplied as kwargs):
+            u (str): Required. Domain user name.
+            s (str): Required only is LDAP authentication is in use. Security domain.
+                Default is Native.
+            p (str): Required. Domain password.
+            g (bool): Optional. Promote repository to global repository.
+                Default is False.
+            v (bool): Optional. Enable version control. Default is False.
+
+            Refer to Informatica Command reference Handbook for details.
+        """,
+    ),
+    command(
+        'createconnection',
+        args=['s', 'n', 'u', 'p', 'P', 'K', 'c', 'l', 'r', 'e', 'f', 'z', 'b', 'v', 'd', 'a', 'k'],
+        flags=['t', 'x'],
+        doc="""
+        Create a source or target connection in the repository.
+
+        Args (all to be supplied as kwargs):
+            s (str): Required. Connection type.
+            n (str): Required. Connection name.
+            u (str): Required for some connection types. User name.
+            p (str): Required for some connection types. Password.
+            P (str): Optional. Password environment variable.
+            K (str): Optional. Connection to the Kerberos server.
+            c (str): Required. Connect string.
+            l (str): Required for some connection types. Code page.
+            r (str): Optional for Oracle connections. Rollback segment.
+            e (str): Optional. Connection environment SQL.
+            f (str): Optional. Transaction environment SQL.
+            z (str): Optional for Sybase ASE and MSSQL. Packet size.
+            b (str): Optional for Sybase ASE and MSSQL. Database name.
+            v (str): Optional for Sybase ASE and MSSQL. Database name.
+            d (str): Optional for MSSQL. Domain name.
+            t (bool): Optional for MSSQL. Integration Service uses Windows
+                authentication to access MSSQL database.
+            a (str): Optional for Teradata. ODBC data source name.
+            x (bool): Optional. Enable enhanced security.
+            k (str): Optional. Enable user defined connection attributes.
+
+            Refer to Informatica Command reference Handbook for details.
+        """,
+    ),
+    command(
+        'createdeploymentgroup',
+        args=['p', 't', 'q', 'u', 'c'],
+        doc="""
+        Create a static or dynamic deployment group.
+
+        Args (all to be supplied as kwargs):
+            p (str): Required. Deployment group name.
+            t (str): Optional. Deployment group type ('static' or 'dynamic').
+                Default is static.
+            q (str): Required if the deployment groupy is dynamic. Query name.
+            u (str): Required if the deployment groupy is dynamic. Valid values
+                are 'shared' or 'personal'.
+            c (str): Optional. Comments
+        """,
+    ),
+    command(
+        'createfolder',
+        args=['n', 'd', 'o', 'a', 'p', 'f'],
+        flags=['s'],
+        doc="""
+        Create a folder in the repository.
+
+        Args (all to be supplied as kwargs):
+            n (str): folder name
+            d (Optional[str]): folder description
+            o (Optional[str]): owner name. Default is user creating the folder
+            a (Optional[str]): owner security domain. Required for LDAP owners.
+                Default is Native.
+            s (Optional[bool]): shared folder. Default False
+            p (Optional[str]): permissions (unix style octal). By default the
+                the Repository Service assigns permissions.
+            f (Optional[str]): folder status
+        """,
+    ),
+    command(
+        'createlabel',
+        args=['a', 'c'],
+        doc="""
+        Create a label that can be used to associate groups of objects during
+        development.
+
+        Args (all to be supplied as kwargs):
+            a (str): name of label to be created in the repository
+            c (Optional[str]): comment about the label
+        """,
+    ),
+    command(
+        'deleteconnection',
+        args=['n', 's'],
+        forced=['-f'],
+        doc="""
+        Delete a relational connection from the repository.
+
+        Args (all to be supplied as kwargs):
+            n (str): connection name
+            s (Optional[str]): connection type application, relational, ftp, loader or queue
+
+        """,
+    ),
+    command(
+        'deletefolder',
+        args=['n'],
+        doc="""
+        Delete a folder from the repository.
+
+        Args (all to be supplied as kwargs):
+            n (str): folder name
+        """,
+    ),
+    command(
+        'deletelabel',
+        args=['a'],
+        forced=['-f'],
+        doc="""
+        Delete a label and remove the label from all objects that use it.
+
+        This method by default uses the '-f' pmrep flag to avoid user
+        interaction.
+
+        Args (all to be supplied as kwargs):
+            a (str): name of the label to be deleted in the repository
+        """,
+    ),
+    command(
+        'deploydeploymentgroup',
+        args=['p', 'c', 'r', 'n', 's', 'x', 'X', 'd', 'h', 'o', 'l'],
+        separator=COLUMN_SEPARATOR,
+        doc="""
+        Deploy a deployment group to a target repository.
+
+        Args (all to be supplied as kwargs):
+            p (str): Required. Deployment group name.
+            c (str): Required. Deployment control file name.
+            r (str): Required. Target repository name.
+            n (str): Optional. Target repository user name.
+            s (str): Optional. Target repository user security domain.
+            x (str): Optional. Target repository password.
+            X (str): Optional. Target repository password environment
+                variable.
+            d (str): Optional. Target domain name.
+            h (str): Optional. Target gateway host name.
+            o (str): Optional. Target gateway port number.
+            l (str): Optional. Log file name.
+
+            Refer to Informatica Command reference Handbook for details.
+
+        Note:
+            See infa3.scheduler for running deployments into different
+            folders concurrently.
+        """,
+    ),
+    command(
+        'deployfolder',
+        args=['f', 'c', 'r', 'n', 's', 'x', 'X', 'd', 'h', 'o', 'l'],
+        separator=COLUMN_SEPARATOR,
+    ),
+    command(
+        'executequery',
+        args=['q', 't', 'u', 'r', 'l'],
+        flags=['a', 'b'],
+        forced=['-c', COLUMN_SEPARATOR],
+        separator=COLUMN_SEPARATOR,
+        doc="""
+        Run a query and return the objects it selects.
+
+        Args (all to be supplied as kwargs):
+            q (str): query name
+            t (Optional[str]): query type ('shared' or 'personal')
+            u (Optional[str]): persistent output file name
+            a (Optional[bool]): append the result to the persistent output file
+            r (Optional[str]): end-of-record separator
+            l (Optional[str]): end-of-listing indicator
+            b (Optional[bool]): verbose output
+
+            Refer to Informatica Command reference Handbook for details.
+
+        Returns:
+            List of Lists
+        """,
+    ),
+    command(
+        'findcheckout',
+        args=['o', 'f'],
+        flags=['u'],
+        forced=['-b', '-c', COLUMN_SEPARATOR],
+        separator=COLUMN_SEPARATOR,
+        record=record_builder(Checkout),
+        doc="""
+        Return the checked out objects in the repository.
+
+        The verbose listing is always requested, so that every row reads
+        type, subtype, folder, name, version, user, checkout time (see the
+        Checkout record).
+
+        Args (all to be supplied as kwargs):
+            o (Optional[str]): object type. Default are all types.
+            f (Optional[str]): folder name. Default are all folders.
+            u (Optional[bool]): list the checkouts of all users. Default are
+                the checkouts of the connected user.
+
+            Refer to Informatica Command reference Handbook for details.
+
+        Returns:
+            List of Lists
+        """,
+    ),
+    command(
+        'getconnectiondetails',
+        args=['n', 't'],
+        separator=COLUMN_SEPARATOR,
+    ),
+    command(
+        'listconnections',
+        forced=['-t'],
+        separator=',',
+        record=record_builder(Connection),
+        doc="""
+        List all connection objects in the repository and their respective connection types.
+
+        Args:
+            None
+        """,
+    ),
+    command(
+        'listobjectdependencies',
+        args=['n', 'o', 't', 'v', 'f', 'i', 'd', 'p', 'u', 'r', 'l', 'b', 'e'],
+        flags=['s', 'g', 'a'],
+        forced=['-c', COLUMN_SEPARATOR],
+        separator=COLUMN_SEPARATOR,
+        doc="""
+        List dependency objects for reusable and non-reusable objects.
+        """,
+    ),
+    command(
+        'listobjects',
+        args=['o', 't', 'f', 'r', 'l', 's'],
+        forced=['-c', COLUMN_SEPARATOR],
+        separator=COLUMN_SEPARATOR,
+        doc="""
+        Return a list of objects in the repository.
+
+        Args (all to be supplied as kwargs):
+            o (str): object type
+            t (str): object subtype
+            f (str): folder name
+            r (str): end-of-record separatr
+            l (str): end-of-listing separator
+            s (str): dbd separator
+
+            Refer to Informatica Command reference Handbook for details.
+
+        Returns:
+            List of Lists
+        """,
+    ),
+    command(
+        'listtablesbysess',
+        args=['f', 's', 't'],
+        separator='.',
+        doc="""
+        Return a list of sources or targets used in a session.
+
+        Args (all to be supplied as kwargs):
+            f (str): folder name
+            s (str): session name (non-reusable must include workflow name)
+            t (str): object type listed ('session' or 'target')
+
+        Note:
+            If a mapping contains a mapplet, its name will also be returned as
+            the first element of a list holding the session's name.
+        """,
+    ),
+    command(
+        'killuserconnection',
+        args=['i', 'n', 'a'],
+        doc="""
+        Terminates user connections to the repository.
+                use connection ID or user name
+        Args (all to be supplied as kwargs):
+            i (str): Repository connection ID.
+            n (str): User name.
+            a (Optional[str]): Terminates all connections.
+
+        Note:
+            You can terminate user connections based on the user name or connection ID.
+            You can also terminate all user connections to the repository.
+        """,
+    ),
+    command(
+        'listuserconnections',
+        separator=',',
+        doc="""
+        List information for each user connected to the repository.
+        use Domain connection for executed (d) not h+o
+        """,
+    ),
+    command(
+        'massupdate',
+        args=['x', 'n', 'v', 't', 'o', 'l', 'f', 'i', 'u'],
+        flags=['g', 'm', 'b'],
+        doc="""
+        Update a session property for a set of sessions that meet specified conditions.
+
+        Args (all to be supplied as kwargs):
+            x (str): Required. Session property type: session_property,
+                session_config_property or transformation_instance_attribute.
+            n (str): Required. Session property name, e.g.
+                'DTM buffer size' or 'Commit Interval'.
+            v (str): Required. New property value.
+            t (str): Required for transformation_instance_attribute.
+                Transformation type.
+            o (str): Optional. Condition operator: equal, greater, less or
+                not_equal.
+            l (str): Required with [o]. Condition value.
+            f (str): Required if not using [i]. Folder name.
+            i (str): Required if not using [f]. Persistent input file
+                listing the sessions.
+            g (bool): Optional. Also update the non-reusable sessions of
+                workflows and worklets.
+            m (bool): Optional. Update the session instances in workflows
+                and worklets instead of the reusable sessions.
+            u (str): Optional. Persistent output file of the updated
+                sessions.
+            b (bool): Optional. Test mode: list the sessions that would be
+                updated without updating them.
+
+            Refer to Informatica Command reference Handbook for details.
+
+        Note:
+            See Pmrep.massupdate_bulk for applying a table of changes.
+        """,
+    ),
+    command(
+        'notify',
+        args=['m'],
+        doc="""
+        Sends notification messages to users connected to a repository or users connected
+        to all repositories managed by a Repository Service.
+        """,
+    ),
+    command(
+        'objectexport',
+        args=['n', 'o', 't', 'v', 'f', 'i', 'u', 'l', 'e'],
+        flags=['m', 's', 'b', 'r'],
+        separator='.',
+        doc="""
+        Exports objects to an XML file defined by the powrmart.dtd file.
+        """,
+    ),
+    command(
+        'run',
+        args=['f', 'o'],
+        flags=['e', 's', 'u'],
+        doc="""
+        Run a script file containing multiple pmrep commands, in a single
+        pmrep process (see infa3.bulk.write_script_file).
+
+        Args (all to be supplied as kwargs):
+            f (str): Required. Script file name.
+            o (str): Optional. Output file name.
+            e (bool): Optional. Echo the commands.
+            s (bool): Optional. Stop at the first error.
+            u (bool): Optional. Write the output file in unicode.
+
+            Refer to Informatica Command reference Handbook for details.
+        """,
+    ),
+    command(
+        'undocheckout',
+        args=['o', 't', 'n', 'f'],
+        doc="""
+        Reverse the checkout of an object.
+
+        Args (all to be supplied as kwargs):
+            o (str): Required. Object type.
+            t (str): Required for task or transformation type. Object subtype.
+            n (str): Required. Object name.
+            f (str): Required. Folder name.
+        """,
+    ),
+    command(
+        'updateconnection',
+        args=['t', 'd', 'u', 'p', 'P', 'c', 'a', 'v', 's', 'l'],
+        doc="""
+        Update the user name, password, connect string, and attributes for a database connection.
+
+        Args (all to be supplied as kwargs):
+            t (str): Required. Connection subtype, e.g. 'Oracle'.
+            d (str): Required. Connection name.
+            u (str): Optional. New user name.
+            p (str): Optional. New password.
+            P (str): Optional. Name of the environment variable holding the
+                new password (keeps the password off the command line).
+            c (str): Optional. New connect string.
+            a (str): Optional. Attribute name.
+            v (str): Required with [a]. New attribute value.
+            s (str): Optional. Connection type. Default is relational.
+            l (str): Optional. Code page.
+
+            Refer to Informatica Command reference Handbook for details.
+        """,
+    ),
+    command(
+        'updateseqgenvals',
+        args=['f', 'm', 't', 's', 'e', 'i', 'c'],
+        doc="""
+        Update one or more of the following properties for the specified Sequence Generator transformation:
+         - Start Value
+         - End Value
+         - Increment By
+         - Current Value
+
+        Args (all to be supplied as kwargs):
+            f (str): Required. Folder name.
+            m (str): Required for non-reusable transformations. Mapping name.
+            t (str): Required. Sequence Generator transformation name.
+            s (str): Optional. Start value.
+            e (str): Optional. End value.
+            i (str): Optional. Increment by.
+            c (str): Optional. Current value.
+
+            Refer to Informatica Command reference Handbook for details.
+
+        Note:
+            See Pmrep.updateseqgenvals_bulk for updating many transformations.
+        """,
+    ),
+    command(
+        'updatestatistics',
+        doc="""
+        Update statistics for repository tables and indexes.
+
+        Args:
+            None
+        """,
+    ),
+    command(
+        'validate',
+        args=['n', 'o', 't', 'v', 'f', 'i', 'm', 'p', 'u'],
+        flags=['s', 'k', 'a', 'b'],
+        separator='.',
+        doc="""
+        Validates objects.
+
+        Args (all to be supplied as kwargs):
+            n (str): Required if not using [i]. Object name.
+            o (str): Required if not using [i]. Object type.
+            t (str): Optional. Object subtype.
+            v (str): Optional. Version number. Default is latest version.
+            f (str): Required if not using [i]. Folder name.
+            i (str): Required if not using [n], [o] and [f]. Persistent
+                input file.
+            s (bool): Optional. Save the objects that change from invalid to
+                valid.
+            k (bool): Optional. Check in the saved objects. Requires [s].
+            m (str): Optional. Check-in comments.
+            p (str): Optional. Comma separated output categories: valid,
+                saved, skipped, save_failed, invalid_before, invalid_after.
+            u (str): Optional. Persistent output file of the objects in the
+                [p] categories.
+            a (bool): Optional. Append to the persistent output file.
+            b (bool): Optional. Verbose output.
+
+            Refer to Informatica Command reference Handbook for details.
+
+        Note:
+            See Pmrep.validate_bulk for validating many objects.
+        """,
+    ),
+)
@@ -0,0 +1,342 @@
+"""
+This module contains the cached store of connection details.
+
+ConnectionStore.harvest() lists the connections of a repository with
+listconnections and fetches the details of every connection concurrently
+(getconnectiondetails), on isolated connections (see infa3.bulk). The
+resulting store is indexed by name, type and connect string, so that audits
+and pre-deploy checks need no further pmrep calls. It can be saved to and
+loaded from a JSON file.
+
+    store = ConnectionStore.harvest(p, workers=8)
+    store.save('connections.json')
+    store.get('CONN_ORA_DWH').user
+    store.by_connect_string('dbhost:1521/ORCL')
+
+rotate_credentials() updates the credentials of many connections across
+several repositories concurrently and verifies the result.
+"""
+import collections
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import infa3.bulk
+import infa3.commands
+from infa3.exceptions import InfaPmrepError
+
+ConnectionDetails = collections.namedtuple('ConnectionDetails', [
+    'name',            # connection name
+    'type',            # connection type, e.g. 'relational'
+    'user',            # user name, None if not applicable
+    'connect_string',  # connect string, None if not applicable
+    'attributes',      # dict of all attributes printed by getconnectiondetails
+])
+
+RotationResult = collections.namedtuple('RotationResult', [
+    'repository',  # repository name
+    'connection',  # connection name
+    'status',      # 'rotated', 'unverified' or 'failed'
+    'error',       # InfaPmrepError of a failed update, or the reason of a failed verification
+])
+
+# environment variable passing the new password to pmrep (updateconnection -P)
+PASSWORD_VARIABLE = 'INFA3_NEW_CONNECTION_PASSWORD'
+
+# normalized attribute names holding the user name, the connect string and
+# the connection subtype (e.g. 'Oracle')
+USER_ATTRIBUTES = ('user_name', 'username', 'user')
+CONNECT_STRING_ATTRIBUTES = ('connect_string', 'connection_string')
+SUBTYPE_ATTRIBUTES = ('connection_subtype', 'subtype', 'connection_type', 'type')
+
+# connection types of listconnections/getconnectiondetails (not subtypes)
+CONNECTION_TYPES = frozenset(['relational', 'application', 'ftp', 'loader', 'queue'])
+
+
+def normalize(name):
+    """
+    Normalize an attribute name: 'Connect String' -> 'connect_string'.
+    """
+    return re.sub(r'\W+', '_', name.strip().lower()).strip('_')
+
+
+def details(name, connection_type, attributes):
+    """
+    Build ConnectionDetails from the output of getconnectiondetails.
+    """
+    normalized = dict((normalize(key), value) for key, value in attributes.items())
+    user = next((normalized[key] for key in USER_ATTRIBUTES if normalized.get(key)), None)
+    connect_string = next((normalized[key] for key in CONNECT_STRING_ATTRIBUTES if normalized.get(key)), None)
+    return ConnectionDetails(name, connection_type, user, connect_string, dict(attributes))
+
+
+def subtype(connection):
+    """
+    Return the subtype of a connection (updateconnection -t), taken from
+    its subtype attribute or a type column naming a subtype; None if
+    unknown.
+    """
+    normalized = dict((normalize(key), value) for key, value in connection.attributes.items())
+    candidates = [normalized.get(key) for key in SUBTYPE_ATTRIBUTES] + [connection.type]
+    return next((c for c in candidates if c and c.strip().lower() not in CONNECTION_TYPES), None)
+
+
+def verify_rotation(before, after, user=None):
+    """
+    Compare the details of a connection before and after a credential
+    update.
+
+    Returns:
+        List of the differences found (empty if the update applied as
+        expected)
+    """
+    problems = []
+    expected_user = user if user is not None else before.user
+    if after.user != expected_user:
+        problems.append('user name is %r instead of %r' % (after.user, expected_user))
+    if after.connect_string != before.connect_string:
+        problems.append('connect string changed to %r' % after.connect_string)
+    if subtype(after) != subtype(before):
+        problems.append('subtype changed to %r' % subtype(after))
+    return problems
+
+
+class ConnectionStore(object):
+    """
+    In-memory store of ConnectionDetails with lookups by name, type and
+    connect string.
+
+    Args:
+        connections (iterable[ConnectionDetails]): initial content
+    """
+
+    def __init__(self, connections=()):
+        self._by_name = {}
+        self._by_type = collections.defaultdict(dict)
+        self._by_connect_string = collections.defaultdict(dict)
+        self.harvested = None
+        self.report = None
+        for connection in connections:
+            self.add(connection)
+
+    @classmethod
+    def harvest(cls, pmrep, workers=4, types=None, progress=None, cancel=None):
+        """
+        Fetch the details of all connections of a repository.
+
+        Args:
+            pmrep (Pmrep): repository to harvest
+            workers (int): number of concurrent pmrep connections
+            types (Optional[iterable[str]]): harvest only these connection
+                types
+            progress (Optional[callable]): called with the BulkReport after
+                each connection
+            cancel (Optional[threading.Event]): stops the harvest once set
+
+        Returns:
+            ConnectionStore. Its `report` attribute is the BulkReport of the
+            harvest (connections which could not be read are listed there).
+        """
+        record = infa3.commands.COMMANDS['listconnections'].record
+        seed = [record(row) for row in pmrep.listconnections()]
+        if types is not None:
+            types = set(types)
+            seed = [connection for connection in seed if connection.type in types]
+
+        def fetch(worker, shard):
+            return [details(c.name, c.type, worker.getconnectiondetails(n=c.name, t=c.type)) for c in shard]
+
+        with infa3.bulk.BulkRunner(pmrep, workers, cancel=cancel, progress=progress) as runner:
+            report = runner.run(fetch, seed, shard_size=1)
+        store = cls(connection for shard in report.results for connection in shard)
+        store.harvested = time.time()
+        store.report = report
+        return store
+
+    def add(self, connection):
+        """
+        Add or replace the details of a connection.
+        """
+        self.remove(connection.name)
+        self._by_name[connection.name] = connection
+        self._by_type[connection.type][connection.name] = connection
+        if connection.connect_string:
+            self._by_connect_string[connection.connect_string.lower()][connection.name] = connection
+
+    def remove(self, name):
+        """
+        Remove a connection from the store (if present).
+        """
+        connection = self._by_name.pop(name, None)
+        if connection is None:
+            return
+        self._by_type[connection.type].pop(name, None)
+        if connection.connect_string:
+            self._by_connect_string[connection.connect_string.lower()].pop(name, None)
+
+    def refresh(self, pmrep, name, connection_type=None):
+        """
+        Read the details of one connection again and update the store.
+
+        Returns:
+            ConnectionDetails
+        """
+        if connection_type is None:
+            connection_type = self._by_name[name].type
+        connection = details(name, connection_type, pmrep.getconnectiondetails(n=name, t=connection_type))
+        self.add(connection)
+        return connection
+
+    def get(self, name, default=None):
+        return self._by_name.get(name, default)
+
+    def by_type(self, connection_type):
+        """
+        Return the connections of a type, e.g. 'relational'.
+        """
+        return list(self._by_type.get(connection_type, {}).values())
+
+    def by_connect_string(self, connect_string):
+        """
+        Return the connections using a connect string (case insensitive).
+        """
+        return list(self._by_connect_string.get(connect_string.lower(), {}).values())
+
+    def find(self, pattern=None, connection_type=None, user=None):
+        """
+        Return the connections whose name matches a regular expression,
+        optionally restricted to a type and a user name.
+        """
+        candidates = self.by_type(connection_type) if connection_type is not None else self
+        regex = re.compile(pattern) if pattern is not None else None
+        return [
+            c for c in candidates
+            if (regex is None or regex.search(c.name)) and (user is None or c.user == user)
+        ]
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __iter__(self):
+        return iter(list(self._by_name.values()))
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def save(self, path):
+        """
+        Save the store as JSON (atomically replacing the file).
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'harvested': self.harvested,
+                'connections': [c._asdict() for c in self],
+            }, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, max_age=None):
+        """
+        Load a store saved with save().
+
+        Args:
+            path (str): JSON file
+            max_age (Optional[float]): return None instead if the store was
+                harvested more than this many seconds ago
+
+        Returns:
+            ConnectionStore or None
+        """
+        with open(path) as f:
+            data = json.load(f)
+        harvested = data.get('harvested')
+        if max_age is not None and (harvested is None or time.time() - harvested > max_age):
+            return None
+        store = cls(ConnectionDetails(**c) for c in data['connections'])
+        store.harvested = harvested
+        return store
+
+
+def rotate_credentials(repositories, password, pattern=None, user=None, connection_type='relational',
+                       stores=None, workers=4, progress=None, cancel=None):
+    """
+    Set new credentials on all matching connections of several repositories.
+
+    The repositories are processed concurrently, each with at most `workers`
+    concurrent updateconnection calls on isolated connections. The password
+    is handed over to pmrep in an environment variable (-P), so it never
+    appears on a command line, in the instrumentation or in the report.
+    Every updated connection is read again with getconnectiondetails, which
+    refreshes the store, to verify the user name and that the connect string
+    and subtype are unchanged. Connections of unknown subtype (required by
+    updateconnection) fail without an update.
+
+    Args:
+        repositories (iterable[Pmrep]): repositories to update
+        password (str): new password
+        pattern (Optional[str]): regular expression the connection names
+            must match. Default are all connections of the type.
+        user (Optional[str]): new user name. Default is to keep the user.
+        connection_type (str): type of the connections to update
+        stores (Optional[dict]): ConnectionStore per repository name, used
+            to select the connections and updated with the verified details.
+            Missing stores are harvested (and added to the dict).
+        workers (int): maximum concurrent updates per repository
+        progress (Optional[callable]): called with the BulkReport of a
+            repository after each connection
+        cancel (Optional[threading.Event]): stops the rotation once set
+
+    Returns:
+        List of RotationResult
+    """
+    repositories = list(repositories)
+    stores = stores if stores is not None else {}
+
+    def rotate_repository(pmrep):
+        name = pmrep.connect_params.get('r')
+        store = stores.get(name)
+        if store is None:
+            store = stores[name] = ConnectionStore.harvest(pmrep, workers, types=[connection_type], cancel=cancel)
+
+        def rotate(worker, shard):
+            worker.env = dict(worker.env or os.environ, **{PASSWORD_VARIABLE: password})
+            results = []
+            for connection in shard:
+                connection_subtype = subtype(connection)
+                if connection_subtype is None:
+                    results.append(RotationResult(name, connection.name, 'failed', InfaPmrepError(
+                        'unknown subtype of connection %s, required by updateconnection' % connection.name)))
+                    continue
+                params = {'d': connection.name, 's': connection.type, 't': connection_subtype,
+                          'P': PASSWORD_VARIABLE}
+                if user is not None:
+                    params['u'] = user
+                try:
+                    worker.updateconnection(**params)
+                    verified = store.refresh(worker, connection.name, connection.type)
+                except InfaPmrepError as e:
+                    results.append(RotationResult(name, connection.name, 'failed', e))
+                    continue
+                problems = verify_rotation(connection, verified, user)
+                if problems:
+                    results.append(RotationResult(name, connection.name, 'unverified', '; '.join(problems)))
+                else:
+                    results.append(RotationResult(name, connection.name, 'rotated', None))
+            return results
+
+        targets = store.find(pattern, connection_type=connection_type)
+        with infa3.bulk.BulkRunner(pmrep, workers, cancel=cancel, progress=progress) as runner:
+            report = runner.run(rotate, targets, shard_size=1, isolate=False)
+        results = [result for shard in report.results for result in shard]
+        results.extend(RotationResult(name, f.item.name, 'failed', f.error) for f in report.failed)
+        return results
+
+    with ThreadPoolExecutor(max(len(repositories), 1)) as executor:
+        futures = [executor.submit(rotate_repository, pmrep) for pmrep in repositories]
+    return [result for future in futures for result in future.result()]
@@ -12,6 +12,48 @@ class InfaError(Exception):
     pass
 
 class InfaPmrepError(InfaError):
-    """Raised if a pmrep error occurs."""
+    """Raised if a pmrep error occurs.
+
+    The failed command (with passwords masked) and its output are kept
+    in the `command` and `output` attributes, if available.
+    """
+
+    def __init__(self, message, command=None, output=None):
+        super(InfaPmrepError, self).__init__(message)
+        self.command = command
+        self.output = output
+
+class InfaPmrepConnectionError(InfaPmrepError):
+    """Raised if the connection to the repository is lost or cannot be made."""
+
+    pass
+
+class InfaPmrepLockError(InfaPmrepError):
+    """Raised if an object is locked by another user or process."""
+
+    pass
+
+class InfaPmrepNotFoundError(InfaPmrepError):
+    """Raised if the requested object does not exist."""
+
+    pass
+
+class InfaPmrepPermissionError(InfaPmrepError):
+    """Raised if the user lacks the permissions or privileges required."""
+
+    pass
+
+class InfaPmrepTimeoutError(InfaPmrepError):
+    """Raised if a pmrep command does not finish within its timeout."""
+
+    pass
+
+class InfaPmrepCancelledError(InfaPmrepError):
+    """Raised if a running pmrep command has been cancelled."""
+
+    pass
+
+class InfaBackupError(InfaError):
+    """Raised if a repository backup is missing or damaged."""
 
     pass
@@ -0,0 +1,285 @@
+"""
+This module contains the facade running read commands across many
+repositories.
+
+A RepositoryFleet holds an isolated Pmrep connection per repository (each
+with its own connection file) and runs a command on all of them
+concurrently. The output rows are merged with the repository name as the
+first column. A slow repository is cut off at the `deadline` of the call,
+and a repository which fails to connect is left out of the following calls
+for `cooldown` seconds, so neither blocks the answers of the others. Errors
+are reported in the result of their repository only.
+
+    fleet = RepositoryFleet([dev, test, prod], deadline=60)
+    report = fleet.run('listobjects', o='folder')
+    [row for row in report.rows if row[1] == 'Sales']   # ('REP_PROD', 'Sales')
+    report.failed                                        # unreachable repositories
+    fleet.close()
+"""
+import collections
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from infa3.commands import COMMANDS
+from infa3.exceptions import InfaPmrepError, InfaPmrepCancelledError, InfaPmrepTimeoutError
+
+# Pmrep methods which only read from the repository
+READ_COMMANDS = frozenset([
+    'checkouts', 'executequery', 'findcheckout', 'getconnectiondetails', 'listconnections',
+    'listobjectdependencies', 'listobjects', 'listtablesbysess', 'listuserconnections',
+])
+
+FleetResult = collections.namedtuple('FleetResult', [
+    'repository',  # repository name
+    'status',      # 'ok', 'failed', 'timeout' or 'unavailable'
+    'result',      # value returned by the command, None unless ok
+    'error',       # exception raised by the command, None if ok
+    'elapsed',     # seconds spent
+])
+
+
+def merge(results, record=None):
+    """
+    Merge the output rows of successful results, prepending the repository
+    name to every row.
+
+    Args:
+        results (iterable[FleetResult]): results of a fleet call
+        record (Optional[callable]): builds the merged row from the
+            repository name and an output row. Default is a tuple of the
+            repository name and the row columns.
+
+    Returns:
+        List
+    """
+    rows = []
+    for result in results:
+        if result.status != 'ok' or result.result is None:
+            continue
+        output = result.result
+        if isinstance(output, dict):
+            output = list(output.items())
+        for row in output:
+            if record is not None:
+                rows.append(record(result.repository, row))
+            elif isinstance(row, (list, tuple)):
+                rows.append((result.repository,) + tuple(row))
+            else:
+                rows.append((result.repository, row))
+    return rows
+
+
+class FleetReport(object):
+    """
+    Outcome of a command run across a fleet.
+
+    Attributes:
+        command (str): command run
+        results (list[FleetResult]): one result per repository, in the
+            order of the fleet
+        elapsed (float): seconds spent
+    """
+
+    def __init__(self, command, results, elapsed):
+        self.command = command
+        self.results = results
+        self.elapsed = elapsed
+
+    @property
+    def rows(self):
+        """
+        Output rows of all successful repositories, with the repository
+        name as the first column.
+        """
+        return merge(self.results)
+
+    @property
+    def failed(self):
+        """
+        Results of the repositories which did not answer.
+        """
+        return [result for result in self.results if result.status != 'ok']
+
+    @property
+    def ok(self):
+        return not self.failed
+
+    def __getitem__(self, repository):
+        return next(result for result in self.results if result.repository == repository)
+
+    def __repr__(self):
+        return '<FleetReport %s, %d repositories, %d failed, %.1fs>' % (
+            self.command, len(self.results), len(self.failed), self.elapsed)
+
+
+class RepositoryFleet(object):
+    """
+    Run read commands across many repositories concurrently.
+
+    Args:
+        repositories (iterable[Pmrep]): repositories of the fleet; each is
+            cloned into an isolated, lazily connecting instance, named by
+            its repository name (connect parameter r)
+        deadline (Optional[float]): seconds after which the command of a
+            repository still running is killed and reported as 'timeout'
+        cooldown (float): seconds a repository failing to connect is skipped
+            (reported as 'unavailable') before it is tried again
+        workdir (Optional[str]): directory for the connection files.
+            Default is a temporary directory removed on close().
+    """
+
+    def __init__(self, repositories, deadline=None, cooldown=60.0, workdir=None):
+        self.deadline = deadline
+        self.cooldown = cooldown
+        self._own_workdir = workdir is None
+        self.workdir = workdir or tempfile.mkdtemp(prefix='infa3-fleet-')
+        self.members = collections.OrderedDict()
+        for number, pmrep in enumerate(repositories):
+            name = pmrep.connect_params.get('r') or 'repository-%d' % number
+            if name in self.members:
+                raise ValueError('repository %s is part of the fleet already' % name)
+            self.members[name] = pmrep.clone(cnx_file=os.path.join(self.workdir, 'fleet-%d.cnx' % number))
+        self._locks = dict((name, threading.Lock()) for name in self.members)
+        self._unavailable = {}
+        self._running = set()
+        self._running_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max(len(self.members), 1))
+
+    @property
+    def repositories(self):
+        return list(self.members)
+
+    def available(self, repository):
+        """
+        Check whether a repository is not in its cooldown after being
+        unreachable.
+        """
+        until = self._unavailable.get(repository)
+        return until is None or time.time() >= until
+
+    def _call(self, repository, operation, cancel, deadline):
+        started = time.perf_counter()
+        pmrep = self.members[repository]
+        # a repository still busy with a call cut off earlier is not waited for
+        if not self._locks[repository].acquire(timeout=deadline if deadline is not None else -1):
+            return FleetResult(repository, 'timeout', None, None, time.perf_counter() - started)
+        try:
+            pmrep.cancel = cancel
+            result = operation(pmrep)
+        except (InfaPmrepCancelledError, InfaPmrepTimeoutError) as e:
+            # slow, not unreachable: no cooldown
+            return FleetResult(repository, 'timeout', None, e, time.perf_counter() - started)
+        except InfaPmrepError as e:
+            if not pmrep.connected:
+                # the connection failed: skip the repository for a while
+                self._unavailable[repository] = time.time() + self.cooldown
+            return FleetResult(repository, 'failed', None, e, time.perf_counter() - started)
+        except Exception as e:
+            # e.g. a failing record builder: fails this repository only
+            return FleetResult(repository, 'failed', None, e, time.perf_counter() - started)
+        finally:
+            pmrep.cancel = None
+            self._locks[repository].release()
+        self._unavailable.pop(repository, None)
+        return FleetResult(repository, 'ok', result, None, time.perf_counter() - started)
+
+    def run(self, command, repositories=None, deadline=None, **params):
+        """
+        Run a read command on all repositories (or the given ones).
+
+        Args:
+            command (str, callable): Pmrep method name from READ_COMMANDS,
+                or a callable taking a Pmrep instance (e.g. several calls
+                answering a question together)
+            repositories (Optional[iterable[str]]): names of the
+                repositories to query. Default is the whole fleet.
+            deadline (Optional[float]): overrides the deadline of the fleet
+            **params: kwargs of the Pmrep method
+
+        Returns:
+            FleetReport
+        """
+        if callable(command):
+            name = getattr(command, '__name__', 'operation')
+            operation = command
+        else:
+            if command not in READ_COMMANDS:
+                raise ValueError('%s is not a read command' % command)
+            name = command
+            spec = COMMANDS.get(command)
+            record = spec.record if spec is not None else None
+
+            def operation(pmrep):
+                result = getattr(pmrep, command)(**dict(params))
+                if record is not None and isinstance(result, list):
+                    result = [record(row) for row in result]
+                return result
+
+        deadline = self.deadline if deadline is None else deadline
+        names = list(self.members) if repositories is None else list(repositories)
+        started = time.perf_counter()
+        results = {}
+        futures = {}
+        cancels = {}
+        for repository in names:
+            if repository not in self.members:
+                raise KeyError(repository)
+            if not self.available(repository):
+                results[repository] = FleetResult(repository, 'unavailable', None, None, 0.0)
+                continue
+            cancels[repository] = threading.Event()
+            futures[self._executor.submit(self._call, repository, operation, cancels[repository], deadline)] = repository
+
+        with self._running_lock:
+            self._running.update(cancels.values())
+        try:
+            done, pending = wait(futures, timeout=deadline)
+            for future in pending:
+                cancels[futures[future]].set()
+            for future in futures:
+                results[futures[future]] = future.result()
+        finally:
+            with self._running_lock:
+                self._running.difference_update(cancels.values())
+        return FleetReport(name, [results[repository] for repository in names], time.perf_counter() - started)
+
+    def rows(self, command, **params):
+        """
+        Run a read command and return the merged output rows, with the
+        repository name as the first column. Repositories which did not
+        answer are left out (see run() for the details).
+        """
+        return self.run(command, **params).rows
+
+    def cancel(self):
+        """
+        Kill the running commands of the fleet.
+        """
+        with self._running_lock:
+            for event in self._running:
+                event.set()
+
+    def close(self):
+        """
+        Clean up the connections and remove the connection files.
+        """
+        self.cancel()
+        self._executor.shutdown(wait=True)
+        for pmrep in self.members.values():
+            if pmrep.connected:
+                try:
+                    pmrep.cleanup()
+                except InfaPmrepError:
+                    pass
+        if self._own_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
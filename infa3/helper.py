@@ -2,6 +2,57 @@
 This module contains generic functions for handling communication with
 Informatica programs and process their output.
 """
+import gc
+import locale
+import os
+import re
+import signal
+import time
+
+import infa3.instrument
+from infa3.exceptions import (
+    InfaPmrepError, InfaPmrepConnectionError, InfaPmrepLockError, InfaPmrepNotFoundError,
+    InfaPmrepPermissionError, InfaPmrepTimeoutError, InfaPmrepCancelledError
+)
+
+# encoding of the output of the Informatica programs
+OUTPUT_ENCODING = locale.getpreferredencoding(False)
+
+# seconds between checks of the cancellation event of a running command
+CANCEL_POLL_INTERVAL = 0.2
+
+# output lines printed by the Informatica programs around the actual data
+BANNER_PREFIXES = (
+    'Informatica',
+    'Copyright',
+    'All Rights Reserved',
+    'This Software is protected',
+)
+INVOKED_PREFIX = 'Invoked at'
+COMPLETED_PREFIX = 'Completed at'
+TRAILER_SUFFIXES = ('completed successfully.', 'completed successfully')
+
+# format of the timestamps printed by pmrep, e.g. 'Thu Dec 10 19:50:02 2015'
+TIME_FORMAT = '%a %b %d %H:%M:%S %Y'
+
+# error classes and the pmrep messages identifying them, checked in order
+ERROR_PATTERNS = (
+    (InfaPmrepConnectionError, re.compile(
+        r'not connected to|no (?:open |active )?connection to|failed to connect|unable to connect'
+        r'|connection to the repository(?: service)? (?:was |has been )?(?:lost|reset|refused|closed|terminated)'
+        r'|repository service (?:is )?(?:not available|unavailable|not running)'
+        r'|(?:session|connection) has expired|please connect|broken pipe|connection reset',
+        re.IGNORECASE)),
+    (InfaPmrepLockError, re.compile(
+        r'\block(?:ed|s)?\b|in use by another user|being (?:used|modified) by another',
+        re.IGNORECASE)),
+    (InfaPmrepPermissionError, re.compile(
+        r'permission|privilege|not authori[sz]ed|unauthori[sz]ed|access (?:is )?denied',
+        re.IGNORECASE)),
+    (InfaPmrepNotFoundError, re.compile(
+        r'not found|does not exist|no such|(?:cannot|could not|unable to) find|invalid \w+(?: \w+)? name',
+        re.IGNORECASE)),
+)
 
 
 def cmd_prepare(params, opts_args, opts_flags):
@@ -14,9 +65,9 @@ def cmd_prepare(params, opts_args, opts_flags):
 
     Args:
         params (str): parameters supplied
-        opts_args (list[str]): list of command line options that require 
+        opts_args (frozenset[str]): command line options that require 
             additional arguments
-        opts_flags (list[str]): list of command line options without 
+        opts_flags (frozenset[str]): command line options without 
             additional arguments (regular flags)
 
     Returns:
@@ -25,34 +76,158 @@ def cmd_prepare(params, opts_args, opts_flags):
     command = []
     for key, value in params.items():
         if key in opts_args:
-            command.extend(['-' + key, value])
-        elif key in opts_flags and value == True:
-            command.extend(['-' + key])
-        elif key not in opts_args + opts_flags:
+            command.append('-' + key)
+            command.append(value)
+        elif key in opts_flags:
+            if value == True:
+                command.append('-' + key)
+        else:
             raise Exception("unsupported option: %s" % key)
     return command
 
 
-def cmd_execute(command):
+def cmd_execute(command, stats=None, timeout=None, cancel=None, env=None, stdout=None, on_line=None):
     """
     Execute an external command and return its output as a list where 
     each list element corresponds to one STDOUT line returned by the 
     command.
 
+    The command is started in its own process group, so that the whole
+    group can be killed once the timeout expires or the command gets
+    cancelled.
+
     Args:
         command (list): OS command call formatted for the subprocess'
             Popen
+        stats (Optional[dict]): if supplied, it is filled with the
+            'spawn_time' (seconds), 'stdout_bytes' and 'returncode'
+            of the executed process
+        timeout (Optional[float]): seconds after which the command is
+            killed and InfaPmrepTimeoutError raised
+        cancel (Optional[threading.Event]): once set, the command is
+            killed and InfaPmrepCancelledError raised
+        env (Optional[dict]): environment of the command. Default is the
+            environment of the current process.
+        stdout (Optional[str]): path of a file the STDOUT stream is
+            written to, instead of being collected in memory. None is
+            returned in that case.
+        on_line (Optional[callable]): called with every STDOUT line as soon
+            as the command prints it (e.g. to report progress of long
+            running commands). Ignored when `stdout` is given.
 
     Returns:
         List
     """
     import subprocess  # import only on demand, as it is slow on cygwin
-    command_output = subprocess.Popen(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    ).communicate()
-    return str(command_output[0]).strip("b'").split('\\r\\n')
+    if cancel is not None and cancel.is_set():
+        raise InfaPmrepCancelledError("cancelled before execution: %s" % " ".join(command[1:2]))
+
+    output_file = None if stdout is None else open(stdout, 'wb')
+    streaming = output_file is None and on_line is not None
+    try:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE if output_file is None else output_file,
+            stderr=subprocess.PIPE if output_file is None and not streaming else subprocess.DEVNULL,
+            env=env,
+            **_new_process_group()
+        )
+        spawned = time.perf_counter()
+        if streaming:
+            command_output = _stream(process, command, start, timeout, cancel, on_line)
+        else:
+            command_output = _communicate(process, command, start, timeout, cancel)
+    finally:
+        if output_file is not None:
+            output_file.close()
+
+    if stats is not None:
+        stats['spawn_time'] = spawned - start
+        stats['stdout_bytes'] = len(command_output[0]) if stdout is None else os.path.getsize(stdout)
+        stats['returncode'] = process.returncode
+    if stdout is not None:
+        return None
+    return command_output[0].decode(OUTPUT_ENCODING, 'replace').splitlines()
+
+
+def _communicate(process, command, start, timeout, cancel, wait_for=None):
+    """
+    Wait for a process started by cmd_execute, killing it once the timeout
+    expires or the cancel event is set.
+    """
+    import subprocess
+    wait_for = wait_for or process.communicate
+    deadline = None if timeout is None else start + timeout
+    while True:
+        wait = None if cancel is None else CANCEL_POLL_INTERVAL
+        if deadline is not None:
+            remaining = max(deadline - time.perf_counter(), 0)
+            wait = remaining if wait is None else min(wait, remaining)
+        try:
+            return wait_for(timeout=wait)
+        except subprocess.TimeoutExpired:
+            if cancel is not None and cancel.is_set():
+                _kill_process_group(process)
+                raise InfaPmrepCancelledError("cancelled: %s" % " ".join(command[1:2]))
+            if deadline is not None and time.perf_counter() >= deadline:
+                _kill_process_group(process)
+                raise InfaPmrepTimeoutError(
+                    "no result after %ss: %s" % (timeout, " ".join(command[1:2])))
+
+
+def _stream(process, command, start, timeout, cancel, on_line):
+    """
+    Same as _communicate, but read the STDOUT stream line by line in a
+    separate thread, passing every line to on_line as soon as it arrives.
+    """
+    import threading
+    chunks = []
+
+    def read():
+        callback = on_line
+        for raw in iter(process.stdout.readline, b''):
+            chunks.append(raw)
+            if callback is not None:
+                try:
+                    callback(raw.decode(OUTPUT_ENCODING, 'replace').rstrip('\r\n'))
+                except Exception:
+                    callback = None  # keep draining the pipe
+        process.stdout.close()
+
+    reader = threading.Thread(target=read, name='pmrep-stdout')
+    reader.daemon = True
+    reader.start()
+    try:
+        _communicate(process, command, start, timeout, cancel, wait_for=process.wait)
+    finally:
+        reader.join()
+    return b''.join(chunks), None
+
+
+def _new_process_group():
+    import subprocess
+    if os.name == 'posix':
+        return {'start_new_session': True}
+    return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+
+
+def _kill_process_group(process):
+    """
+    Kill a process started by cmd_execute together with its children and
+    reap it.
+    """
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:
+        pass  # already gone
+    if process.stdout is not None and not process.stdout.closed and process.stderr is not None:
+        process.communicate()
+    else:
+        process.wait()
 
 
 def cmd_status(command, command_output):
@@ -60,7 +235,8 @@ def cmd_status(command, command_output):
     Check if the command has been successfully executed.
 
     A command is considered be executed successfully if the output 
-    stream contains a string 'completed successfully'.
+    stream contains a string 'completed successfully'. Otherwise the
+    error is classified (see classify_error) and raised.
 
     Args:
         command (list): executed command
@@ -70,8 +246,30 @@ def cmd_status(command, command_output):
         None
     """
     if not any('completed successfully' in line for line in command_output):
-        print("\n".join(command_output))
-        raise Exception("failed to execute: %s" % " ".join(command))
+        sanitized = infa3.instrument.sanitize_command(command, command[1])
+        messages = format_output(command_output, '\n')
+        error = classify_error(messages)
+        raise error(
+            "failed to execute: %s\n%s" % (" ".join(sanitized), "\n".join(messages)),
+            command=sanitized, output=command_output)
+
+
+def classify_error(messages):
+    """
+    Find the InfaPmrepError subclass matching the error messages returned
+    by pmrep.
+
+    Args:
+        messages (list[str]): output lines of the failed command
+
+    Returns:
+        InfaPmrepError or one of its subclasses
+    """
+    text = "\n".join(messages)
+    for error, pattern in ERROR_PATTERNS:
+        if pattern.search(text):
+            return error
+    return InfaPmrepError
 
 
 def format_output(command_output, field_separator):
@@ -79,6 +277,12 @@ def format_output(command_output, field_separator):
     Cleanse the external commands STDOUT stream and format it 
     to an API-friendly list.
 
+    The banner printed by the Informatica programs is skipped once, up to
+    the 'Invoked at' line, and the trailer ('completed successfully',
+    'Completed at') is cut off from the end; only the lines in between are
+    stripped and split. Data containing words from the banner (e.g. an
+    object named 'Informatica_Sales') is therefore kept intact.
+
     Args:
         command_output(list): array of lines returned by the called
             program
@@ -88,27 +292,153 @@ def format_output(command_output, field_separator):
     Returns:
         List
     """
-    ignore_lines = (
-        'Informatica',
-        'Copyright',
-        'All Rights Reserved',
-        'This Software is protected',
-        'Invoked at',
-        'Completed at',
-        'completed successfully'
-    )
-
-    result = []
-    for item in command_output:
-        if item and not any(s in item for s in ignore_lines):
-            if field_separator in item:
-                result.append(item.strip().split(field_separator))
-            else:
-                result.append(item.strip())
+    start, end = _data_bounds(command_output)
+    gc_enabled = gc.isenabled()
+    gc.disable()  # the result holds no reference cycles, collecting while building it is wasted time
+    try:
+        return [
+            item.split(field_separator) if field_separator in item else item
+            for item in map(str.strip, command_output[start:end]) if item
+        ]
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _data_bounds(command_output):
+    """
+    Return the (start, end) indexes of the data region of a command output.
+    """
+    for index, item in enumerate(command_output):
+        item = item.strip()
+        if item.startswith(INVOKED_PREFIX):
+            start = index + 1
+            break
+        if item and not item.startswith(BANNER_PREFIXES):
+            start = index
+            break
+    else:
+        return 0, 0
+
+    end = len(command_output)
+    while end > start:
+        item = command_output[end - 1].strip()
+        if item and not (item.endswith(TRAILER_SUFFIXES) or item.startswith(COMPLETED_PREFIX)):
+            break
+        end -= 1
+    return start, end
+
+
+def iter_output(command_output, field_separator):
+    """
+    Generator version of format_output, consuming the lines one by one
+    (e.g. while they are being read from a running process).
+
+    The output is processed in a single pass: the banner is skipped up to
+    the 'Invoked at' line (or the first line not belonging to the banner),
+    and the processing stops at the 'completed successfully' trailer (or
+    the 'Completed at' line, if the command failed).
 
+    Args:
+        command_output(iterable[str]): lines returned by the called
+            program
+        field_separator(str): caracted that delimits a field in the 
+            returned output
+
+    Yields:
+        List (for lines containing the separator) or str
+    """
+    lines = iter(command_output)
+    for item in lines:
+        item = item.strip()
+        if item.startswith(INVOKED_PREFIX):
+            break
+        if item and not item.startswith(BANNER_PREFIXES):
+            if item.endswith(TRAILER_SUFFIXES) or item.startswith(COMPLETED_PREFIX):
+                return
+            yield item.split(field_separator) if field_separator in item else item
+            break
+
+    for item in lines:
+        item = item.strip()
+        if not item:
+            continue
+        if item.endswith(TRAILER_SUFFIXES) or item.startswith(COMPLETED_PREFIX):
+            return
+        yield item.split(field_separator) if field_separator in item else item
+
+
+class DataLines(object):
+    """
+    Wrap an on_line callback (see cmd_execute) so that it receives the lines
+    iter_output would yield only: the banner up to the 'Invoked at' line,
+    empty lines and the trailer are skipped.
+
+    Args:
+        on_line (callable): called with every data line
+    """
+
+    def __init__(self, on_line):
+        self.on_line = on_line
+        self.started = False
+        self.finished = False
+
+    def __call__(self, line):
+        item = line.strip()
+        if self.finished or not item:
+            return
+        if not self.started:
+            self.started = True
+            if item.startswith(INVOKED_PREFIX):
+                return
+            if item.startswith(BANNER_PREFIXES):
+                self.started = False
+                return
+        if item.endswith(TRAILER_SUFFIXES) or item.startswith(COMPLETED_PREFIX):
+            self.finished = True
+            return
+        self.on_line(line)
+
+
+def parse_name_values(lines):
+    """
+    Parse 'name: value' (or 'name = value') output lines into an ordered
+    dict. Lines without a separator are ignored, and the first separator
+    of a line splits it, so that values may contain colons (e.g. connect
+    strings like 'host:1521/service').
+
+    Args:
+        lines (iterable[str]): formatted output lines
+
+    Returns:
+        collections.OrderedDict
+    """
+    import collections
+    result = collections.OrderedDict()
+    for line in lines:
+        match = re.match(r'\s*([^:=]+?)\s*[:=]\s?(.*)$', line)
+        if match:
+            result[match.group(1)] = match.group(2).strip()
     return result
 
 
+def parse_time(text):
+    """
+    Parse a timestamp printed by pmrep.
+
+    Args:
+        text (str): timestamp, e.g. 'Thu Dec 10 19:50:02 2015'
+
+    Returns:
+        datetime.datetime, or None if the text is not a valid timestamp
+    """
+    import datetime
+    try:
+        return datetime.datetime.strptime(text.strip(), TIME_FORMAT)
+    except ValueError:
+        return None
+
+
 def create_import_control_xml(xml_output, src_folder, src_repo, tgt_folder, tgt_repo, dtd, encode=None):
     """
     Creates a control xml file for the objectimport command.
@@ -141,3 +471,40 @@ def create_import_control_xml(xml_output, src_folder, src_repo, tgt_folder, tgt_
 </IMPORTPARAMS>"""
     with open(xml_output, 'w') as f:
         f.write(template)
+
+
+def create_deploy_control_xml(xml_output, dtd, new_folder=None, replace_folder=None, comment=None, encode=None):
+    """
+    Creates a control xml file for the deployfolder command, copying the
+    latest versions of all objects with their dependencies.
+
+    Args:
+        xml_output(str): name of the control file
+        dtd(str): path of the depcntl.dtd file
+        new_folder(Optional[str]): name of the folder in the target
+            repository. Default is the name of the source folder.
+        replace_folder(Optional[str]): name of the target folder to be
+            replaced
+        comment(Optional[str]): check-in comment
+
+    Returns:
+        Nothing
+    """
+    from xml.sax.saxutils import quoteattr
+    folder = ''
+    if new_folder is not None:
+        folder += ' NEWFOLDERNAME=%s' % quoteattr(new_folder)
+    if replace_folder is None:
+        folder += '/>'
+    else:
+        folder += '>\n<REPLACEFOLDER FOLDERNAME=%s/>\n</DEPLOYFOLDER>' % quoteattr(replace_folder)
+    template = """<?xml version="1.0" encoding="{encode}"?>
+<!DOCTYPE DEPLOYPARAMS SYSTEM "{dtd}">
+<DEPLOYPARAMS COPYPROGRAMINFO="YES" COPYMAPVARPERVALS="YES" COPYWFLOWVARPERVALS="YES" COPYWFLOWSESSLOGS="NO"
+COPYDEPENDENCY="YES" LATESTVERSIONONLY="YES" RETAINGENERATEDVAL="YES" RETAINSERVERNETVALS="YES"{comment}>
+<DEPLOYFOLDER{folder}
+</DEPLOYPARAMS>
+""".format(encode=encode or "ISO-8859-1", dtd=dtd, folder=folder,
+           comment='' if comment is None else ' CHECKIN_COMMENTS=%s' % quoteattr(comment))
+    with open(xml_output, 'w') as f:
+        f.write(template)
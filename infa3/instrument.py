@@ -0,0 +1,258 @@
+"""
+This module contains the instrumentation hooks for pmrep command calls.
+
+Every command executed by a Pmrep instance is reported as a CommandEvent
+to the observers registered on that instance. An observer is any object
+implementing an ``on_command(event)`` method; the sinks defined below cover
+the most common needs (in-memory histogram, JSONL file, Prometheus text
+format file).
+"""
+import bisect
+import collections
+import json
+import logging
+import os
+import threading
+
+# values following these options are never reported, as they carry passwords
+SECRET_OPTIONS = {
+    'connect': frozenset(['-x']),
+    'create': frozenset(['-p', '-P']),
+    'createconnection': frozenset(['-p', '-P']),
+    'deploydeploymentgroup': frozenset(['-x']),
+    'deployfolder': frozenset(['-x']),
+    'massupdate': frozenset(),
+    'restore': frozenset(['-p', '-P']),
+    'updateconnection': frozenset(['-p', '-P']),
+}
+# password options of the commands not listed above
+DEFAULT_SECRET_OPTIONS = frozenset(['-x'])
+SECRET_MASK = '******'
+
+logger = logging.getLogger(__name__)
+
+# upper bounds (in seconds) of the wall time histogram buckets
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+CommandEvent = collections.namedtuple('CommandEvent', [
+    'command',       # pmrep command name, e.g. 'listobjects'
+    'args',          # sanitized command line arguments
+    'started',       # epoch timestamp of the call start
+    'wall_time',     # seconds spent in the whole call (incl. parsing)
+    'spawn_time',    # seconds spent starting the pmrep process
+    'stdout_bytes',  # size of the captured STDOUT stream
+    'rows',          # number of parsed records, None for commands without (or with spilled) output
+    'returncode',    # pmrep process exit code
+    'status',        # 'ok' or 'failed'
+])
+
+
+def sanitize_command(args, command=None):
+    """
+    Mask the values of password options in a command line argument list.
+
+    Args:
+        args (list[str]): command line arguments
+        command (Optional[str]): pmrep command name, selecting its password
+            options (see SECRET_OPTIONS)
+
+    Returns:
+        List
+    """
+    secret = SECRET_OPTIONS.get(command, DEFAULT_SECRET_OPTIONS)
+    sanitized = []
+    mask_next = False
+    for arg in args:
+        sanitized.append(SECRET_MASK if mask_next else arg)
+        mask_next = arg in secret
+    return sanitized
+
+
+def notify(observers, event):
+    """
+    Pass a command event to all of the given observers.
+
+    A failing observer is logged and skipped: instrumentation never changes
+    the result (or the error) of a command.
+
+    Args:
+        observers (list): objects implementing ``on_command(event)``
+        event (CommandEvent): the event to be reported
+
+    Returns:
+        None
+    """
+    for observer in observers:
+        try:
+            observer.on_command(event)
+        except Exception:
+            logger.exception('observer %r failed on %s', observer, event.command)
+
+
+class Observer(object):
+    """
+    Base class for command observers.
+    """
+
+    def on_command(self, event):
+        """
+        Called after each pmrep command has finished (successfully or not).
+
+        Args:
+            event (CommandEvent): details of the finished command
+        """
+        raise NotImplementedError
+
+
+class HistogramSink(Observer):
+    """
+    Aggregate command events in memory, per command name.
+
+    For each command a wall time histogram is kept together with call
+    counters, total spawn time, total STDOUT bytes and total parsed rows.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def on_command(self, event):
+        with self._lock:
+            stats = self._stats.get(event.command)
+            if stats is None:
+                stats = self._stats[event.command] = {
+                    'count': 0,
+                    'failed': 0,
+                    'wall_time': 0.0,
+                    'spawn_time': 0.0,
+                    'stdout_bytes': 0,
+                    'rows': 0,
+                    'max_wall_time': 0.0,
+                    'buckets': [0] * (len(self.buckets) + 1),
+                }
+            stats['count'] += 1
+            if event.status != 'ok':
+                stats['failed'] += 1
+            stats['wall_time'] += event.wall_time
+            stats['spawn_time'] += event.spawn_time or 0.0
+            stats['stdout_bytes'] += event.stdout_bytes or 0
+            stats['rows'] += event.rows or 0
+            stats['max_wall_time'] = max(stats['max_wall_time'], event.wall_time)
+            stats['buckets'][bisect.bisect_left(self.buckets, event.wall_time)] += 1
+
+    def snapshot(self):
+        """
+        Return a copy of the aggregated statistics.
+
+        Returns:
+            Dict of command name to statistics dict. The 'buckets' entry holds
+            the (non-cumulative) number of calls per wall time bucket, the
+            last one counting calls slower than the largest bucket bound.
+        """
+        with self._lock:
+            return dict(
+                (command, dict(stats, buckets=list(stats['buckets'])))
+                for command, stats in self._stats.items()
+            )
+
+    def quantile(self, command, q):
+        """
+        Estimate a wall time quantile of a command from its histogram.
+
+        Args:
+            command (str): pmrep command name
+            q (float): quantile, between 0 and 1
+
+        Returns:
+            Upper bound of the bucket holding the quantile (float('inf') if it
+            falls into the overflow bucket), or None if the command was never
+            called.
+        """
+        with self._lock:
+            stats = self._stats.get(command)
+            if stats is None:
+                return None
+            target = q * stats['count']
+            seen = 0
+            for bound, count in zip(self.buckets, stats['buckets']):
+                seen += count
+                if seen >= target:
+                    return bound
+            return float('inf')
+
+
+class JsonlSink(Observer):
+    """
+    Append every command event as a JSON line to a file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def on_command(self, event):
+        line = json.dumps(event._asdict(), sort_keys=True)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+
+class PrometheusSink(HistogramSink):
+    """
+    Keep the aggregated statistics in a file using the Prometheus text
+    exposition format, e.g. for the node exporter textfile collector.
+
+    The file is rewritten atomically after each command.
+    """
+
+    def __init__(self, path, buckets=DEFAULT_BUCKETS, prefix='infa_pmrep'):
+        super(PrometheusSink, self).__init__(buckets)
+        self.path = path
+        self.prefix = prefix
+        self._write_lock = threading.Lock()
+
+    def on_command(self, event):
+        super(PrometheusSink, self).on_command(event)
+        with self._write_lock:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(self.render())
+            os.replace(tmp_path, self.path)
+
+    def render(self):
+        """
+        Render the aggregated statistics in the Prometheus text format.
+
+        Returns:
+            String
+        """
+        p = self.prefix
+        lines = [
+            '# HELP %s_duration_seconds Wall time of pmrep commands.' % p,
+            '# TYPE %s_duration_seconds histogram' % p,
+        ]
+        snapshot = self.snapshot()
+        for command, stats in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, stats['buckets']):
+                cumulative += count
+                lines.append('%s_duration_seconds_bucket{command="%s",le="%s"} %d'
+                             % (p, command, bound, cumulative))
+            lines.append('%s_duration_seconds_bucket{command="%s",le="+Inf"} %d'
+                         % (p, command, stats['count']))
+            lines.append('%s_duration_seconds_sum{command="%s"} %f' % (p, command, stats['wall_time']))
+            lines.append('%s_duration_seconds_count{command="%s"} %d' % (p, command, stats['count']))
+
+        counters = (
+            ('spawn_seconds_total', 'spawn_time', 'Time spent spawning pmrep processes.', '%f'),
+            ('stdout_bytes_total', 'stdout_bytes', 'Bytes read from pmrep STDOUT.', '%d'),
+            ('rows_total', 'rows', 'Records parsed from pmrep output.', '%d'),
+            ('failures_total', 'failed', 'Failed pmrep commands.', '%d'),
+        )
+        for name, key, help_text, fmt in counters:
+            lines.append('# HELP %s_%s %s' % (p, name, help_text))
+            lines.append('# TYPE %s_%s counter' % (p, name))
+            for command, stats in sorted(snapshot.items()):
+                lines.append(('%s_%s{command="%s"} ' + fmt) % (p, name, command, stats[key]))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,414 @@
+"""
+This module contains the column level lineage graph of mappings.
+
+LineageGraph.add_export() streams an objectexport XML file, element by
+element, and turns the INSTANCE and CONNECTOR elements of every mapping into
+a graph of columns: the ports of source definitions, targets and the
+transformation instances in between. Within a transformation, an output port
+derives from the input port of the same name (pass-through and input/output
+ports), from the input ports its EXPRESSION refers to (through variable
+ports) or from its REF_FIELD (routers, unions); output ports of
+transformations without port definitions in the export derive from all
+input ports of the instance.
+
+Source and target columns are shared by all mappings of a folder using the
+same source or target definition, so that lineage can be followed across
+thousands of mappings. All names are interned to integers and the edges kept
+in arrays; the graph can be saved to and loaded from a directory.
+
+    graph = LineageGraph.from_repository(p, folders=['Sales'], workers=4)
+    graph.targets('CUSTOMERS', 'CUST_ID', folder='Sales')
+    graph.save('lineage')
+    graph = LineageGraph.load('lineage')
+"""
+import array
+import collections
+import json
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+
+import infa3.bulk
+from infa3.writers import narrowest_typecode
+
+Column = collections.namedtuple('Column', [
+    'kind',    # 'SOURCE', 'TARGET' or 'PORT' (port of a transformation instance)
+    'folder',  # folder name
+    'scope',   # database name of sources, mapping name of ports, '' for targets
+    'object',  # source or target definition name, instance name of ports
+    'field',   # column or port name
+])
+
+KINDS = ('SOURCE', 'TARGET', 'PORT')
+NODE_COLUMNS = ('kind', 'folder', 'scope', 'object', 'field')
+
+# identifiers referred to by transformation expressions
+IDENTIFIER = re.compile(r'[A-Za-z_$][\w$#@]*')
+# string literals of transformation expressions
+LITERAL = re.compile(r"'[^']*'|\"[^\"]*\"")
+
+
+def port_dependencies(port, inputs, fields):
+    """
+    Return the input ports an output port of a transformation instance
+    derives from. Port names are case insensitive, as in the expressions.
+
+    Args:
+        port (str): output port name
+        inputs (set[str]): connected input ports of the instance
+        fields (Optional[dict]): port name -> (port type, expression,
+            reference field) of the transformation, None if unknown
+
+    Returns:
+        Set of input port names (as in `inputs`)
+    """
+    declared = dict((name.lower(), name) for name in inputs)
+    ports = dict((name.lower(), value) for name, value in (fields or {}).items())
+    key = port.lower()
+    if fields is None or key not in ports:
+        return {declared[key]} if key in declared else set(inputs)
+    port_type, expression, reference = ports[key]
+    if 'INPUT' in port_type:
+        return {declared[key]} if key in declared else set()
+    if not expression and not reference:
+        return set(inputs)
+    dependencies = set()
+    visited = {key}
+    pending = [key]
+    while pending:
+        port_type, expression, reference = ports[pending.pop()]
+        names = [reference] if reference else IDENTIFIER.findall(LITERAL.sub(' ', expression or ''))
+        for name in names:
+            name = name.lower()
+            if name in declared:
+                dependencies.add(declared[name])
+            elif name in ports and name not in visited and 'INPUT' not in ports[name][0]:
+                visited.add(name)  # variable port
+                pending.append(name)
+    return dependencies
+
+
+class LineageGraph(object):
+    """
+    Directed graph of the columns of mappings, from sources through
+    transformation ports to targets.
+    """
+
+    def __init__(self):
+        self._strings = []
+        self._string_codes = {}
+        self._nodes = dict((name, array.array('I')) for name in NODE_COLUMNS)
+        self._node_codes = {}              # node key -> node, None until needed after load()
+        self._from = array.array('I')
+        self._to = array.array('I')
+        self._unique = 0                   # number of leading edges known to be distinct
+        self._forward = None
+        self._backward = None
+        self._columns = None
+        self.mappings = 0
+        self.report = None
+
+    @classmethod
+    def from_exports(cls, paths):
+        """
+        Build the graph of objectexport XML files.
+        """
+        graph = cls()
+        for path in paths:
+            graph.add_export(path)
+        return graph
+
+    @classmethod
+    def from_repository(cls, pmrep, folders, workers=4, progress=None, cancel=None):
+        """
+        Export the mappings of the given folders with their reusable and
+        non-reusable dependents (one objectexport per folder, run
+        concurrently on isolated connections, see infa3.bulk) and build
+        their graph.
+
+        Returns:
+            LineageGraph. Its `report` attribute is the BulkReport of the
+            export (folders which could not be exported are listed there).
+        """
+        graph = cls()
+        with infa3.bulk.BulkRunner(pmrep, workers, cancel=cancel, progress=progress) as runner:
+
+            def export(worker, shard):
+                paths = []
+                for folder in shard:
+                    mappings = [row if isinstance(row, str) else row[-1]
+                                for row in worker.listobjects(o='mapping', f=folder)]
+                    if not mappings:
+                        continue
+                    input_file = runner.input_file(
+                        infa3.bulk.RepositoryObject(folder, name, 'mapping') for name in mappings)
+                    paths.append(input_file + '.xml')
+                    # -r: the port expressions of reusable instances are in their definitions
+                    worker.objectexport(i=input_file, u=paths[-1], r=True, b=True)
+                return paths
+
+            report = runner.run(export, list(folders), shard_size=1)
+            for paths in report.results:
+                for path in paths:
+                    graph.add_export(path)
+        graph.report = report
+        return graph
+
+    def _intern(self, value):
+        code = self._string_codes.get(value)
+        if code is None:
+            code = self._string_codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def _node(self, kind, folder, scope, name, field):
+        key = (kind, self._intern(folder), self._intern(scope), self._intern(name), self._intern(field))
+        if self._node_codes is None:
+            self._node_codes = dict(
+                (codes, node) for node, codes in enumerate(zip(*[self._nodes[column] for column in NODE_COLUMNS])))
+        node = self._node_codes.get(key)
+        if node is None:
+            node = self._node_codes[key] = len(self._nodes['kind'])
+            for column, code in zip(NODE_COLUMNS, key):
+                self._nodes[column].append(code)
+        return node
+
+    def _edge(self, source, target):
+        if source != target:
+            self._from.append(source)
+            self._to.append(target)
+            self._forward = self._backward = self._columns = None
+
+    def _deduplicate(self):
+        """
+        Drop repeated edges (e.g. of a source column read by the same
+        instance twice), sorting the edges by source and target.
+        """
+        if self._unique == len(self._from):
+            return
+        pairs = sorted(set(zip(self._from, self._to)))
+        self._from = array.array('I', (source for source, _ in pairs))
+        self._to = array.array('I', (target for _, target in pairs))
+        self._unique = len(self._from)
+
+    def add_export(self, path):
+        """
+        Add the mappings of an objectexport XML file, read element by
+        element so that large exports are never loaded at once.
+        """
+        folder = mapping = None
+        reusable = {}
+        transformations = instances = connectors = None
+        for event, element in ElementTree.iterparse(path, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if tag == 'FOLDER':
+                    folder = element.get('NAME')
+                    reusable = {}
+                elif tag in ('MAPPING', 'MAPPLET'):
+                    mapping = element.get('NAME')
+                    transformations, instances, connectors = {}, {}, []
+                continue
+            if tag == 'TRANSFORMATION':
+                fields = dict(
+                    (f.get('NAME'), (f.get('PORTTYPE', ''), f.get('EXPRESSION'), f.get('REF_FIELD')))
+                    for f in element.iter('TRANSFORMFIELD'))
+                (transformations if mapping is not None else reusable)[element.get('NAME')] = fields or None
+                element.clear()
+            elif tag == 'INSTANCE' and mapping is not None:
+                instances[element.get('NAME')] = (
+                    element.get('TYPE'), element.get('TRANSFORMATION_NAME'), element.get('DBDNAME') or '')
+            elif tag == 'CONNECTOR' and mapping is not None:
+                connectors.append((element.get('FROMINSTANCE'), element.get('FROMFIELD'),
+                                   element.get('TOINSTANCE'), element.get('TOFIELD')))
+            elif tag in ('MAPPING', 'MAPPLET'):
+                self._add_mapping(folder, mapping, reusable, transformations, instances, connectors)
+                mapping = transformations = instances = connectors = None
+                self.mappings += 1
+                element.clear()
+            elif tag == 'FOLDER':
+                folder = None
+                element.clear()
+
+    def _add_mapping(self, folder, mapping, reusable, transformations, instances, connectors):
+        def node(instance, field):
+            instance_type, definition, database = instances.get(instance, ('TRANSFORMATION', instance, ''))
+            if instance_type == 'SOURCE':
+                return self._node(0, folder, database, definition, field)
+            if instance_type == 'TARGET':
+                return self._node(1, folder, '', definition, field)
+            return self._node(2, folder, mapping, instance, field)
+
+        inputs = collections.defaultdict(set)
+        outputs = collections.defaultdict(set)
+        for from_instance, from_field, to_instance, to_field in connectors:
+            self._edge(node(from_instance, from_field), node(to_instance, to_field))
+            inputs[to_instance].add(to_field)
+            outputs[from_instance].add(from_field)
+        for instance, ports in outputs.items():
+            instance_type, definition, _ = instances.get(instance, ('TRANSFORMATION', instance, ''))
+            if instance_type in ('SOURCE', 'TARGET') or not inputs[instance]:
+                continue
+            fields = transformations.get(definition, reusable.get(definition))
+            for port in ports:
+                for dependency in port_dependencies(port, inputs[instance], fields):
+                    self._edge(node(instance, dependency), node(instance, port))
+
+    def _adjacency(self, sources, targets):
+        """
+        Return the compressed adjacency (offsets, neighbours) of the edges.
+        """
+        count = len(self)
+        offsets = array.array('I', [0]) * (count + 1)
+        for source in sources:
+            offsets[source + 1] += 1
+        for i in range(count):
+            offsets[i + 1] += offsets[i]
+        neighbours = array.array('I', [0]) * len(sources)
+        position = offsets[:-1]
+        for source, target in zip(sources, targets):
+            neighbours[position[source]] = target
+            position[source] += 1
+        return offsets, neighbours
+
+    def _prepare(self):
+        if self._forward is None:
+            self._deduplicate()
+            self._forward = self._adjacency(self._from, self._to)
+            self._backward = self._adjacency(self._to, self._from)
+            self._columns = collections.defaultdict(list)
+            nodes = self._nodes
+            for node, (kind, name, field) in enumerate(zip(nodes['kind'], nodes['object'], nodes['field'])):
+                self._columns[(kind, name, field)].append(node)
+
+    def column(self, node):
+        """
+        Return the Column of a node.
+        """
+        strings = self._strings
+        return Column(KINDS[self._nodes['kind'][node]], *[
+            strings[self._nodes[name][node]] for name in NODE_COLUMNS[1:]])
+
+    def find(self, kind, name, field, folder=None, scope=None):
+        """
+        Return the nodes of a column.
+
+        Args:
+            kind (str): 'SOURCE', 'TARGET' or 'PORT'
+            name (str): source or target definition name, instance name
+            field (str): column or port name
+            folder (Optional[str]): folder name
+            scope (Optional[str]): database name of sources, mapping name
+                of ports
+
+        Returns:
+            List of node numbers
+        """
+        self._prepare()
+        codes = self._string_codes
+        if name not in codes or field not in codes:
+            return []
+        nodes = self._columns.get((KINDS.index(kind), codes[name], codes[field]), [])
+        if folder is not None:
+            nodes = [n for n in nodes if self._strings[self._nodes['folder'][n]] == folder]
+        if scope is not None:
+            nodes = [n for n in nodes if self._strings[self._nodes['scope'][n]] == scope]
+        return nodes
+
+    def _reachable(self, nodes, adjacency):
+        offsets, neighbours = adjacency
+        seen = set(nodes)
+        pending = list(nodes)
+        while pending:
+            node = pending.pop()
+            for neighbour in neighbours[offsets[node]:offsets[node + 1]]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    pending.append(neighbour)
+        return seen
+
+    def downstream(self, nodes):
+        """
+        Return the Columns derived from the given nodes.
+        """
+        self._prepare()
+        return sorted(self.column(n) for n in self._reachable(nodes, self._forward) - set(nodes))
+
+    def upstream(self, nodes):
+        """
+        Return the Columns the given nodes derive from.
+        """
+        self._prepare()
+        return sorted(self.column(n) for n in self._reachable(nodes, self._backward) - set(nodes))
+
+    def targets(self, source, field, folder=None, database=None):
+        """
+        Return the target columns derived from a source column.
+
+        Returns:
+            Sorted list of Column
+        """
+        nodes = self.find('SOURCE', source, field, folder, database)
+        return [c for c in self.downstream(nodes) if c.kind == 'TARGET']
+
+    def sources(self, target, field, folder=None):
+        """
+        Return the source columns a target column derives from.
+
+        Returns:
+            Sorted list of Column
+        """
+        nodes = self.find('TARGET', target, field, folder)
+        return [c for c in self.upstream(nodes) if c.kind == 'SOURCE']
+
+    def __len__(self):
+        return len(self._nodes['kind'])
+
+    @property
+    def edges(self):
+        self._deduplicate()
+        return len(self._from)
+
+    def save(self, path):
+        """
+        Save the graph to a directory: the interned strings as JSON and the
+        node columns and edges as raw arrays in the narrowest unsigned type.
+        """
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._deduplicate()
+        arrays = dict(self._nodes, edges_from=self._from, edges_to=self._to)
+        typecodes = {}
+        for name, values in arrays.items():
+            typecodes[name] = narrowest_typecode(max(values) + 1 if values else 0)
+            with open(os.path.join(path, name + '.codes'), 'wb') as f:
+                array.array(typecodes[name], values).tofile(f)
+        with open(os.path.join(path, 'strings.json'), 'w') as f:
+            json.dump(self._strings, f)
+        with open(os.path.join(path, 'manifest.json'), 'w') as f:
+            json.dump({'nodes': len(self), 'edges': self.edges, 'mappings': self.mappings,
+                       'typecodes': typecodes}, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a graph saved with save().
+        """
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        graph = cls()
+        with open(os.path.join(path, 'strings.json')) as f:
+            graph._strings = json.load(f)
+        graph._string_codes = dict((value, code) for code, value in enumerate(graph._strings))
+        arrays = {}
+        for name, typecode in manifest['typecodes'].items():
+            values = array.array(typecode)
+            with open(os.path.join(path, name + '.codes'), 'rb') as f:
+                values.fromfile(f, manifest['edges'] if name.startswith('edges') else manifest['nodes'])
+            arrays[name] = array.array('I', values)
+        graph._from, graph._to = arrays.pop('edges_from'), arrays.pop('edges_to')
+        graph._unique = len(graph._from)
+        graph._nodes = arrays
+        graph._node_codes = None
+        graph.mappings = manifest['mappings']
+        return graph
@@ -0,0 +1,98 @@
+"""
+This module contains the planner of session property updates.
+
+A table of desired property values - per session, or per folder for all of
+its sessions - is turned into as few massupdate calls as possible: all
+sessions of a folder sharing the same target value of a property are updated
+by a single call, with a persistent input file listing them. Folder-wide
+changes are planned before the session-specific ones, so that the latter
+take precedence.
+
+    changes = [
+        PropertyChange('Demo', None, 'session_config_property', 'DTM buffer size', '64000000'),
+        PropertyChange('Demo', 's_m_LOAD_FACTS', 'session_property', 'Commit Interval', '50000'),
+    ]
+    report = p.massupdate_bulk(changes, workers=4)
+"""
+import collections
+
+from infa3.bulk import RepositoryObject
+
+PropertyChange = collections.namedtuple('PropertyChange', [
+    'folder',         # folder name
+    'session',        # session name, None for all sessions of the folder
+    'property_type',  # massupdate -x, e.g. 'session_property'
+    'name',           # property name, e.g. 'Commit Interval'
+    'value',          # desired value
+])
+
+PlannedCall = collections.namedtuple('PlannedCall', [
+    'folder',         # folder name
+    'property_type',  # massupdate -x
+    'name',           # property name
+    'value',          # new value
+    'sessions',       # tuple of session names, None for the whole folder
+])
+
+
+def as_change(item):
+    """
+    Return a PropertyChange for a PropertyChange, a tuple or a dict of the
+    PropertyChange fields.
+    """
+    if isinstance(item, PropertyChange):
+        return item
+    if isinstance(item, dict):
+        return PropertyChange(**item)
+    return PropertyChange(*item)
+
+
+def plan(changes):
+    """
+    Group property changes into massupdate calls.
+
+    Changes of the same folder, property and value are merged into one call.
+    When the same session property gets several values, the last change
+    wins; a folder-wide change is still applied to the other sessions.
+
+    Args:
+        changes (iterable): PropertyChanges or tuples/dicts accepted by
+            as_change()
+
+    Returns:
+        List of PlannedCall, ordered by folder, with the folder-wide calls
+        of a folder first
+    """
+    folder_values = collections.OrderedDict()
+    session_values = collections.OrderedDict()
+    for change in map(as_change, changes):
+        value = str(change.value)
+        if change.session:
+            key = (change.folder, change.property_type, change.name, change.session)
+            session_values.pop(key, None)
+            session_values[key] = value
+        else:
+            key = (change.folder, change.property_type, change.name)
+            folder_values.pop(key, None)
+            folder_values[key] = value
+
+    groups = collections.OrderedDict()
+    for (folder, property_type, name, session), value in session_values.items():
+        if folder_values.get((folder, property_type, name)) == value:
+            continue  # already set by the folder-wide call
+        groups.setdefault((folder, property_type, name, value), []).append(session)
+
+    calls = [PlannedCall(folder, property_type, name, value, None)
+             for (folder, property_type, name), value in folder_values.items()]
+    calls.extend(PlannedCall(folder, property_type, name, value, tuple(sessions))
+                 for (folder, property_type, name, value), sessions in groups.items())
+    calls.sort(key=lambda call: (call.folder, call.sessions is not None))
+    return calls
+
+
+def session_objects(call):
+    """
+    Return the RepositoryObjects of the sessions of a planned call, for the
+    persistent input file.
+    """
+    return [RepositoryObject(call.folder, session, 'session') for session in call.sessions]
@@ -0,0 +1,351 @@
+"""
+This module contains the in-memory index of repository object names.
+
+The NameIndex answers name lookups - exact, by prefix (autocompletion) and
+fuzzy - without calling pmrep. It is filled from listobjects results, one
+(object type, folder) scope at a time, and a scope can be listed again at
+any time to refresh just that part of the index.
+
+The entries are kept in parallel arrays: the lowercase names sorted for
+bisect based prefix searches, and array-backed postings of the name
+trigrams for fuzzy matching (scored by the Jaccard similarity of the
+trigram sets). Added entries are merged into the sorted order on the next
+lookup, removed ones are skipped until the index is compacted.
+
+    index = NameIndex.build(p, object_types=['mapping', 'workflow'], workers=4)
+    index.prefix('m_load_cust', object_type='mapping', folder='Sales')
+    index.fuzzy('wf_daly_sales')      # [(0.56, IndexEntry('wf_DAILY_SALES', 'workflow', 'Sales')), ...]
+    index.refresh(p, 'mapping', 'Sales')
+"""
+import array
+import bisect
+import collections
+import heapq
+import itertools
+
+import infa3.bulk
+
+IndexEntry = collections.namedtuple('IndexEntry', [
+    'name',    # object name
+    'type',    # object type, e.g. 'mapping'
+    'folder',  # folder name, None for folders
+])
+
+FOLDER_TYPE = 'folder'
+
+# trigrams in more than this share of the names (e.g. a 'wf_' prefix) are
+# not scanned by fuzzy lookups, only checked on the candidates
+COMMON_TRIGRAMS = 0.05
+
+
+def trigrams(key):
+    """
+    Return the set of trigrams of a name, padded to weight its beginning.
+    """
+    padded = '  %s ' % key
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def object_name(row):
+    """
+    Return the object name of a listobjects output row.
+    """
+    return row if isinstance(row, str) else row[-1]
+
+
+class NameIndex(object):
+    """
+    Index of object names with exact, prefix and fuzzy lookups.
+
+    Args:
+        entries (iterable): initial IndexEntries or (name, type, folder)
+            tuples
+    """
+
+    def __init__(self, entries=()):
+        self._names = []                   # name by entry id
+        self._keys = []                    # lowercase name by entry id
+        self._types = array.array('I')     # type code by entry id
+        self._folders = array.array('I')   # folder code by entry id
+        self._sizes = array.array('H')     # number of trigrams by entry id
+        self._alive = bytearray()          # 0 for removed entries
+        self._type_codes = {}
+        self._type_names = []
+        self._folder_codes = {None: 0}
+        self._folder_names = [None]
+        self._scopes = collections.defaultdict(dict)  # (type code, folder code) -> {name: entry id}
+        self._postings = {}                # trigram -> array of entry ids
+        self._order = array.array('I')     # entry ids sorted by key
+        self._sorted_keys = []             # keys in the order of _order
+        self._pending = []                 # entry ids added since the last merge
+        self._removed = 0
+        self.report = None
+        for entry in entries:
+            self.add(*entry)
+
+    @classmethod
+    def build(cls, pmrep, object_types=('mapping', 'session', 'workflow'), folders=None, workers=4,
+              progress=None, cancel=None):
+        """
+        Build the index of a repository: its folders and the objects of the
+        given types in every folder, listed concurrently on isolated
+        connections (see infa3.bulk).
+
+        Args:
+            pmrep (Pmrep): repository to index
+            object_types (iterable[str]): listobjects object types
+            folders (Optional[iterable[str]]): folders to index. Default
+                are all folders.
+            workers (int): number of concurrent pmrep connections
+            progress (Optional[callable]): called with the BulkReport after
+                each listing
+            cancel (Optional[threading.Event]): stops the listing once set
+
+        Returns:
+            NameIndex. Its `report` attribute is the BulkReport of the
+            listing (scopes which could not be listed are listed there).
+        """
+        index = cls()
+        index.refresh(pmrep, FOLDER_TYPE)
+        if folders is None:
+            folders = [index._names[i] for i in index._scopes[(index._type_codes[FOLDER_TYPE], 0)].values()]
+        scopes = [(object_type, folder) for folder in folders for object_type in object_types]
+
+        def fetch(worker, shard):
+            return [(object_type, folder, [object_name(row) for row in worker.listobjects(o=object_type, f=folder)])
+                    for object_type, folder in shard]
+
+        with infa3.bulk.BulkRunner(pmrep, workers, cancel=cancel, progress=progress) as runner:
+            report = runner.run(fetch, scopes, shard_size=1)
+        for shard in report.results:
+            for object_type, folder, names in shard:
+                index.replace(object_type, folder, names)
+        index.report = report
+        return index
+
+    def _code(self, codes, names, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _entry(self, entry_id):
+        return IndexEntry(self._names[entry_id], self._type_names[self._types[entry_id]],
+                          self._folder_names[self._folders[entry_id]])
+
+    def add(self, name, object_type, folder=None):
+        """
+        Add an object name (if not present).
+        """
+        type_code = self._code(self._type_codes, self._type_names, object_type)
+        folder_code = self._code(self._folder_codes, self._folder_names, folder)
+        scope = self._scopes[(type_code, folder_code)]
+        if name in scope:
+            return
+        entry_id = len(self._names)
+        key = name.lower()
+        grams = trigrams(key)
+        scope[name] = entry_id
+        self._names.append(name)
+        self._keys.append(key)
+        self._types.append(type_code)
+        self._folders.append(folder_code)
+        self._sizes.append(min(len(grams), 0xffff))
+        self._alive.append(1)
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array.array('I')
+            postings.append(entry_id)
+        self._pending.append(entry_id)
+
+    def remove(self, name, object_type, folder=None):
+        """
+        Remove an object name (if present).
+        """
+        scope = self._scopes.get((self._type_codes.get(object_type), self._folder_codes.get(folder)))
+        entry_id = scope.pop(name, None) if scope is not None else None
+        if entry_id is None:
+            return
+        self._alive[entry_id] = 0
+        self._removed += 1
+
+    def replace(self, object_type, folder, names):
+        """
+        Set the names of the objects of a type in a folder (for folders: all
+        folder names, with `folder` None), as listed by listobjects.
+
+        Returns:
+            (added, removed) numbers of names
+        """
+        names = set(names)
+        type_code = self._code(self._type_codes, self._type_names, object_type)
+        folder_code = self._code(self._folder_codes, self._folder_names, folder)
+        current = set(self._scopes[(type_code, folder_code)])
+        for name in current - names:
+            self.remove(name, object_type, folder)
+        for name in names - current:
+            self.add(name, object_type, folder)
+        return len(names - current), len(current - names)
+
+    def refresh(self, pmrep, object_type, folder=None):
+        """
+        List the objects of a type in a folder (or the folders) again and
+        update that part of the index.
+
+        Returns:
+            (added, removed) numbers of names
+        """
+        params = {'o': object_type}
+        if folder is not None:
+            params['f'] = folder
+        return self.replace(object_type, folder, [object_name(row) for row in pmrep.listobjects(**params)])
+
+    def _merge(self):
+        """
+        Merge the pending entries into the sorted order, dropping removed
+        entries; compact the index once most entries are removed.
+        """
+        if self._removed > len(self._names) // 2:
+            self._compact()
+        if not self._pending:
+            return
+        alive = self._alive
+        pending = sorted((self._keys[i], i) for i in self._pending if alive[i])
+        merged = heapq.merge(
+            ((k, i) for k, i in zip(self._sorted_keys, self._order) if alive[i]), pending)
+        self._sorted_keys = []
+        self._order = array.array('I')
+        for key, entry_id in merged:
+            self._sorted_keys.append(key)
+            self._order.append(entry_id)
+        self._pending = []
+
+    def _compact(self):
+        entries = [self._entry(i) for i in range(len(self._names)) if self._alive[i]]
+        report = self.report
+        self.__init__(entries)
+        self.report = report
+
+    def _filter(self, object_type, folder):
+        """
+        Return the type and folder codes to match, False if nothing can
+        match.
+        """
+        type_code = folder_code = None
+        if object_type is not None:
+            type_code = self._type_codes.get(object_type, -1)
+        if folder is not None:
+            folder_code = self._folder_codes.get(folder, -1)
+        if type_code == -1 or folder_code == -1:
+            return False
+        return type_code, folder_code
+
+    def _matches(self, entry_id, type_code, folder_code):
+        return (self._alive[entry_id] and (type_code is None or self._types[entry_id] == type_code)
+                and (folder_code is None or self._folders[entry_id] == folder_code))
+
+    def exists(self, name, object_type=None, folder=None):
+        """
+        Check whether an object name exists (case insensitive).
+        """
+        return bool(self.lookup(name, object_type, folder, limit=1))
+
+    def lookup(self, name, object_type=None, folder=None, limit=None):
+        """
+        Return the entries of an object name (case insensitive), e.g. the
+        folders holding a mapping.
+
+        Returns:
+            List of IndexEntry
+        """
+        return self.prefix(name, object_type, folder, limit, exact=True)
+
+    def prefix(self, prefix, object_type=None, folder=None, limit=20, exact=False):
+        """
+        Return the entries whose name starts with a prefix (case
+        insensitive), in alphabetical order.
+
+        Args:
+            prefix (str): name prefix
+            object_type (Optional[str]): only objects of this type
+            folder (Optional[str]): only objects of this folder
+            limit (Optional[int]): maximum number of entries
+            exact (bool): match the whole name
+
+        Returns:
+            List of IndexEntry
+        """
+        self._merge()
+        codes = self._filter(object_type, folder)
+        if codes is False:
+            return []
+        key = prefix.lower()
+        keys = self._sorted_keys
+        entries = []
+        i = bisect.bisect_left(keys, key)
+        while i < len(keys) and (keys[i] == key if exact else keys[i].startswith(key)):
+            entry_id = self._order[i]
+            if self._matches(entry_id, *codes):
+                entries.append(self._entry(entry_id))
+                if limit is not None and len(entries) >= limit:
+                    break
+            i += 1
+        return entries
+
+    def fuzzy(self, query, object_type=None, folder=None, limit=10, threshold=0.3):
+        """
+        Return the entries with names similar to a query (e.g. misspelled),
+        by the Jaccard similarity of their trigrams. Candidates are the names
+        sharing one of the less common trigrams of the query (see
+        COMMON_TRIGRAMS), so names similar by common trigrams only are not
+        found.
+
+        Args:
+            query (str): name to match
+            object_type (Optional[str]): only objects of this type
+            folder (Optional[str]): only objects of this folder
+            limit (int): maximum number of entries
+            threshold (float): minimum similarity, between 0 and 1
+
+        Returns:
+            List of (similarity, IndexEntry), most similar first
+        """
+        codes = self._filter(object_type, folder)
+        if codes is False:
+            return []
+        grams = trigrams(query.lower())
+        empty = array.array('I')
+        postings = sorted(((self._postings.get(gram, empty), gram) for gram in grams), key=lambda p: len(p[0]))
+        # only the postings of the rarest trigrams are counted: the common
+        # ones are checked on the candidates found, never scanned
+        limit_postings = max(int(len(self._names) * COMMON_TRIGRAMS), 1)
+        rare = sum(1 for p, gram in postings if len(p) <= limit_postings)
+        rarest = next((i for i, (p, gram) in enumerate(postings) if p), len(postings))
+        scanned = postings[:max(rare, rarest + 1)]
+        rest = [gram for p, gram in postings[len(scanned):]]
+        counts = collections.Counter()
+        counts.update(itertools.chain.from_iterable(p for p, gram in scanned))
+        minimum = threshold * len(grams) - len(rest)
+        keys = self._keys
+        sizes = self._sizes
+        scored = []
+        for entry_id, common in counts.items():
+            if common >= minimum and self._matches(entry_id, *codes):
+                padded = '  %s ' % keys[entry_id]
+                common += sum(1 for gram in rest if gram in padded)
+                score = common / float(len(grams) + sizes[entry_id] - common)
+                if score >= threshold:
+                    scored.append((score, entry_id))
+        return [(score, self._entry(entry_id)) for score, entry_id in heapq.nlargest(limit, scored)]
+
+    def __contains__(self, name):
+        return self.exists(name)
+
+    def __len__(self):
+        return len(self._names) - self._removed
+
+    def __iter__(self):
+        self._merge()
+        return (self._entry(i) for i in self._order if self._alive[i])
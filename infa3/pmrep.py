@@ -1,7 +1,18 @@
+import datetime
 import os
 import string
+import tempfile
+import threading
+import time
+import infa3.bulk
 import infa3.helper
-from infa3.exceptions import InfaPmrepError
+import infa3.instrument
+import infa3.massupdate
+import infa3.sequences
+import infa3.session
+import infa3.spill
+from infa3.commands import COMMANDS
+from infa3.exceptions import InfaPmrepError, InfaPmrepConnectionError, InfaPmrepCancelledError
 
 
 class Pmrep(object):
@@ -17,214 +28,547 @@ class Pmrep(object):
 
     If a pmrep command requires flags, the counterpart method implements the same flags
     as **kwargs.
+
+    Most of the methods are generated from the command specifications in
+    infa3.commands; only the commands requiring extra logic are implemented
+    here by hand.
+
+    Every executed command is reported to the observers (see infa3.instrument)
+    supplied with the `observers` argument or appended to the `observers` list
+    later on.
+
+    Commands are run by the `executor` callable, infa3.helper.cmd_execute by
+    default. Alternative executors (e.g. the record/replay backends from
+    infa3.cassette) must accept the same arguments. The pmrep binary path is
+    not checked for executors with a false `requires_binary` attribute.
+
+    A command is killed (with its whole process group) when it runs longer than
+    `timeout` seconds or when the `cancel` event (threading.Event) gets set.
+    Both defaults can be overridden per call by passing `timeout` or `cancel`
+    to any method accepting kwargs. Calls exceeding their latency SLO are
+    reported by the `watchdog` (see infa3.watchdog), if given.
+
+    Failed commands raise InfaPmrepError or one of its subclasses, depending on
+    the error reported by pmrep. Transient failures are retried according to
+    the `retry` policy (see infa3.retry.RetryPolicy), reconnecting with the
+    connect parameters supplied at instantiation where needed.
+
+    With `lazy` set, the connection is made just before the first command
+    runs instead of at instantiation. The connection file (INFA_REPCNX_INFO)
+    used by pmrep can be set explicitly with `cnx_file`, or derived from the
+    repository, domain/host, port, user and password within `session_dir`
+    (kept readable for the owner only). An existing connection file is
+    reused without connecting again, also across processes, unless it has
+    been idle for longer than `session_ttl` seconds;
+    if pmrep reports the reused session as expired, the instance reconnects
+    and runs the command again.
+
+    Passing `spill=True` (or `spill=<directory>`) to a method producing output
+    writes the pmrep output to a temporary file instead of memory and returns
+    an infa3.spill.SpilledOutput, a lazily parsed sequence of the output rows
+    backed by that file. The executor has to support the `stdout` option
+    (infa3.helper.cmd_execute does). Similarly, `on_line=<callable>` passes
+    every output line (without the banner and trailer) to the callable while
+    the command runs, e.g. to report the progress of deployments.
     """
 
-    def __init__(self, pmrep, **params):
+    def __init__(self, pmrep, observers=None, executor=None, timeout=None, cancel=None, watchdog=None,
+                 retry=None, lazy=False, cnx_file=None, session_dir=None, session_ttl=None, **params):
         self.pmrep = pmrep
-        if not (os.path.isfile(self.pmrep) and os.access(self.pmrep, os.X_OK)):
+        self.observers = list(observers or [])
+        self.executor = executor or infa3.helper.cmd_execute
+        self.timeout = timeout
+        self.cancel = cancel
+        self.watchdog = watchdog
+        self.retry = retry
+        self.connect_params = params
+        if getattr(self.executor, 'requires_binary', True) and not (
+                os.path.isfile(self.pmrep) and os.access(self.pmrep, os.X_OK)):
             raise InfaPmrepError(
                 "%s is not the correct path to pmrep binary" % self.pmrep)
 
-        opts_args = ['r', 'd', 'h', 'o', 'n', 's', 'x', 'u', 't']
-        opts_flags = []
-
-        command = [self.pmrep, 'connect']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def __default_io_command(self, pmrep_command, opts_args, opts_flags, params, column_separator='.'):
-        command = [self.pmrep]
-        if isinstance(pmrep_command, list):
-            command.extend(pmrep_command)
-        else:
-            command.append(pmrep_command)
-
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-        return infa3.helper.format_output(pmrep_output, column_separator)
-
-    def assignintegrationservice(self, **params):
-        """
-        Assigns the PowerCenter Integration Service to the specified workflow
-
-        Args (all to be supplied as kwargs):
-            f (str): Required. Name of the folder that contains the workflow.
-            n (str): Name of the workflow.
-            i (str): Name of the PowerCenter Integration Service associated
-            with the workflow.
+        if cnx_file is None and session_dir is not None:
+            cnx_file = infa3.session.cnx_file_path(session_dir, params)
+        self.cnx_file = cnx_file
+        self.session_dir = session_dir
+        self.session_ttl = session_ttl
+        self.env = None if cnx_file is None else dict(os.environ, INFA_REPCNX_INFO=cnx_file)
+        self.connected = False
+        self.__session_reused = False
+        self.__connect_lock = threading.RLock()
+
+        if cnx_file is not None and infa3.session.is_valid(cnx_file, session_ttl):
+            self.connected = self.__session_reused = True
+        elif not lazy:
+            self.connect()
+
+    def connect(self):
+        """
+        Connect to the repository using the parameters supplied at
+        instantiation. Called implicitly when the class instance is created.
+
+        Args (supplied as kwargs to the constructor):
+            r (str): Required. Repository name.
+            d (str): Required if [h] and [o] are not used. Domain name.
+            h (str): Required if [d] is not used. Gateway host name.
+            o (str): Required if [d] is not used. Gateway port number.
+            n (str): Required. User name.
+            s (str): Required only is LDAP authentication is in use. Security domain.
+            x (str): Required. Password.
+            t (str): Optional. Client resilience timeout (seconds).
 
             Refer to Informatica Command reference Handbook for details.
         """
-        opts_args = ['f', 'n', 'i']
-        opts_flags = []
+        with self.__connect_lock:
+            self.connected = False
+            if self.cnx_file is not None:
+                infa3.session.prepare(self.cnx_file, session_dir=self.session_dir is not None)
+            self._run_command(COMMANDS['connect'], dict(self.connect_params))
+            if self.cnx_file is not None:
+                infa3.session.protect(self.cnx_file)
+            self.connected = True
+            self.__session_reused = False
+
+    def __ensure_connected(self):
+        if not self.connected:
+            with self.__connect_lock:
+                if not self.connected:
+                    self.connect()
+
+    def _run_command(self, spec, params):
+        """
+        Run the pmrep command described by a CommandSpec with the given
+        kwargs and return its formatted output (None for commands without
+        output).
+        """
+        timeout = params.pop('timeout', self.timeout)
+        cancel = params.pop('cancel', self.cancel)
+        spill = params.pop('spill', None)
+        on_line = params.pop('on_line', None)
+        command = [self.pmrep, spec.name]
+        command.extend(spec.forced)
+        command.extend(infa3.helper.cmd_prepare(params, spec.args, spec.flags))
+        column_separator = spec.separator
+
+        if spec.name == 'connect':
+            return self.__execute(command, column_separator, timeout, cancel)
+
+        attempt = 0
+        reconnect = False
+        while True:
+            try:
+                if reconnect:
+                    self.connect()
+                    reconnect = False
+                self.__ensure_connected()
+                result = self.__execute(command, column_separator, timeout, cancel, spill, on_line)
+                if self.cnx_file is not None:
+                    infa3.session.touch(self.cnx_file)
+                return result
+            except InfaPmrepError as e:
+                if isinstance(e, InfaPmrepConnectionError) and self.__session_reused:
+                    # the session taken over from the connection file has expired
+                    self.__session_reused = False
+                    reconnect = True
+                    continue
+                if self.retry is None or not self.retry.should_retry(e, attempt):
+                    raise
+                reconnect = reconnect or self.retry.should_reconnect(e)
+                delay = self.retry.delay(attempt)
+                if cancel is None:
+                    time.sleep(delay)
+                elif cancel.wait(delay):
+                    raise InfaPmrepCancelledError("cancelled while retrying: %s" % command[1])
+                attempt += 1
+
+    def __execute(self, command, column_separator, timeout=None, cancel=None, spill=None, on_line=None):
+        """
+        Execute a pmrep command, check its status and - if a column separator
+        is given - return the formatted output. With `spill` set, the output
+        is written to a temporary file and returned as a SpilledOutput. The
+        call is reported to all registered observers and tracked by the
+        watchdog.
+        """
+        stats = {}
+        result = None
+        status = 'failed'
+        options = {'timeout': timeout, 'cancel': cancel, 'env': self.env}
+        if on_line is not None:
+            options['on_line'] = infa3.helper.DataLines(on_line)
+        if spill and column_separator is not None:
+            fd, options['stdout'] = tempfile.mkstemp(
+                prefix='pmrep-', suffix='.out', dir=None if spill is True else spill)
+            os.close(fd)
+        started = time.time()
+        start_counter = time.perf_counter()
+        try:
+            if self.watchdog is None:
+                pmrep_output = self.executor(command, stats, **options)
+            else:
+                with self.watchdog.track(command):
+                    pmrep_output = self.executor(command, stats, **options)
+            if 'stdout' in options:
+                result = infa3.spill.SpilledOutput(options['stdout'], column_separator)
+                try:
+                    infa3.spill.check_status(command, result)
+                except InfaPmrepError:
+                    result.close()
+                    result = None
+                    raise
+            else:
+                infa3.helper.cmd_status(command, pmrep_output)
+                if column_separator is not None:
+                    result = infa3.helper.format_output(pmrep_output, column_separator)
+            status = 'ok'
+            return result
+        finally:
+            if result is None and 'stdout' in options and os.path.exists(options['stdout']):
+                os.remove(options['stdout'])
+            if self.observers:
+                try:
+                    event = infa3.instrument.CommandEvent(
+                        command=command[1],
+                        args=infa3.instrument.sanitize_command(command[2:], command[1]),
+                        started=started,
+                        wall_time=time.perf_counter() - start_counter,
+                        spawn_time=stats.get('spawn_time'),
+                        stdout_bytes=stats.get('stdout_bytes'),
+                        # spilled output is not counted: that would read the whole file
+                        rows=len(result) if isinstance(result, list) else None,
+                        returncode=stats.get('returncode'),
+                        status=status,
+                    )
+                except Exception:
+                    infa3.instrument.logger.exception('cannot report pmrep %s', command[1])
+                else:
+                    infa3.instrument.notify(self.observers, event)
+
+    def clone(self, cnx_file=None, **options):
+        """
+        Return a new, lazily connecting Pmrep instance with the same connect
+        parameters, observers, executor and policies. Pass a different
+        `cnx_file` to get a connection isolated from this instance.
 
-        command = [self.pmrep, 'assignintegrationservice']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def addtodeploymentgroup(self, **params):
+        Args:
+            cnx_file (Optional[str]): connection file of the clone
+            **options: constructor arguments overriding those of this
+                instance (e.g. timeout, cancel)
         """
-        Add objects to a deployment group.
+        kwargs = dict(
+            observers=self.observers, executor=self.executor, timeout=self.timeout, cancel=self.cancel,
+            watchdog=self.watchdog, retry=self.retry, lazy=True, cnx_file=cnx_file, session_ttl=self.session_ttl,
+        )
+        kwargs.update(options)
+        kwargs.update(self.connect_params)
+        return Pmrep(self.pmrep, **kwargs)
 
-        Args (all to be supplied as kwargs):
-            p (str): Required. Deployment group name.
-            n (str): Required if adding a specific object. Object name.
-            o (str): Required if adding a specific object. Object type.
-            t (str): Required when using valid subtypes. Object subtype.
-            v (str): Optional. Version number. Default is latest version.
-            f (str): Required if adding a specific object. Folder name.
-            i (str): Required if not using [n], [o] and [f]. Persistant
-                input file.
-            d (str): Optional. DBD Separator.
-
-            Refer to Informatica Command reference Handbook for details.
+    def applylabel_bulk(self, objects, label, workers=4, shard_size=infa3.bulk.SHARD_SIZE,
+                        progress=None, cancel=None, **params):
         """
-        opts_args = ['p', 'n', 'o', 't', 'v', 'f', 'i', 'd']
-        opts_flags = []
+        Apply a label to a large number of objects.
 
-        command = [self.pmrep, 'addtodeploymentgroup']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
+        The objects are written to persistent input files of `shard_size`
+        objects, which are labelled concurrently on `workers` isolated
+        connections. Failed shards are split until the failing objects are
+        identified.
 
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
+        Args:
+            objects (iterable): RepositoryObjects or (folder, name, type,
+                subtype, version, reusable) tuples, see infa3.bulk
+            label (str): label name
+            workers (int): number of concurrent pmrep connections
+            shard_size (int): number of objects per pmrep call
+            progress (Optional[callable]): called with the BulkReport after
+                each shard
+            cancel (Optional[threading.Event]): stops the operation once set
+            **params: further applylabel kwargs (e.g. m=True, c='comment')
 
-    def applylabel(self, **params):
+        Returns:
+            infa3.bulk.BulkReport
         """
-        Apply a label to an object or a set of objects in a folder.
+        with infa3.bulk.BulkRunner(self, workers, cancel=cancel, progress=progress) as runner:
+            def apply(pmrep, shard):
+                path = runner.input_file(shard)
+                try:
+                    pmrep.applylabel(a=label, i=path, **params)
+                finally:
+                    os.remove(path)
 
-        Args (all to be supplied as kwargs):
-            a (str): Required. Label name.
-            n (str): Required if adding a specific object. Object name.
-            o (str): Required if adding a specific object. Object type.
-            t (str): Required when using valid subtypes. Object subtype.
-            v (str): Optional. Version number. Default is latest version.
-            f (str): Optional. Folder name.
-            i (str): Required if not using [n], [o] and [f]. Persistant
-                input file.
-            d (str): Optional. Dependency object types.
-            p (str): Optional. Dependency direction.
-            s (bool): Optional. Include PK-FK depenency objects.
-            g (bool): Optional. Find dependencies across repositories.
-            m (bool): Optional. Move label to the latest version.
-            c (str): Optional. Comments.
-            e (str): Optional. DBD Separator.
+            return runner.run(apply, objects, shard_size)
 
-            Refer to Informatica Command reference Handbook for details.
+    def checkin_bulk(self, objects, comment=None, workers=4, batch_size=100, progress=None, cancel=None):
         """
-        opts_args = ['a', 'n', 'o', 't', 'v', 'f', 'i', 'd', 'p', 'c', 'e']
-        opts_flags = ['s', 'g', 'm']
+        Check in many objects, e.g. after a mass import.
 
-        command = [self.pmrep, 'applylabel']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
+        Objects which are not checked out by the connected user (according
+        to findcheckout) are skipped, so that the operation can safely be
+        repeated. The remaining objects are grouped by folder and type, and
+        every batch of up to `batch_size` objects is checked in by a single
+        pmrep process running a script file (see run), on `workers` isolated
+        connections. Failed batches are split until the failing objects are
+        identified.
 
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def assignpermission(self, **params):
-        """
-        Add, remove or update permissions on a global object for a user,
-        group, or the Others default group.
+        Args:
+            objects (iterable): RepositoryObjects or (folder, name, type,
+                subtype, ...) tuples, see infa3.bulk
+            comment (Optional[str]): check-in comment
+            workers (int): number of concurrent pmrep connections
+            batch_size (int): number of objects checked in by one pmrep call
+            progress (Optional[callable]): called with the BulkReport after
+                each batch
+            cancel (Optional[threading.Event]): stops the operation once set
 
-        Args (all to be supplied as kwargs):
-            o (str): Required. Object type.
-            t (str): Optional. Object subtype, relevant only for connection
-                object or query.
-            n (str): Required. Object name.
-            u (str): Required if [g] is not used. User name.
-            g (str): Required if [u] is not used. Group name.
-            s (str): Required only is LDAP authentication is in use. Security domain.
-                Default is Native.
-            p (str): Required. Permissions to be added, removed or updated.
-                Valid values are 'r', 'w', 'x' or a combination of those.
+        Returns:
+            infa3.bulk.BulkReport of RepositoryObject items
+        """
+        user = (self.connect_params.get('n') or '').lower()
+        checked_out = set((c.folder, c.type, c.name) for c in self.checkouts() if (c.user or '').lower() == user)
+        pending = []
+        skipped = []
+        for obj in map(infa3.bulk.as_object, objects):
+            (pending if (obj.folder, obj.type, obj.name) in checked_out else skipped).append(obj)
+
+        def checkin(pmrep, batch):
+            calls = []
+            for obj in batch:
+                params = {'o': obj.type, 'n': obj.name, 'f': obj.folder}
+                if obj.subtype and obj.subtype != 'none':
+                    params['t'] = obj.subtype
+                if comment is not None:
+                    params['c'] = comment
+                calls.append(params)
+            path = runner.script_file(COMMANDS['checkin'], calls)
+            try:
+                pmrep.run(f=path, s=True)
+            finally:
+                os.remove(path)
+
+        with infa3.bulk.BulkRunner(self, workers, cancel=cancel, progress=progress) as runner:
+            return runner.run(checkin, pending, batch_size, key=lambda obj: (obj.folder, obj.type),
+                              skipped=skipped)
+
+    def checkouts(self, users=None, older_than=None, **params):
+        """
+        Return the checked out objects of all users as Checkout records
+        (see infa3.commands), optionally filtered.
 
-            Refer to Informatica Command reference Handbook for details.
-        """
-        opts_args = ['o', 't', 'n', 'u', 'g', 's', 'p']
-        opts_flags = []
+        Args:
+            users (Optional[iterable[str]]): keep the checkouts of these users
+            older_than (Optional[float or datetime.timedelta]): keep the
+                checkouts made more than this many seconds ago
+            **params: further findcheckout kwargs (o, f)
 
-        command = [self.pmrep, 'assignpermission']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
+        Returns:
+            List of Checkout
+        """
+        params['u'] = True
+        records = [COMMANDS['findcheckout'].record(row) for row in self.findcheckout(**params)]
+        if users is not None:
+            users = set(users)
+            records = [r for r in records if r.user in users]
+        if older_than is not None:
+            if not isinstance(older_than, datetime.timedelta):
+                older_than = datetime.timedelta(seconds=older_than)
+            limit = datetime.datetime.now() - older_than
+            records = [r for r in records if (infa3.helper.parse_time(r.checked_out) or limit) < limit]
+        return records
+
+    def undocheckout_bulk(self, checkouts=None, users=None, older_than=None, workers=4,
+                          progress=None, cancel=None, **params):
+        """
+        Undo many checkouts concurrently, e.g. the stale checkouts of a
+        versioned repository.
 
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
+        Args:
+            checkouts (Optional[iterable[Checkout]]): checkouts to undo.
+                Default are all checkouts matching the filters, see
+                checkouts().
+            users (Optional[iterable[str]]): filter, see checkouts()
+            older_than (Optional[float or datetime.timedelta]): filter, see
+                checkouts()
+            workers (int): number of concurrent pmrep connections
+            progress (Optional[callable]): called with the BulkReport after
+                each undone checkout
+            cancel (Optional[threading.Event]): stops the operation once set
+            **params: findcheckout kwargs (o, f) selecting the checkouts
 
-    def backup(self, **params):
+        Returns:
+            infa3.bulk.BulkReport of Checkout items
         """
-        Backup the repository to the specified file.
+        if checkouts is None:
+            checkouts = self.checkouts(users=users, older_than=older_than, **params)
 
-        Args (all to be supplied as kwargs):
-            o (str): Required. Output file name.
-            d (str): Optional. Description.
-            f (bool): Optional. Overwrite existing output file. Default is False.
-            b (bool): Optional. Skip workflow and session logs. Default is False
-            j (bool): Optional. Skip deployment group history. Default is False.
-            q (bool): Optional. Skip MX data. Default is False.
-            v (bool): Optional. Skip task statistics. Default is False.
+        def undo(pmrep, shard):
+            for checkout in shard:
+                kwargs = {'o': checkout.type, 'n': checkout.name, 'f': checkout.folder}
+                if checkout.subtype and checkout.subtype != 'none':
+                    kwargs['t'] = checkout.subtype
+                pmrep.undocheckout(**kwargs)
 
-            Refer to Informatica Command reference Handbook for details.
+        with infa3.bulk.BulkRunner(self, workers, cancel=cancel, progress=progress) as runner:
+            return runner.run(undo, checkouts, shard_size=1)
+
+    def validate_bulk(self, objects=None, folders=None, object_types=infa3.bulk.VALIDATABLE_TYPES,
+                      save=False, checkin=False, comment=None, workers=4, shard_size=infa3.bulk.SHARD_SIZE,
+                      progress=None, cancel=None):
         """
-        opts_args = ['o', 'd']
-        opts_flags = ['f', 'b', 'j', 'q', 'v']
+        Validate many objects, e.g. a whole repository before a release.
 
-        command = [self.pmrep, 'backup']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
+        The objects of the given folders are listed with listobjects, then
+        validated in shards through persistent input files on `workers`
+        isolated connections. The invalid objects of every shard are read
+        from a persistent output file (-p invalid_after), and the output
+        lines mentioning an object are kept as its messages.
 
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
+        Args:
+            objects (Optional[iterable]): RepositoryObjects or (folder, name,
+                type, ...) tuples to validate
+            folders (Optional[iterable[str]]): folders whose objects of the
+                `object_types` are validated
+            object_types (iterable[str]): object types listed in the folders.
+                Objects of types pmrep does not validate are skipped.
+            save (bool): save the objects that turn valid (-s)
+            checkin (bool): check the saved objects in (-k, implies save)
+            comment (Optional[str]): check-in comment (-m)
+            workers (int): number of concurrent pmrep connections
+            shard_size (int): number of objects per pmrep call
+            progress (Optional[callable]): called with the BulkReport after
+                each shard
+            cancel (Optional[threading.Event]): stops the operation once set
 
-    def changeowner(self, **params):
-        """
-        Change the owner name for a global object.
+        Returns:
+            infa3.bulk.BulkReport, with one ValidationResult per object in
+            `results` (objects in failed shards are listed in `failed`)
+        """
+        params = {'p': 'invalid_after'}
+        if save or checkin:
+            params['s'] = True
+        if checkin:
+            params['k'] = True
+            if comment is not None:
+                params['m'] = comment
+
+        with infa3.bulk.BulkRunner(self, workers, cancel=cancel) as runner:
+            objects = [infa3.bulk.as_object(obj) for obj in objects or ()]
+            if folders:
+                def expand(pmrep, shard):
+                    return [infa3.bulk.RepositoryObject(folder, row[-1], row[0])
+                            for folder, object_type in shard
+                            for row in pmrep.listobjects(o=object_type, f=folder)
+                            if not isinstance(row, str)]
+
+                listing = runner.run(expand, [(f, t) for f in folders for t in object_types],
+                                     shard_size=1, isolate=False)
+                if listing.failed:
+                    raise listing.failed[0].error
+                for found in listing.results:
+                    objects.extend(found)
+
+            pending = [obj for obj in objects if obj.type in infa3.bulk.VALIDATABLE_TYPES]
+            skipped = [infa3.bulk.ValidationResult(obj, 'skipped', ())
+                       for obj in objects if obj.type not in infa3.bulk.VALIDATABLE_TYPES]
+
+            def validate(pmrep, shard):
+                path = runner.input_file(shard)
+                invalid_path = path + '.invalid'
+                try:
+                    output = pmrep.validate(i=path, u=invalid_path, **params)
+                    invalid = infa3.bulk.read_input_file(invalid_path) if os.path.exists(invalid_path) else []
+                finally:
+                    for name in (path, invalid_path):
+                        if os.path.exists(name):
+                            os.remove(name)
+                return infa3.bulk.validation_results(shard, invalid, output or [])
+
+            runner.progress = progress
+            report = runner.run(validate, pending, shard_size, skipped=[r.object for r in skipped])
+        report.results = [r for shard in report.results for r in shard] + skipped
+        return report
+
+    def massupdate_bulk(self, changes, workers=4, test=False, progress=None, cancel=None, **params):
+        """
+        Apply a table of session property values with as few massupdate
+        calls as possible (see infa3.massupdate.plan).
+
+        The folders are processed in parallel on `workers` isolated
+        connections; the calls of one folder run one after the other, in the
+        planned order. When a call fails, the calls of its folder are
+        repeated (massupdate is idempotent) until the failing calls are
+        identified.
 
-        Args (all to be supplied as kwargs):
-            o (str): Required. Object type. Valid values are 'folder', 'label',
-                'deploymentgroup', 'query' and 'connection'.
-            t (str): Optional. Object subtype, relevant only for connection
-                object or query.
-            n (str): Required. Object name.
-            u (str): Required. New owner name.
-            s (str): Required only is LDAP authentication is in use. Security domain.
-                Default is Native.
+        Args:
+            changes (iterable): PropertyChanges or (folder, session,
+                property_type, name, value) tuples; a None session changes
+                all sessions of the folder
+            workers (int): number of concurrent pmrep connections
+            test (bool): run massupdate in test mode (-b)
+            progress (Optional[callable]): called with the BulkReport after
+                each folder
+            cancel (Optional[threading.Event]): stops the operation once set
+            **params: further massupdate kwargs applied to every call (e.g.
+                g=True, t='Source Qualifier')
 
-            Refer to Informatica Command reference Handbook for details.
+        Returns:
+            infa3.bulk.BulkReport of PlannedCall items
         """
-        opts_args = ['o', 't', 'n', 'u', 's']
-        opts_flags = []
+        if test:
+            params['b'] = True
 
-        command = [self.pmrep, 'changeowner']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
+        def update(pmrep, calls):
+            for call in calls:
+                kwargs = dict(params, x=call.property_type, n=call.name, v=call.value)
+                if call.sessions is None:
+                    pmrep.massupdate(f=call.folder, **kwargs)
+                    continue
+                path = runner.input_file(infa3.massupdate.session_objects(call))
+                try:
+                    pmrep.massupdate(i=path, **kwargs)
+                finally:
+                    os.remove(path)
 
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
+        calls = infa3.massupdate.plan(changes)
+        with infa3.bulk.BulkRunner(self, workers, cancel=cancel, progress=progress) as runner:
+            return runner.run(update, calls, shard_size=len(calls) or 1, key=lambda call: call.folder)
 
-    def checkin(self, **params):
+    def updateseqgenvals_bulk(self, values, current=None, export=None, workers=4, progress=None, cancel=None):
         """
-        Check in an object that has been checked out.
+        Set the values of many Sequence Generator transformations, e.g. to
+        reset the current values after a data refresh.
 
-        Args (all to be supplied as kwargs):
-            o (str): Required. Object type.
-            t (str): Required for task or transformation type. Object subtype.
-            n (str): Required. Object name.
-            f (str): Required. Folder name.
-            c (str): Optional. Comments.
-            s (str): Optional. DBD separator. Relevant if ODBC source has a
-                period ('.') in its name.
+        Only the transformations whose values differ from the current ones
+        are updated; the others are reported as skipped. The current values
+        are taken from `current` or read (streaming) from an objectexport
+        XML file; without either, every transformation is updated.
 
-            Refer to Informatica Command reference Handbook for details.
+        Args:
+            values (iterable): desired SequenceValues or (folder, mapping,
+                name, current, start, end, increment) tuples, see
+                infa3.sequences. None values are left unchanged.
+            current (Optional[iterable]): current SequenceValues
+            export (Optional[str]): objectexport XML file holding the
+                current values
+            workers (int): number of concurrent pmrep connections
+            progress (Optional[callable]): called with the BulkReport after
+                each transformation
+            cancel (Optional[threading.Event]): stops the operation once set
+
+        Returns:
+            infa3.bulk.BulkReport of SequenceValue items
         """
-        opts_args = ['o', 't', 'n', 'f', 'c', 's']
-        opts_flags = []
+        values = [infa3.sequences.as_value(value) for value in values]
+        if export is not None:
+            current = infa3.sequences.read_export(export)
+        if current is not None:
+            values, skipped = infa3.sequences.changed(values, current)
+        else:
+            skipped = []
 
-        command = [self.pmrep, 'checkin']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
+        def update(pmrep, shard):
+            for value in shard:
+                pmrep.updateseqgenvals(**infa3.sequences.command_params(value))
 
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
+        with infa3.bulk.BulkRunner(self, workers, cancel=cancel, progress=progress) as runner:
+            return runner.run(update, values, shard_size=1, skipped=skipped)
 
     def cleanup(self):
         """
@@ -235,162 +579,10 @@ class Pmrep(object):
 
             Refer to Informatica Command reference Handbook for details.
         """
-        command = [self.pmrep, 'cleanup']
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def cleardeploymentgroup(self, **params):
-        """
-        Clear all objects from a deployment group while retaining the
-        group itself.
-
-        Args (all to be supplied as kwargs):
-            p (str): Required. Deployment group name.
-
-            Refer to Informatica Command reference Handbook for details.
-
-        Note:
-            The [-f] flag (force) is automatically submitted to avoid user
-            interaction.
-        """
-        opts_args = ['p']
-        opts_flags = []
-
-        command = [self.pmrep, 'cleardeploymentgroup', '-f']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def create(self, **params):
-        """
-        Creates the repository tables in the database.
-
-        Note:
-            Requires the repository to be running in exclusive mode.
-
-        Args (all to be supplied as kwargs):
-            u (str): Required. Domain user name.
-            s (str): Required only is LDAP authentication is in use. Security domain.
-                Default is Native.
-            p (str): Required. Domain password.
-            g (bool): Optional. Promote repository to global repository.
-                Default is False.
-            v (bool): Optional. Enable version control. Default is False.
-
-            Refer to Informatica Command reference Handbook for details.
-        """
-        opts_args = ['u', 's', 'p']
-        opts_flags = ['g', 'v']
-
-        command = [self.pmrep, 'create']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def createconnection(self, **params):
-        """
-        Create a source or target connection in the repository.
-
-        Args (all to be supplied as kwargs):
-            s (str): Required. Connection type.
-            n (str): Required. Connection name.
-            u (str): Required for some connection types. User name.
-            p (str): Required for some connection types. Password.
-            P (str): Optional. Password environment variable.
-            K (str): Optional. Connection to the Kerberos server.
-            c (str): Required. Connect string.
-            l (str): Required for some connection types. Code page.
-            r (str): Optional for Oracle connections. Rollback segment.
-            e (str): Optional. Connection environment SQL.
-            f (str): Optional. Transaction environment SQL.
-            z (str): Optional for Sybase ASE and MSSQL. Packet size.
-            b (str): Optional for Sybase ASE and MSSQL. Database name.
-            v (str): Optional for Sybase ASE and MSSQL. Database name.
-            d (str): Optional for MSSQL. Domain name.
-            t (bool): Optional for MSSQL. Integration Service uses Windows
-                authentication to access MSSQL database.
-            a (str): Optional for Teradata. ODBC data source name.
-            x (bool): Optional. Enable enhanced security.
-            k (str): Optional. Enable user defined connection attributes.
-
-            Refer to Informatica Command reference Handbook for details.
-        """
-        opts_args = ['s', 'n', 'u', 'p', 'P', 'K', 'c', 'l',
-                     'r', 'e', 'f', 'z', 'b', 'v', 'd', 'a', 'k']
-        opts_flags = ['t', 'x']
-
-        command = [self.pmrep, 'createconnection']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def createdeploymentgroup(self, **params):
-        """
-        Create a static or dynamic deployment group.
-
-        Args (all to be supplied as kwargs):
-            p (str): Required. Deployment group name.
-            t (str): Optional. Deployment group type ('static' or 'dynamic').
-                Default is static.
-            q (str): Required if the deployment groupy is dynamic. Query name.
-            u (str): Required if the deployment groupy is dynamic. Valid values
-                are 'shared' or 'personal'.
-            c (str): Optional. Comments
-        """
-        opts_args = ['p', 't', 'q', 'u', 'c']
-        opts_flags = []
-
-        command = [self.pmrep, 'createdeploymentgroup']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def createfolder(self, **params):
-        """
-        Create a folder in the repository.
-
-        Args (all to be supplied as kwargs):
-            n (str): folder name
-            d (Optional[str]): folder description
-            o (Optional[str]): owner name. Default is user creating the folder
-            a (Optional[str]): owner security domain. Required for LDAP owners.
-                Default is Native.
-            s (Optional[bool]): shared folder. Default False
-            p (Optional[str]): permissions (unix style octal). By default the
-                the Repository Service assigns permissions.
-            f (Optional[str]): folder status
-        """
-        opts_args = ['n', 'd', 'o', 'a', 'p', 'f']
-        opts_flags = ['s']
-
-        command = [self.pmrep, 'createfolder']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def createlabel(self, **params):
-        """
-        Create a label that can be used to associate groups of objects during
-        development.
-
-        Args (all to be supplied as kwargs):
-            a (str): name of label to be created in the repository
-            c (Optional[str]): comment about the label
-        """
-        opts_args = ['a', 'c']
-        opts_flags = []
-
-        command = [self.pmrep, 'createlabel']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
+        if not self.connected:
+            return
+        self._run_command(COMMANDS['cleanup'], {})
+        self.connected = False
 
     def delete(self):
         """
@@ -399,22 +591,6 @@ class Pmrep(object):
         command = [self.pmrep, 'delete']
         pass
 
-    def deleteconnection(self, **params):
-        """
-        Delete a relational connection from the repository.
-
-        Args (all to be supplied as kwargs):
-            n (str): connection name
-            s (Optional[str]): connection type application, relational, ftp, loader or queue
-
-        """
-        opts_args = ['n', 's']
-        opts_flags = []
-        command = [self.pmrep, 'deleteconnection', '-f']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
     def deletedeploymentgroup(self):
         """
         Delete a deployment group.
@@ -422,40 +598,6 @@ class Pmrep(object):
         command = [self.pmrep, 'deletedeploymentgroup']
         pass
 
-    def deletefolder(self, **params):
-        """
-        Delete a folder from the repository.
-
-        Args (all to be supplied as kwargs):
-            n (str): folder name
-        """
-        opts_args = ['n']
-        opts_flags = []
-
-        command = [self.pmrep, 'deletefolder']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def deletelabel(self, **params):
-        """
-        Delete a label and remove the label from all objects that use it.
-
-        This method by default uses the '-f' pmrep flag to avoid user
-        interaction.
-
-        Args (all to be supplied as kwargs):
-            a (str): name of the label to be deleted in the repository
-        """
-        opts_args = ['a']
-        opts_flags = []
-        command = [self.pmrep, 'deletelabel', '-f']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
     def deleteobject(self):
         """
         Delete an object.
@@ -463,153 +605,67 @@ class Pmrep(object):
         command = [self.pmrep, 'deleteobject']
         pass
 
-    def deploydeploymentgroup(self):
-        """
-        Deploy a deployment group.
-        """
-        command = [self.pmrep, 'deploydeploymentgroup']
-        pass
-
-    def deployfolder(self):
-        """
-        Deploy a folder.
-        """
-        command = [self.pmrep, 'deployfolder']
-        pass
-
-    def executequery(self):
-        """
-        Run a repository query.
-        """
-        command = [self.pmrep, 'executequery']
-        pass
-
-    def findcheckout(self):
-        """
-        Display a list of checked out objects in the repository.
-        """
-        command = [self.pmrep, 'findcheckout']
-        pass
-
-    def getconnectiondetails(self):
-        """
-        List the properties and attributes of a connection object as name-value pairs.
+    def deployfolder(self, new_name=None, replace=None, comment=None, **params):
         """
-        command = [self.pmrep, 'getconnectiondetails']
-        pass
+        Deploy (copy) a folder to a target repository.
 
-    def listconnections(self):
-        """
-        List all connection objects in the repository and their respective connection types.
+        A deployment control file is generated unless supplied in [c].
 
         Args:
-            None
-        """
-        column_separator = ','
-        command = [self.pmrep, 'listconnections', '-t']
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-        return infa3.helper.format_output(pmrep_output, column_separator)
-
-    def listobjectdependencies(self, **params):
-        """
-        List dependency objects for reusable and non-reusable objects.
-        """
-        col_sep = '<=#CS#=>'
-        return self.__default_io_command(['listobjectdependencies', '-c', col_sep], ['n', 'o', 't', 'v', 'f', 'i', 'd', 'p', 'u', 'r', 'l', 'b', 'e'], ['s', 'g', 'a'], params, col_sep)
-
-    def listobjects(self, **params):
-        """
-        Return a list of objects in the repository.
-
-        Args (all to be supplied as kwargs):
-            o (str): object type
-            t (str): object subtype
-            f (str): folder name
-            r (str): end-of-record separatr
-            l (str): end-of-listing separator
-            s (str): dbd separator
+            new_name (Optional[str]): name of the folder in the target
+                repository, used with the generated control file
+            replace (Optional[str]): target folder to be replaced, used with
+                the generated control file
+            comment (Optional[str]): check-in comment, used with the
+                generated control file
+            f (str): Required. Folder name.
+            c (str): Optional. Deployment control file name.
+            r (str): Required. Target repository name.
+            n (str): Optional. Target repository user name.
+            s (str): Optional. Target repository user security domain.
+            x (str): Optional. Target repository password.
+            X (str): Optional. Target repository password environment
+                variable.
+            d (str): Optional. Target domain name.
+            h (str): Optional. Target gateway host name.
+            o (str): Optional. Target gateway port number.
+            l (str): Optional. Log file name.
 
             Refer to Informatica Command reference Handbook for details.
 
-        Returns:
-            List of Lists
-        """
-        opts_args = ['o', 't', 'f', 'r', 'l', 's']
-        opts_flags = []
-
-        column_separator = '<=#CS#=>'
-        command = [self.pmrep, 'listobjects', '-c', column_separator]
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-        return infa3.helper.format_output(pmrep_output, column_separator)
-
-    def listtablesbysess(self, **params):
-        """
-        Return a list of sources or targets used in a session.
-
-        Args (all to be supplied as kwargs):
-            f (str): folder name
-            s (str): session name (non-reusable must include workflow name)
-            t (str): object type listed ('session' or 'target')
-
         Note:
-            If a mapping contains a mapplet, its name will also be returned as
-            the first element of a list holding the session's name.
+            See infa3.scheduler.deploy_folders for deploying many folders.
+        """
+        if 'c' in params:
+            return self._run_command(COMMANDS['deployfolder'], params)
+        fd, control_file = tempfile.mkstemp(prefix='depcntl-', suffix='.xml')
+        os.close(fd)
+        try:
+            infa3.helper.create_deploy_control_xml(
+                control_file, dtd=os.path.join(os.path.dirname(self.pmrep), 'depcntl.dtd'),
+                new_folder=new_name, replace_folder=replace, comment=comment)
+            params['c'] = control_file
+            return self._run_command(COMMANDS['deployfolder'], params)
+        finally:
+            os.remove(control_file)
+
+    def getconnectiondetails(self, **params):
         """
-        opts_args = ['f', 's', 't']
-        opts_flags = []
-
-        column_separator = '.'
-        command = [self.pmrep, 'listtablesbysess']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-        return infa3.helper.format_output(pmrep_output, column_separator)
+        List the properties and attributes of a connection object as name-value pairs.
 
-    def killuserconnection(self, **params):
-        """
-        Terminates user connections to the repository.
-                use connection ID or user name
         Args (all to be supplied as kwargs):
-            i (str): Repository connection ID.
-            n (str): User name.
-            a (Optional[str]): Terminates all connections.
-
-        Note:
-            You can terminate user connections based on the user name or connection ID.
-            You can also terminate all user connections to the repository.
-        """
-        opts_args = ['i', 'n', 'a']
-        opts_flags = []
-
-        command = [self.pmrep, 'killuserconnection']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
+            n (str): Required. Connection name.
+            t (str): Required. Connection type: relational, ftp, loader,
+                queue or application.
 
-    def listuserconnections(self):
-        """
-        List information for each user connected to the repository.
-        use Domain connection for executed (d) not h+o
-        """
-        command = [self.pmrep, 'listuserconnections']
-        column_separator = ','
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-        return infa3.helper.format_output(pmrep_output, column_separator)
+            Refer to Informatica Command reference Handbook for details.
 
-    def massupdate(self):
-        """
-        Update session properties for a set of sessions that meet specified conditions.
+        Returns:
+            OrderedDict of attribute name to value, as printed by pmrep
+            (see infa3.connections for a cached store of all connections)
         """
-        command = [self.pmrep, 'massupdate']
-        pass
+        output = self._run_command(COMMANDS['getconnectiondetails'], params)
+        return infa3.helper.parse_name_values(output)
 
     def modifyfolder(self):
         """
@@ -618,27 +674,6 @@ class Pmrep(object):
         command = [self.pmrep, 'modifyfolder']
         pass
 
-    def notify(self, **params):
-        """
-        Sends notification messages to users connected to a repository or users connected
-        to all repositories managed by a Repository Service.
-        """
-        command = [self.pmrep, 'notify']
-        opts_args = ['m']
-        opts_flags = []
-
-        command = [self.pmrep, 'notify']
-        command.extend(infa3.helper.cmd_prepare(params, opts_args, opts_flags))
-
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
-    def objectexport(self, **params):
-        """
-        Exports objects to an XML file defined by the powrmart.dtd file.
-        """
-        return self.__default_io_command('objectexport', ['n', 'o', 't', 'v', 'f', 'i', 'u', 'l', 'e'], ['m', 's', 'b', 'r'], params)
-
     def objectimport(self, src_folder, src_repo, tgt_folder, tgt_repo, encode=None, **params):
         """
         Imports objects from an XML file.
@@ -656,7 +691,7 @@ class Pmrep(object):
                                                    dtd=os.path.join(os.path.dirname(self.pmrep), 'impcntl.dtd'), encode=encode)
             params['c'] = 'impcntl.xml'
 
-        return self.__default_io_command('objectimport', ['i', 'c', 'l'], ['p'], params)
+        return self._run_command(COMMANDS['objectimport'], params)
 
     def purgeversion(self):
         """
@@ -679,13 +714,6 @@ class Pmrep(object):
         command = [self.pmrep, 'registerplugin']
         pass
 
-    def restore(self):
-        """
-        Restore a repository backup file to a database.
-        """
-        command = [self.pmrep, 'restore']
-        pass
-
     def rollbackdeployment(self):
         """
         Roll back a deployment to purge deployed versions of objects from the target repository.
@@ -693,13 +721,6 @@ class Pmrep(object):
         command = [self.pmrep, 'rollbackdeployment']
         pass
 
-    def run(self):
-        """
-        Open a script file containing multiple pmrep commands, read each command, and run them.
-        """
-        command = [self.pmrep, 'run']
-        pass
-
     def showconnectioninfo(self):
         """
         Return the repository name and user information for the current connection.
@@ -721,13 +742,6 @@ class Pmrep(object):
         command = [self.pmrep, 'truncatelog']
         pass
 
-    def undocheckout(self):
-        """
-        Reverses the checkout of an object.
-        """
-        command = [self.pmrep, 'undocheckout']
-        pass
-
     def unregister(self):
         """
         Unregisters a local repository from a connected global repository.
@@ -742,13 +756,6 @@ class Pmrep(object):
         command = [self.pmrep, 'unregisterplugin']
         pass
 
-    def updateconnection(self):
-        """
-        Updates the user name, password, connect string, and attributes for a database connection.
-        """
-        command = [self.pmrep, 'updateconnection']
-        pass
-
     def updateemailaddr(self):
         """
         Updates the session notification email addresses associated with the Email tasks
@@ -757,17 +764,6 @@ class Pmrep(object):
         command = [self.pmrep, 'updateemailaddr']
         pass
 
-    def updateseqgenvals(self):
-        """
-        Updates one or more of the following properties for the specified Sequence Generator transformation:
-         - Start Value
-         - End Value
-         - Increment By
-         - Current Value
-        """
-        command = [self.pmrep, 'updateseqgenvals']
-        pass
-
     def updatesrcprefix(self):
         """
         Updates the owner name for session source tables.
@@ -775,17 +771,6 @@ class Pmrep(object):
         command = [self.pmrep, 'updatesrcprefix']
         pass
 
-    def updatestatistics(self):
-        """
-        Update statistics for repository tables and indexes.
-
-        Args:
-            None
-        """
-        command = [self.pmrep, 'updatestatistics']
-        pmrep_output = infa3.helper.cmd_execute(command)
-        infa3.helper.cmd_status(command, pmrep_output)
-
     def updatetargprefix(self):
         """
         Update the table name prefix for session target tables.
@@ -807,15 +792,22 @@ class Pmrep(object):
         command = [self.pmrep, 'uninstallabapprogram']
         pass
 
-    def validate(self, **params):
-        """
-        Validates objects.
-        """
-        return self.__default_io_command('validate', ['n', 'o', 'v', 'f', 'i', 'm', 'p', 'u'], ['s', 'k', 'a', 'b'], params)
-
     def version(self):
         """
         Displays the PowerCenter version and Informatica trademark and copyright information.
         """
         command = [self.pmrep, 'version']
         pass
+
+
+def _command_method(spec):
+    def method(self, **params):
+        return self._run_command(spec, params)
+    method.__name__ = method.__qualname__ = spec.name
+    method.__doc__ = spec.doc
+    return method
+
+
+for _spec in COMMANDS.values():
+    if not hasattr(Pmrep, _spec.name):
+        setattr(Pmrep, _spec.name, _command_method(_spec))
@@ -0,0 +1,180 @@
+"""
+This module contains a pool of worker processes, each holding its own
+Pmrep instance, connected by the first call of the worker.
+
+Output parsing happens in the workers, which return compact records (tuples
+or whatever the `record` callable builds) to the parent process. This
+spreads the CPU-heavy part of large jobs (format_output on millions of
+lines) over all cores, in addition to running pmrep processes in parallel.
+
+    with PmrepPool('/opt/informatica/server/bin/pmrep', processes=8,
+                   r='Repository_Name', h='localhost', o='6005', n='admin', x='secret') as pool:
+        results = pool.map('listobjectdependencies', [
+            {'n': name, 'o': 'mapping', 'f': 'Demo', 'p': 'both'} for name in mappings
+        ])
+"""
+import multiprocessing
+import multiprocessing.util
+import os
+import shutil
+import tempfile
+
+from infa3.commands import COMMANDS
+from infa3.exceptions import InfaPmrepError
+from infa3.pmrep import Pmrep
+
+# Pmrep instance of the current worker process
+_worker_pmrep = None
+# error raised creating it, raised again by every task of the worker
+_worker_error = None
+
+
+def _init_worker(pmrep, workdir, cancel, params):
+    # a failing initializer makes the pool respawn the worker forever, so
+    # the connection is made by the first task and errors are kept for the
+    # tasks to raise
+    global _worker_pmrep, _worker_error
+    cnx_file = os.path.join(workdir, 'worker-%d.cnx' % os.getpid())
+    try:
+        _worker_pmrep = Pmrep(pmrep, cnx_file=cnx_file, cancel=cancel, **dict(params, lazy=True))
+    except Exception as e:
+        _worker_error = e
+        return
+    multiprocessing.util.Finalize(_worker_pmrep, _cleanup_worker, exitpriority=10)
+
+
+def _cleanup_worker():
+    if not _worker_pmrep.connected:
+        return
+    try:
+        _worker_pmrep.cleanup()
+    except InfaPmrepError:
+        pass  # cancelled or connection already gone
+
+
+def compact(row):
+    """
+    Default record builder: turn a formatted output row into a tuple
+    (single column rows are returned as they are).
+    """
+    return tuple(row) if isinstance(row, list) else row
+
+
+def _run(task):
+    command, params, record, return_exceptions = task
+    if record is None:
+        spec = COMMANDS.get(command)
+        record = spec.record if spec is not None and spec.record is not None else compact
+    try:
+        if _worker_error is not None:
+            raise _worker_error
+        result = getattr(_worker_pmrep, command)(**params)
+    except Exception as e:
+        if return_exceptions:
+            return e
+        raise
+    if not isinstance(result, list):
+        return result
+    return [record(row) for row in result]
+
+
+class PmrepPool(object):
+    """
+    Pool of worker processes with isolated Pmrep instances.
+
+    Every worker keeps its pmrep connection in a separate connection file,
+    so the workers do not interfere with each other or with Pmrep instances
+    of the parent process.
+
+    Args:
+        pmrep (str): path to the pmrep binary
+        processes (Optional[int]): number of workers. Default is the number
+            of CPUs.
+        workdir (Optional[str]): directory for the connection files of the
+            workers. Default is a temporary directory removed on close().
+        context (Optional[str]): multiprocessing start method
+        **params: pmrep connect parameters and Pmrep options (timeout,
+            retry, observers, ...) used by every worker
+    """
+
+    def __init__(self, pmrep, processes=None, workdir=None, context=None, **params):
+        ctx = multiprocessing.get_context(context)
+        self._own_workdir = workdir is None
+        self.workdir = workdir or tempfile.mkdtemp(prefix='infa3-pool-')
+        self.cancel_event = ctx.Event()
+        self._pool = ctx.Pool(
+            processes,
+            initializer=_init_worker,
+            initargs=(pmrep, self.workdir, self.cancel_event, params),
+        )
+
+    def _tasks(self, command, params_list, record, return_exceptions):
+        for params in params_list:
+            yield command, params, record, return_exceptions
+
+    def map(self, command, params_list, record=None, return_exceptions=False, chunksize=1):
+        """
+        Run a Pmrep method once for every set of parameters.
+
+        Args:
+            command (str): Pmrep method name, e.g. 'listobjects'
+            params_list (iterable[dict]): kwargs of the individual calls
+            record (Optional[callable]): builds the record returned for
+                each output row, called in the worker. Must be picklable.
+                Default is the record type of the command specification
+                (see infa3.commands), or compact().
+            return_exceptions (bool): return the exception of a failed
+                call in place of its result instead of raising it
+            chunksize (int): number of calls sent to a worker at once
+
+        Returns:
+            List of results (lists of records, or None for commands
+            without output), in the order of params_list
+        """
+        return self._pool.map(
+            _run, self._tasks(command, params_list, record, return_exceptions), chunksize)
+
+    def imap_unordered(self, command, params_list, record=None, return_exceptions=False, chunksize=1):
+        """
+        Same as map(), but yield the results as soon as they are ready,
+        in any order. Use return_exceptions and parameters passed back in
+        the records to match results with calls.
+        """
+        return self._pool.imap_unordered(
+            _run, self._tasks(command, params_list, record, return_exceptions), chunksize)
+
+    def cancel(self):
+        """
+        Cooperatively cancel the work: running pmrep commands are killed and
+        the remaining calls fail with InfaPmrepCancelledError.
+        """
+        self.cancel_event.set()
+
+    def close(self):
+        """
+        Wait for the submitted work, clean up the worker connections and
+        stop the workers.
+        """
+        self._pool.close()
+        self._pool.join()
+        if self._own_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def terminate(self):
+        """
+        Stop the workers immediately.
+        """
+        self.cancel()
+        self._pool.terminate()
+        self._pool.join()
+        if self._own_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
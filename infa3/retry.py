@@ -0,0 +1,59 @@
+"""
+This module contains the retry policy for transient pmrep failures.
+"""
+import random
+
+from infa3.exceptions import InfaPmrepConnectionError, InfaPmrepLockError
+
+
+class RetryPolicy(object):
+    """
+    Decide whether and when a failed pmrep command is retried.
+
+    The delay before retry n (counting from 0) is drawn uniformly from
+    [(1 - jitter) * d, d], where d = min(backoff * 2 ** n, max_backoff).
+
+    Args:
+        attempts (int): maximum number of executions of a command,
+            including the first one. Default is 3.
+        backoff (float): base delay in seconds. Default is 1.
+        max_backoff (float): upper limit of the delay. Default is 30.
+        jitter (float): fraction of the delay that is randomized,
+            between 0 and 1. Default is 1 (full jitter).
+        retry_on (tuple): error classes which are retried. Default are
+            connection and lock errors.
+        reconnect_on (tuple): error classes after which the connection is
+            re-established (using the stored connect parameters) before the
+            next attempt. Default are connection errors.
+    """
+
+    def __init__(self, attempts=3, backoff=1.0, max_backoff=30.0, jitter=1.0,
+                 retry_on=(InfaPmrepConnectionError, InfaPmrepLockError),
+                 reconnect_on=(InfaPmrepConnectionError,)):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_on = tuple(retry_on)
+        self.reconnect_on = tuple(reconnect_on)
+
+    def should_retry(self, error, attempt):
+        """
+        Args:
+            error (Exception): error raised by the attempt
+            attempt (int): number of the failed attempt, counting from 0
+
+        Returns:
+            Bool
+        """
+        return attempt + 1 < self.attempts and isinstance(error, self.retry_on)
+
+    def should_reconnect(self, error):
+        return isinstance(error, self.reconnect_on)
+
+    def delay(self, attempt):
+        """
+        Return the number of seconds to wait after the given failed attempt.
+        """
+        delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+        return delay - random.uniform(0, self.jitter * delay)
@@ -0,0 +1,307 @@
+"""
+This module contains the folder lock scheduler for imports and deployments.
+
+pmrep locks the target folders of objectimport, deployfolder and
+deploydeploymentgroup, so concurrent operations into the same folder fail
+with lock conflicts, while operations into different folders can run side
+by side. The FolderScheduler reads the target folders of every operation
+from its control file, runs the operations concurrently on isolated
+connections and serializes only those sharing a target folder, in the order
+they were added.
+
+    scheduler = FolderScheduler(p, workers=6)
+    for xml in exports:
+        scheduler.add_import(xml, control_file='impcntl_%s.xml' % name)
+    scheduler.add_deploydeploymentgroup('DG_RELEASE_42', 'depcntl.xml', r='REP_PROD')
+    for result in scheduler.run():
+        print(result.name, result.status, result.elapsed)
+
+deploy_folders() copies many folders between repositories this way.
+"""
+import collections
+import functools
+import os
+import shutil
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+
+from infa3.exceptions import InfaPmrepError
+
+ScheduledResult = collections.namedtuple('ScheduledResult', [
+    'name',     # operation name
+    'folders',  # frozenset of (repository, folder) locks held by the operation
+    'status',   # 'ok', 'failed' or 'cancelled'
+    'result',   # value returned by the operation, or the error raised
+    'waited',   # seconds spent waiting for locks and workers
+    'elapsed',  # seconds spent running
+])
+
+# folder lock of operations with unknown target folders: conflicts with
+# every operation on the same repository
+ALL_FOLDERS = None
+
+
+def control_file_folders(path, repository=None, source_folder=None):
+    """
+    Return the target folders of an import or deployment control file.
+
+    Import control files map folders with FOLDERMAP elements, deployment
+    control files with OVERRIDEFOLDER elements and DEPLOYFOLDER, deploying
+    into its REPLACEFOLDER, its NEWFOLDERNAME or a folder of the same name
+    (`source_folder`).
+
+    Args:
+        path (str): control file
+        repository (Optional[str]): target repository of elements without
+            a TARGETREPOSITORYNAME
+        source_folder (Optional[str]): folder deployed by deployfolder
+
+    Returns:
+        Set of (repository, folder) tuples
+    """
+    folders = set()
+    for element in ElementTree.parse(path).iter():
+        if element.tag in ('FOLDERMAP', 'OVERRIDEFOLDER'):
+            folders.add((element.get('TARGETREPOSITORYNAME') or repository, element.get('TARGETFOLDERNAME')))
+        elif element.tag == 'DEPLOYFOLDER':
+            replace = element.find('REPLACEFOLDER')
+            name = (replace.get('FOLDERNAME') if replace is not None else None) \
+                or element.get('NEWFOLDERNAME') or source_folder
+            if name:
+                folders.add((repository, name))
+    return folders
+
+
+def conflicts(locks, held):
+    """
+    Check whether any of the (repository, folder) locks is held already.
+    """
+    for repository, folder in locks:
+        if (repository, folder) in held or (repository, ALL_FOLDERS) in held:
+            return True
+        if folder is ALL_FOLDERS and any(r == repository for r, _ in held):
+            return True
+    return False
+
+
+class FolderScheduler(object):
+    """
+    Run operations concurrently, serializing those with common target
+    folders.
+
+    Args:
+        pmrep (Pmrep): instance the worker connections are cloned from
+        workers (int): maximum number of concurrent operations
+        cancel (Optional[threading.Event]): once set, running pmrep commands
+            are killed and the waiting operations are not started
+        progress (Optional[callable]): called with every ScheduledResult
+    """
+
+    def __init__(self, pmrep, workers=4, cancel=None, progress=None):
+        self.pmrep = pmrep
+        self.workers = workers
+        self.cancel = cancel or pmrep.cancel or threading.Event()
+        self.progress = progress
+        self._operations = []
+
+    @property
+    def repository(self):
+        return self.pmrep.connect_params.get('r')
+
+    def add(self, folders, operation, name=None):
+        """
+        Add an operation.
+
+        Args:
+            folders (iterable): target folders, as (repository, folder)
+                tuples or folder names of this repository. A folder of None
+                (ALL_FOLDERS) locks the whole repository.
+            operation (callable): called with the Pmrep connection of a
+                worker; its return value is the result of the operation
+            name (Optional[str]): name used in the results
+        """
+        locks = frozenset(f if isinstance(f, tuple) else (self.repository, f) for f in folders)
+        if not locks:
+            locks = frozenset([(self.repository, ALL_FOLDERS)])
+        self._operations.append((name or 'operation-%d' % len(self._operations), locks, operation))
+
+    def add_import(self, input_file, control_file, folders=None, name=None, **params):
+        """
+        Add an objectimport of an export file. The target folders are read
+        from the control file unless given.
+        """
+        if folders is None:
+            folders = control_file_folders(control_file, self.repository)
+
+        def run(pmrep):
+            return pmrep.objectimport(None, None, None, None, i=input_file, c=control_file, **params)
+
+        self.add(folders, run, name or input_file)
+
+    def add_deployfolder(self, folder, control_file=None, folders=None, name=None, on_line=None, **params):
+        """
+        Add a deployfolder. Its target folder is read from the control file,
+        or - for generated control files - is the folder given in `replace`
+        or `new_name`, or a folder of the same name.
+
+        Args:
+            folder (str): source folder name
+            control_file (Optional[str]): deployment control file
+            folders (Optional[iterable]): target folders
+            on_line (Optional[callable]): called with every output line of
+                the deployment while it runs
+            **params: further deployfolder kwargs (r, n, x, new_name, ...)
+        """
+        repository = params.get('r')
+        if folders is None and control_file is not None:
+            folders = control_file_folders(control_file, repository, folder)
+        if folders is None:
+            folders = [(repository, params.get('replace') or params.get('new_name') or folder)]
+        if control_file is not None:
+            params['c'] = control_file
+        if on_line is not None:
+            params['on_line'] = on_line
+
+        def run(pmrep):
+            return pmrep.deployfolder(f=folder, **params)
+
+        self.add(folders, run, name or folder)
+
+    def add_deploydeploymentgroup(self, group, control_file, folders=None, name=None, **params):
+        """
+        Add a deploydeploymentgroup. Its target folders are those overridden
+        in the control file unless given (the folders of the group objects
+        are not known otherwise); without any, the deployment locks the
+        whole target repository.
+
+        Args:
+            group (str): deployment group name
+            control_file (str): deployment control file
+            folders (Optional[iterable]): target folders
+            **params: further deploydeploymentgroup kwargs (r, n, x, ...)
+        """
+        if folders is None:
+            folders = control_file_folders(control_file, params.get('r'))
+            if not folders:
+                folders = [(params.get('r'), ALL_FOLDERS)]
+
+        def run(pmrep):
+            return pmrep.deploydeploymentgroup(p=group, c=control_file, **params)
+
+        self.add(folders, run, name or group)
+
+    def run(self):
+        """
+        Run all added operations.
+
+        Operations start in the order they were added, as soon as a worker
+        is free and none of their target folders is locked by a running
+        operation; an operation never overtakes an earlier waiting
+        operation it conflicts with.
+
+        Returns:
+            List of ScheduledResult, in the order the operations were added
+        """
+        operations, self._operations = self._operations, []
+        results = [None] * len(operations)
+        waiting = list(range(len(operations)))
+        held = set()
+        condition = threading.Condition()
+        clones = []
+        workdir = tempfile.mkdtemp(prefix='infa3-scheduler-')
+        start = time.perf_counter()
+
+        def next_operation():
+            blocked = set()
+            for i in waiting:
+                locks = operations[i][1]
+                if not conflicts(locks, held) and not conflicts(locks, blocked):
+                    return i
+                blocked.update(locks)
+            return None
+
+        def worker(number):
+            pmrep = self.pmrep.clone(cnx_file=os.path.join(workdir, 'worker-%d.cnx' % number), cancel=self.cancel)
+            clones.append(pmrep)
+            while True:
+                with condition:
+                    while True:
+                        if not waiting:
+                            return
+                        if self.cancel.is_set():
+                            for i in waiting:
+                                name, locks, _ = operations[i]
+                                results[i] = ScheduledResult(name, locks, 'cancelled', None,
+                                                             time.perf_counter() - start, 0.0)
+                            del waiting[:]
+                            condition.notify_all()
+                            return
+                        i = next_operation()
+                        if i is not None:
+                            break
+                        condition.wait(0.5)
+                    waiting.remove(i)
+                    name, locks, operation = operations[i]
+                    held.update(locks)
+                started = time.perf_counter()
+                result = None
+                try:
+                    result = ScheduledResult(name, locks, 'ok', operation(pmrep),
+                                             started - start, time.perf_counter() - started)
+                except Exception as e:
+                    # any error fails just this operation (e.g. an unsupported
+                    # option or an unwritable control file)
+                    result = ScheduledResult(name, locks, 'failed', e,
+                                             started - start, time.perf_counter() - started)
+                finally:
+                    with condition:
+                        held.difference_update(locks)
+                        results[i] = result
+                        condition.notify_all()
+                if self.progress is not None:
+                    self.progress(result)
+
+        try:
+            with ThreadPoolExecutor(self.workers) as executor:
+                futures = [executor.submit(worker, n) for n in range(min(self.workers, len(operations)))]
+            for future in futures:
+                future.result()
+        finally:
+            for pmrep in clones:
+                try:
+                    pmrep.cleanup()
+                except InfaPmrepError:
+                    pass
+            shutil.rmtree(workdir, ignore_errors=True)
+        return results
+
+
+def deploy_folders(pmrep, folders, workers=4, progress=None, on_line=None, cancel=None, **params):
+    """
+    Copy many folders to a target repository concurrently.
+
+    Args:
+        pmrep (Pmrep): source repository
+        folders (iterable[str]): folders to deploy
+        workers (int): maximum number of concurrent deployments
+        progress (Optional[callable]): called with the ScheduledResult of
+            every deployed folder
+        on_line (Optional[callable]): called with (folder, line) for every
+            output line of the deployments, while they run
+        cancel (Optional[threading.Event]): stops the deployments once set
+        **params: deployfolder kwargs used for every folder (r, n, x, ...)
+
+    Returns:
+        List of ScheduledResult (one per folder, with its status and
+        duration)
+    """
+    scheduler = FolderScheduler(pmrep, workers, cancel=cancel, progress=progress)
+    for folder in folders:
+        line_callback = None
+        if on_line is not None:
+            line_callback = functools.partial(on_line, folder)
+        scheduler.add_deployfolder(folder, on_line=line_callback, **params)
+    return scheduler.run()
@@ -0,0 +1,112 @@
+"""
+This module contains the Sequence Generator values used by
+Pmrep.updateseqgenvals_bulk: reading the current values from an
+objectexport XML file and selecting the values that need an update.
+"""
+import collections
+import xml.etree.ElementTree as ElementTree
+
+SequenceValue = collections.namedtuple('SequenceValue', [
+    'folder',     # folder name
+    'mapping',    # mapping name, None for reusable transformations
+    'name',       # Sequence Generator transformation name
+    'current',    # Current Value
+    'start',      # Start Value
+    'end',        # End Value
+    'increment',  # Increment By
+])
+SequenceValue.__new__.__defaults__ = (None, None, None, None)
+
+# TABLEATTRIBUTE names of the SequenceValue fields in the export
+ATTRIBUTES = collections.OrderedDict([
+    ('current', 'Current Value'),
+    ('start', 'Start Value'),
+    ('end', 'End Value'),
+    ('increment', 'Increment By'),
+])
+
+# updateseqgenvals option of every SequenceValue field
+OPTIONS = (('current', 'c'), ('start', 's'), ('end', 'e'), ('increment', 'i'))
+
+
+def as_value(item):
+    """
+    Return a SequenceValue for a SequenceValue, a tuple or a dict of the
+    SequenceValue fields. Values are converted to strings.
+    """
+    if not isinstance(item, SequenceValue):
+        item = SequenceValue(**item) if isinstance(item, dict) else SequenceValue(*item)
+    return item._replace(**dict(
+        (field, str(getattr(item, field))) for field in ATTRIBUTES if getattr(item, field) is not None))
+
+
+def key(value):
+    return value.folder, value.mapping, value.name
+
+
+def read_export(path):
+    """
+    Read the Sequence Generator transformations of an objectexport XML file,
+    element by element, so that large exports are never loaded at once.
+
+    Yields:
+        SequenceValue
+    """
+    folder = mapping = None
+    for event, element in ElementTree.iterparse(path, events=('start', 'end')):
+        tag = element.tag
+        if event == 'start':
+            if tag == 'FOLDER':
+                folder = element.get('NAME')
+            elif tag in ('MAPPING', 'MAPPLET'):
+                mapping = element.get('NAME')
+            continue
+        if tag == 'TRANSFORMATION':
+            if element.get('TYPE') == 'Sequence':
+                attributes = dict((a.get('NAME'), a.get('VALUE')) for a in element.iter('TABLEATTRIBUTE'))
+                yield SequenceValue(folder, mapping, element.get('NAME'), *[
+                    attributes.get(name) for name in ATTRIBUTES.values()])
+            element.clear()
+        elif tag in ('MAPPING', 'MAPPLET'):
+            mapping = None
+            element.clear()
+        elif tag == 'FOLDER':
+            folder = None
+            element.clear()
+
+
+def changed(values, current):
+    """
+    Split the desired values into those differing from the current values
+    (or without a known current value) and those already set.
+
+    Args:
+        values (list[SequenceValue]): desired values
+        current (iterable[SequenceValue]): current values
+
+    Returns:
+        (changed, unchanged) lists of SequenceValue
+    """
+    wanted = dict((key(value), value) for value in values)
+    unchanged = set()
+    for value in map(as_value, current):
+        desired = wanted.get(key(value))
+        if desired is not None and all(
+                getattr(desired, field) is None or getattr(desired, field) == getattr(value, field)
+                for field in ATTRIBUTES):
+            unchanged.add(key(value))
+    return ([value for value in values if key(value) not in unchanged],
+            [value for value in values if key(value) in unchanged])
+
+
+def command_params(value):
+    """
+    Return the updateseqgenvals kwargs setting a SequenceValue.
+    """
+    params = {'f': value.folder, 't': value.name}
+    if value.mapping is not None:
+        params['m'] = value.mapping
+    for field, option in OPTIONS:
+        if getattr(value, field) is not None:
+            params[option] = getattr(value, field)
+    return params
@@ -0,0 +1,100 @@
+"""
+This module contains helpers for reusing pmrep connection files (pmrep.cnx)
+across Pmrep instances and processes.
+
+pmrep keeps the state of a connection in the file named by the
+INFA_REPCNX_INFO environment variable. Giving every repository/host/user
+combination its own file lets independent processes share a connection
+without interfering with connections to other repositories.
+"""
+import hashlib
+import os
+import time
+
+# connect options identifying a session
+SESSION_KEY_OPTIONS = ('r', 'd', 'h', 'o', 'n', 's')
+# connect options holding the password (x) or its environment variable (X)
+CREDENTIAL_OPTIONS = ('x', 'X')
+
+
+def credentials_digest(params):
+    """
+    Return a hash of the password of the connect parameters, so that a
+    different password never reuses the session of another one.
+    """
+    password_env = params.get('X')
+    key = '\0'.join([str(params.get('x', '')), str(password_env or ''),
+                     os.environ.get(password_env, '') if password_env else ''])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def cnx_file_path(session_dir, params):
+    """
+    Return the connection file path for the given connect parameters.
+
+    Args:
+        session_dir (str): directory holding the connection files
+        params (dict): pmrep connect parameters
+
+    Returns:
+        String
+    """
+    key = '\0'.join([str(params.get(option, '')) for option in SESSION_KEY_OPTIONS] + [credentials_digest(params)])
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]
+    return os.path.join(session_dir, 'pmrep-%s.cnx' % digest)
+
+
+def prepare(cnx_file, session_dir=False):
+    """
+    Create the directory of a connection file, readable for the owner only.
+
+    Args:
+        cnx_file (str): connection file path
+        session_dir (bool): the directory is a session directory (see
+            cnx_file_path) and is made readable for the owner only also if
+            it exists
+    """
+    directory = os.path.dirname(os.path.abspath(cnx_file))
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700)
+    elif session_dir:
+        os.chmod(directory, 0o700)
+
+
+def protect(cnx_file):
+    """
+    Make a connection file written by pmrep readable for the owner only.
+    """
+    try:
+        os.chmod(cnx_file, 0o600)
+    except OSError:
+        pass  # not written by pmrep (e.g. a replayed session)
+
+
+def is_valid(cnx_file, ttl=None):
+    """
+    Check if a connection file exists and has been used within ttl seconds.
+
+    Args:
+        cnx_file (str): connection file path
+        ttl (Optional[float]): maximum idle time. Default is no limit
+            (the session is considered valid until pmrep rejects it).
+
+    Returns:
+        Bool
+    """
+    try:
+        idle = time.time() - os.path.getmtime(cnx_file)
+    except OSError:
+        return False
+    return ttl is None or idle < ttl
+
+
+def touch(cnx_file):
+    """
+    Mark a connection file as used now.
+    """
+    try:
+        os.utime(cnx_file, None)
+    except OSError:
+        pass  # removed by pmrep cleanup
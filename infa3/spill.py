@@ -0,0 +1,207 @@
+"""
+This module contains the spill-to-disk representation of large command
+outputs.
+
+When a Pmrep method is called with `spill=True` (or `spill=<directory>`),
+the STDOUT stream of pmrep goes straight into a temporary file instead of
+memory. The result is a SpilledOutput: a read-only sequence of records,
+backed by a memory-mapped file and parsed lazily, line by line, so that the
+memory footprint of a worker does not depend on the size of the output.
+"""
+import bisect
+import collections.abc
+import mmap
+import os
+import weakref
+
+import infa3.helper
+
+# distance (in bytes) between the line offsets kept in the sparse line index
+INDEX_STEP = 1 << 20
+
+
+class SpilledOutput(collections.abc.Sequence):
+    """
+    Lazily parsed records of a command output stored in a file.
+
+    The banner and trailer printed by pmrep are skipped, like with
+    format_output. Unlike format_output, blank lines inside the data region
+    are kept (as empty strings), so that every record corresponds to one
+    line of the file and can be addressed by its index.
+
+    Only a sparse line index (one entry per INDEX_STEP bytes) is kept in
+    memory. The file is deleted when the object is closed or garbage
+    collected, unless `delete` is False.
+
+    Args:
+        path (str): file holding the command output
+        field_separator (str): column separator of the output
+        record (Optional[callable]): builds a record from a split line
+        encoding (str): encoding of the output
+        delete (bool): delete the file on close()
+    """
+
+    def __init__(self, path, field_separator, record=None, encoding=None, delete=True):
+        self.path = path
+        self.field_separator = field_separator
+        self.record = record
+        self.encoding = encoding or infa3.helper.OUTPUT_ENCODING
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self._finalizer = weakref.finalize(self, _close, self._file, self._map, path if delete else None)
+        self.start, self.end = self._data_bounds()
+        self._index_lines = None
+        self._index_offsets = None
+        self._length = None
+
+    def _lines_from(self, offset, end=None):
+        """
+        Yield (offset, raw line) for the lines starting at offset.
+        """
+        data = self._map
+        end = self.end if end is None else end
+        while offset < end:
+            newline = data.find(b'\n', offset, end)
+            if newline < 0:
+                newline = end
+            yield offset, data[offset:newline]
+            offset = newline + 1
+
+    def _data_bounds(self):
+        data = self._map
+        size = len(data)
+        start = 0
+        offset = 0
+        invoked = False
+        while offset < size:
+            newline = data.find(b'\n', offset)
+            newline = size if newline < 0 else newline
+            line = data[offset:newline].decode(self.encoding, 'replace').strip()
+            if line.startswith(infa3.helper.INVOKED_PREFIX):
+                invoked = True
+            elif line and (invoked or not line.startswith(infa3.helper.BANNER_PREFIXES)):
+                start = offset
+                break
+            offset = newline + 1
+        else:
+            return size, size
+
+        end = size
+        while end > start:
+            line_start = max(data.rfind(b'\n', start, end - 1) + 1, start)
+            line = data[line_start:end].decode(self.encoding, 'replace').strip()
+            if line and not (line.endswith(infa3.helper.TRAILER_SUFFIXES)
+                             or line.startswith(infa3.helper.COMPLETED_PREFIX)):
+                break
+            end = line_start
+        return start, end
+
+    def _build_index(self):
+        data = self._map
+        lines = [0]
+        offsets = [self.start]
+        offset = self.start
+        count = 0
+        while offset < self.end:
+            boundary = data.find(b'\n', min(offset + INDEX_STEP, self.end), self.end)
+            boundary = self.end if boundary < 0 else boundary + 1
+            count += data[offset:boundary].count(b'\n')
+            if boundary == self.end and data[boundary - 1:boundary] != b'\n':
+                count += 1  # last line without a terminator
+            offset = boundary
+            if offset < self.end:
+                lines.append(count)
+                offsets.append(offset)
+        self._index_lines = lines
+        self._index_offsets = offsets
+        self._length = count
+
+    def _parse(self, raw):
+        item = raw.decode(self.encoding, 'replace').strip()
+        if self.field_separator in item:
+            item = item.split(self.field_separator)
+        return self.record(item) if self.record is not None else item
+
+    def __len__(self):
+        if self._length is None:
+            self._build_index()
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('SpilledOutput index out of range')
+        block = bisect.bisect_right(self._index_lines, index) - 1
+        line_number = self._index_lines[block]
+        for offset, raw in self._lines_from(self._index_offsets[block]):
+            if line_number == index:
+                return self._parse(raw)
+            line_number += 1
+
+    def __iter__(self):
+        for offset, raw in self._lines_from(self.start):
+            yield self._parse(raw)
+
+    def messages(self, limit=200):
+        """
+        Return up to `limit` non-blank lines of the data region as strings
+        (used to report errors).
+        """
+        result = []
+        for offset, raw in self._lines_from(self.start):
+            line = raw.decode(self.encoding, 'replace').strip()
+            if line:
+                result.append(line)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def succeeded(self):
+        """
+        Check whether the output reports a successful execution.
+        """
+        tail = self._map[max(self.end - 1, 0):]
+        return b'completed successfully' in tail
+
+    def close(self):
+        """
+        Unmap and (unless created with delete=False) delete the file.
+        """
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _close(file, mapped, path):
+    if isinstance(mapped, mmap.mmap):
+        mapped.close()
+    file.close()
+    if path is not None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def check_status(command, spilled):
+    """
+    Spill-to-disk counterpart of infa3.helper.cmd_status.
+
+    Args:
+        command (list): executed command
+        spilled (SpilledOutput): output of that command
+
+    Returns:
+        None
+    """
+    if not spilled.succeeded():
+        infa3.helper.cmd_status(command, spilled.messages())
@@ -0,0 +1,148 @@
+"""
+This module contains a watchdog reporting pmrep calls that exceed their
+latency SLO.
+
+A Watchdog is attached to one or more Pmrep instances (the `watchdog`
+argument). Every command run by those instances is tracked while in flight;
+a background thread reports each call as soon as it runs longer than the
+SLO of its command, so hung calls are noticed before they finish (or are
+killed by a timeout).
+"""
+import collections
+import itertools
+import logging
+import threading
+import time
+
+from infa3.instrument import sanitize_command
+
+logger = logging.getLogger(__name__)
+
+SlowCall = collections.namedtuple('SlowCall', [
+    'command',   # pmrep command name
+    'args',      # sanitized command line arguments
+    'started',   # epoch timestamp of the call start
+    'elapsed',   # seconds elapsed when the call was reported
+    'slo',       # SLO of the command, in seconds
+    'finished',  # whether the call had already finished when reported
+])
+
+
+def log_slow_call(slow_call):
+    """
+    Default watchdog callback: log a warning.
+    """
+    logger.warning("pmrep %s %s running for %.1fs (SLO %.1fs)%s",
+                   slow_call.command, " ".join(slow_call.args), slow_call.elapsed,
+                   slow_call.slo, '' if slow_call.finished else ', still running')
+
+
+class Watchdog(object):
+    """
+    Report pmrep calls exceeding their latency SLO.
+
+    Args:
+        slo (float or dict): SLO in seconds, either for all commands or as
+            a dict of command name to SLO. The None key of the dict holds
+            the default for commands not listed (no SLO if absent).
+        callback (Optional[callable]): called with a SlowCall for every
+            call exceeding its SLO (once per call). Default logs a warning.
+        interval (float): seconds between checks of in-flight calls
+    """
+
+    def __init__(self, slo, callback=None, interval=1.0):
+        self.slo = slo if isinstance(slo, dict) else {None: slo}
+        self.callback = callback or log_slow_call
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._in_flight = {}
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def slo_for(self, command):
+        return self.slo.get(command, self.slo.get(None))
+
+    def track(self, command):
+        """
+        Return a context manager tracking a pmrep call for its duration.
+
+        Args:
+            command (list): executed command, including the pmrep binary path
+        """
+        return _Tracked(self, command)
+
+    def in_flight(self):
+        """
+        Return (command, args, elapsed seconds) of all calls in flight.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            return [(call['command'], call['args'], now - call['counter'])
+                    for call in self._in_flight.values()]
+
+    def stop(self):
+        """
+        Stop the background thread. It is restarted when a new call is tracked.
+        """
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        self._thread = None
+
+    def _register(self, command):
+        slo = self.slo_for(command[1])
+        call = {
+            'command': command[1],
+            'args': sanitize_command(command[2:], command[1]),
+            'started': time.time(),
+            'counter': time.perf_counter(),
+            'slo': slo,
+            'reported': False,
+        }
+        with self._lock:
+            call_id = next(self._ids)
+            self._in_flight[call_id] = call
+            if slo is not None and self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name='infa3-watchdog')
+                self._thread.daemon = True
+                self._thread.start()
+        return call_id
+
+    def _unregister(self, call_id):
+        with self._lock:
+            call = self._in_flight.pop(call_id)
+        self._check(call, time.perf_counter(), finished=True)
+
+    def _check(self, call, now, finished=False):
+        elapsed = now - call['counter']
+        with self._lock:
+            if call['slo'] is None or call['reported'] or elapsed <= call['slo']:
+                return
+            call['reported'] = True
+        self.callback(SlowCall(call['command'], call['args'], call['started'],
+                               elapsed, call['slo'], finished))
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            now = time.perf_counter()
+            with self._lock:
+                calls = list(self._in_flight.values())
+            for call in calls:
+                self._check(call, now)
+
+
+class _Tracked(object):
+
+    def __init__(self, watchdog, command):
+        self.watchdog = watchdog
+        self.command = command
+
+    def __enter__(self):
+        self.call_id = self.watchdog._register(self.command)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.watchdog._unregister(self.call_id)
@@ -0,0 +1,342 @@
+"""
+This module contains writers streaming command outputs (listings) to disk.
+
+The writers consume any iterable of output rows - lists, records or plain
+strings for single column outputs - and never hold more than one buffer of
+rows in memory. Combined with spilled outputs (see infa3.spill), a listing of
+the whole repository goes straight to disk without an intermediate list:
+
+    with p.listobjects(o='mapping', spill=True) as mappings, \\
+            CsvWriter('mappings.csv', columns=['type', 'name'], chunk_rows=10 ** 6) as writer:
+        writer.write(mappings)
+
+Outputs larger than `chunk_rows` rows are split over several numbered files
+(e.g. mappings-00000.csv, mappings-00001.csv, ...).
+"""
+import array
+import csv
+import io
+import itertools
+import json
+import os
+
+# number of rows collected before they are handed over to the file at once
+BUFFER_ROWS = 10000
+
+# file name of the fields of rows wider than the columns in ArrayChunkWriter chunks
+EXTRA_COLUMN = '_extra'
+
+
+def as_tuple(row):
+    """
+    Turn a formatted output row into a tuple of columns.
+    """
+    if isinstance(row, str):
+        return (row,)
+    return tuple(row)
+
+
+def narrowest_typecode(values):
+    """
+    Return the smallest unsigned array typecode able to index `values`
+    distinct values.
+    """
+    for typecode in ('B', 'H', 'I', 'L'):
+        if values <= 1 << (8 * array.array(typecode).itemsize):
+            return typecode
+    return 'Q'
+
+
+class ChunkedWriter(object):
+    """
+    Base class of the writers: buffering and splitting of the rows into
+    chunk files.
+
+    Args:
+        path (str): output file. When the rows are split into chunks, the
+            chunk number is inserted before the extension.
+        columns (Optional[list]): column names. Default are the field names
+            of the first record (for namedtuples) or column_0, column_1, ...
+        chunk_rows (Optional[int]): maximum number of rows per file.
+            Default is no limit (a single file).
+        buffer_rows (int): number of rows written to the file at once
+    """
+
+    extension = ''
+
+    def __init__(self, path, columns=None, chunk_rows=None, buffer_rows=BUFFER_ROWS):
+        self.path = path
+        self.columns = list(columns) if columns is not None else None
+        self.chunk_rows = chunk_rows
+        self.buffer_rows = buffer_rows
+        self.rows = 0
+        self.files = []
+        self._chunk_rows = 0
+        self._file = None
+
+    def chunk_path(self, chunk):
+        if self.chunk_rows is None:
+            return self.path
+        root, extension = os.path.splitext(self.path)
+        return '%s-%05d%s' % (root, chunk, extension or self.extension)
+
+    def _guess_columns(self, row):
+        fields = getattr(row, '_fields', None)
+        if fields is not None:
+            return list(fields)
+        return ['column_%d' % i for i in range(len(as_tuple(row)))]
+
+    def write(self, rows):
+        """
+        Write all rows of an iterable, buffer by buffer.
+
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        rows = iter(rows)
+        while True:
+            limit = self.buffer_rows
+            if self.chunk_rows is not None:
+                limit = min(limit, self.chunk_rows - self._chunk_rows)
+            buffer = list(itertools.islice(rows, limit))
+            if not buffer:
+                return written
+            if self.columns is None:
+                self.columns = self._guess_columns(buffer[0])
+            if self._file is None:
+                self._start_chunk()
+            self._write_buffer(buffer)
+            written += len(buffer)
+            self.rows += len(buffer)
+            self._chunk_rows += len(buffer)
+            if self.chunk_rows is not None and self._chunk_rows >= self.chunk_rows:
+                self._close_chunk()
+
+    def _start_chunk(self):
+        path = self.chunk_path(len(self.files))
+        self._open(path)
+        self.files.append(path)
+
+    def _open(self, path):
+        raise NotImplementedError
+
+    def _write_buffer(self, buffer):
+        raise NotImplementedError
+
+    def _close_chunk(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._chunk_rows = 0
+
+    def close(self):
+        """
+        Flush and close the current file. A writer with known columns which
+        did not receive any row still creates one (empty) file.
+        """
+        if not self.files and self.columns is not None:
+            self._start_chunk()
+        self._close_chunk()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvWriter(ChunkedWriter):
+    """
+    Write rows as CSV, each file starting with a header line of the column
+    names (unless `header` is False).
+
+    Args:
+        delimiter (str): field delimiter. Default ','.
+        encoding (str): file encoding. Default 'utf-8'.
+    """
+
+    extension = '.csv'
+
+    def __init__(self, path, columns=None, chunk_rows=None, buffer_rows=BUFFER_ROWS,
+                 delimiter=',', header=True, encoding='utf-8'):
+        super(CsvWriter, self).__init__(path, columns, chunk_rows, buffer_rows)
+        self.delimiter = delimiter
+        self.header = header
+        self.encoding = encoding
+        self._csv = None
+
+    def _open(self, path):
+        self._file = io.open(path, 'w', encoding=self.encoding, newline='')
+        self._csv = csv.writer(self._file, delimiter=self.delimiter)
+        if self.header:
+            self._csv.writerow(self.columns)
+
+    def _write_buffer(self, buffer):
+        self._csv.writerows(map(as_tuple, buffer))
+
+
+class JsonlWriter(ChunkedWriter):
+    """
+    Write rows as JSON objects (one per line) keyed by the column names.
+    Missing columns of short rows are written as null, the fields of rows
+    wider than the columns as a list under `extra_key`.
+
+    Args:
+        extra_key (str): key of the fields exceeding the columns
+    """
+
+    extension = '.jsonl'
+
+    def __init__(self, path, columns=None, chunk_rows=None, buffer_rows=BUFFER_ROWS, encoding='utf-8',
+                 extra_key='_extra'):
+        super(JsonlWriter, self).__init__(path, columns, chunk_rows, buffer_rows)
+        self.encoding = encoding
+        self.extra_key = extra_key
+
+    def _open(self, path):
+        self._file = io.open(path, 'w', encoding=self.encoding)
+
+    def _record(self, row):
+        row = as_tuple(row)
+        width = len(self.columns)
+        record = dict(itertools.zip_longest(self.columns, row[:width]))
+        if len(row) > width:
+            record[self.extra_key] = list(row[width:])
+        return record
+
+    def _write_buffer(self, buffer):
+        dumps = json.JSONEncoder(ensure_ascii=False).encode
+        self._file.write(''.join(dumps(self._record(row)) + '\n' for row in buffer))
+
+
+class ArrayChunkWriter(ChunkedWriter):
+    """
+    Write rows column by column, Parquet style: every chunk is a directory
+    holding, for each column, the dictionary of its distinct values (JSON)
+    and the array of value indexes (raw array module data in the narrowest
+    unsigned type, native byte order). The repetitive columns of the listings (object types, folders,
+    ...) compress to a few bytes per row this way.
+
+    A manifest.json file in `path` (a directory) describes the chunks; use
+    read_array_chunks() to read the rows back. The fields of rows wider
+    than the columns are kept in an additional `_extra` column of their
+    chunk and appended to the rows read back.
+    """
+
+    def __init__(self, path, columns=None, chunk_rows=10 ** 6, buffer_rows=BUFFER_ROWS):
+        super(ArrayChunkWriter, self).__init__(path, columns, chunk_rows, buffer_rows)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._chunks = []
+        self._dictionaries = None
+        self._codes = None
+        self._extra = None
+
+    def chunk_path(self, chunk):
+        return os.path.join(self.path, 'chunk-%05d' % chunk)
+
+    def _open(self, path):
+        if not os.path.isdir(path):
+            os.mkdir(path)
+        self._file = path
+        self._dictionaries = [{} for _ in self.columns]
+        self._codes = [array.array('I') for _ in self.columns]
+
+    def _write_buffer(self, buffer):
+        width = len(self.columns)
+        for number, row in enumerate(buffer, self._chunk_rows):
+            row = as_tuple(row)
+            for i in range(width):
+                value = row[i] if i < len(row) else None
+                dictionary = self._dictionaries[i]
+                code = dictionary.get(value)
+                if code is None:
+                    code = dictionary[value] = len(dictionary)
+                self._codes[i].append(code)
+            if len(row) > width or self._extra is not None:
+                self._write_extra(number, row[width:])
+
+    def _write_extra(self, number, values):
+        if self._extra is None:
+            # rows before the first wide row of the chunk have no extra fields
+            self._extra = ({(): 0}, array.array('I', [0]) * number)
+        dictionary, codes = self._extra
+        code = dictionary.get(values)
+        if code is None:
+            code = dictionary[values] = len(dictionary)
+        codes.append(code)
+
+    def _close_chunk(self):
+        if self._file is None:
+            return
+        typecodes = []
+        for name, dictionary, codes in zip(self.columns, self._dictionaries, self._codes):
+            typecode = narrowest_typecode(len(dictionary))
+            typecodes.append(typecode)
+            with open(os.path.join(self._file, name + '.json'), 'w') as f:
+                json.dump(sorted(dictionary, key=dictionary.get), f)
+            with open(os.path.join(self._file, name + '.codes'), 'wb') as f:
+                array.array(typecode, codes).tofile(f)
+        chunk = {
+            'path': os.path.basename(self._file),
+            'rows': self._chunk_rows,
+            'typecodes': typecodes,
+        }
+        if self._extra is not None:
+            dictionary, codes = self._extra
+            chunk['extra'] = narrowest_typecode(len(dictionary))
+            with open(os.path.join(self._file, EXTRA_COLUMN + '.json'), 'w') as f:
+                json.dump(sorted(dictionary, key=dictionary.get), f)
+            with open(os.path.join(self._file, EXTRA_COLUMN + '.codes'), 'wb') as f:
+                array.array(chunk['extra'], codes).tofile(f)
+        self._chunks.append(chunk)
+        self._file = self._dictionaries = self._codes = self._extra = None
+        self._chunk_rows = 0
+
+    def close(self):
+        if not self._chunks and self._file is None and self.columns is not None:
+            self._start_chunk()
+        self._close_chunk()
+        with open(os.path.join(self.path, 'manifest.json'), 'w') as f:
+            json.dump({'columns': self.columns, 'chunks': self._chunks}, f, indent=2)
+
+
+def read_array_chunks(path, columns=None):
+    """
+    Read the rows written by ArrayChunkWriter, chunk by chunk.
+
+    Args:
+        path (str): directory written by ArrayChunkWriter
+        columns (Optional[list]): names of the columns to read. Default
+            are all columns, followed by the extra fields of wide rows.
+
+    Yields:
+        Tuple
+    """
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    extra = not columns
+    columns = columns or manifest['columns']
+    for chunk in manifest['chunks']:
+        chunk_path = os.path.join(path, chunk['path'])
+        typecodes = dict(zip(manifest['columns'], chunk['typecodes']))
+        decoded = []
+        for name in columns:
+            with open(os.path.join(chunk_path, name + '.json')) as f:
+                dictionary = json.load(f)
+            codes = array.array(typecodes[name])
+            with open(os.path.join(chunk_path, name + '.codes'), 'rb') as f:
+                codes.fromfile(f, chunk['rows'])
+            decoded.append(map(dictionary.__getitem__, codes))
+        if extra and 'extra' in chunk:
+            with open(os.path.join(chunk_path, EXTRA_COLUMN + '.json')) as f:
+                dictionary = [tuple(values) for values in json.load(f)]
+            codes = array.array(chunk['extra'])
+            with open(os.path.join(chunk_path, EXTRA_COLUMN + '.codes'), 'rb') as f:
+                codes.fromfile(f, chunk['rows'])
+            for row, values in zip(zip(*decoded), map(dictionary.__getitem__, codes)):
+                yield row + values
+            continue
+        for row in zip(*decoded):
+            yield row